@@ -0,0 +1,242 @@
+# ann_index.py  —  Approximate candidate retrieval over profile feature vectors
+#
+# Every candidate profile is embedded once into a fixed-length vector, and
+# every anchor into an "ideal partner" query vector, laid out so that
+# query · item approximates the anchor-dependent part of the CC score:
+#
+#   scale_fit       log revenue, log team size   exp(-½(Δ/1.5)²) ≈ 1 - ½(Δ/1.5)²,
+#                                                 expanded into a linear + a square term
+#   demand_fit      log capacity / order tons    same, centred on a 2× capacity headroom
+#   behavioral_fit  intent, prompt response      linear
+#   reliability     payment, certification       linear; certs as L2-normalised one-hots
+#   geo_fit         geo codes                    one-hot state / country; the query
+#                                                 holds the anchor's GEO_TABLE row
+#   recency         √Recency_Weight              linear stand-in for the multiplier
+#
+# Candidates are grouped per (side, industry), as in MatchIndex. Each group
+# gets an IVF index: k-means centroids plus the rows of every list in CSR
+# form. A query ranks the lists by centroid · query, scans the best nprobe
+# lists exactly and returns a shortlist, which the matchmaker then scores
+# with the full fusion. Everything is NumPy on the CPU; indexes are built
+# lazily and rebuilt when MatchIndex replaces a bucket.
+#
+# SHORTLIST and NPROBE_SHARE come from prune_recall.py --mode ann ("covered"
+# = share of the exhaustive top 10 inside the shortlist, 100k synthetic rows,
+# ~9.5k per bucket, ~97 lists, exhaustive 12.4 ms):
+#
+#   nprobe   keep 300          keep 1000         keep 3000
+#   8        0.33  2.2 ms      0.39  2.9 ms      0.63  4.5 ms
+#   32       0.47  1.9 ms      0.61  2.8 ms      0.66  4.8 ms
+#   64       0.56  3.1 ms      0.74  3.4 ms      0.88  6.2 ms
+#   128      0.56  3.5 ms      0.75  3.3 ms      0.92  6.6 ms
+#
+# Two thirds of the lists gets nearly all of what a full scan does. On the
+# shipped data (buckets of ~1,140) a 1,000 shortlist is most of the bucket
+# and saves nothing, so the index only pays off on buckets well above it.
+#
+# ANN retrieval is LOSSY and therefore off by default (ann=None in
+# get_top_buyers / get_top_exporters, ann=False in run_matchmaking). Fusion
+# renormalises over the shortlist rather than the whole bucket, so even a
+# candidate inside the shortlist can rank differently than it would under
+# exhaustive scoring: recall@10 after fusion is 0.39 at nprobe 64 / keep
+# 3000, below the "covered" share above.
+
+import math
+import numpy as np
+from data_models import is_null_cert
+from geo_engine import GEO_TABLE
+from match_index import MatchIndex
+from profile_table import ProfileTable
+from scoring_engine import CC_WEIGHTS, top_k_indices, is_exporter
+
+SHORTLIST     = 1000
+NPROBE_SHARE  = 2 / 3        # share of an index's lists scanned per query
+KMEANS_ITERS  = 15
+SIGMA         = 1.5          # log-ratio width used by log_ratio_similarity
+HEADROOM      = math.log(2)  # demand_fit is flat for capacity 1×–3× the order
+RECENCY_W     = 0.15         # 0.30 multiplier slope × a typical CC score of 0.5
+_GEO_AXIS     = {"state": 0, "country": 1}
+
+# Per candidate side: tons field, prompt field, payment field, geo field / axis.
+_FIELDS = {
+    "exporter": ("Manufacturing_Capacity_Tons", "Prompt_Response_Score", "Good_Payment_Terms",
+                 "State", "state"),
+    "importer": ("Avg_Order_Tons", "Prompt_Response", "Good_Payment_History",
+                 "Country", "country"),
+}
+
+
+def _log(v):
+    return np.log(np.maximum(np.asarray(v, dtype=float), 1.0)) / SIGMA
+
+
+# ── Embedding ─────────────────────────────────────────────────────────────────
+
+def item_vectors(table: ProfileTable, side: str) -> np.ndarray:
+    """(n, d) float32 item vectors for the candidate profiles of one side."""
+    tons, prompt, pay, geo_field, axis = _FIELDS[side]
+    rev, team, ton = (_log(table.numeric(f)) for f in ("Revenue_Size_USD", "Team_Size", tons))
+    n      = len(table)
+    dense  = np.column_stack([
+        rev,  -0.5 * rev ** 2,
+        team, -0.5 * team ** 2,
+        ton,  -0.5 * ton ** 2,
+        table.numeric("Intent_Score"),
+        table.numeric(prompt),
+        table.numeric(pay),
+        np.sqrt(np.maximum(table.numeric("Recency_Weight"), 0.0)),
+    ]) if n else np.zeros((0, 10))
+
+    certs = np.zeros((n, len(table.cert_vocab)))
+    rows  = np.repeat(np.arange(n), np.diff(table.cert_offsets))
+    certs[rows, table.cert_codes] = 1.0
+    certs[:, [is_null_cert(c) for c in table.cert_vocab]] = 0.0
+    norms = np.linalg.norm(certs, axis=1, keepdims=True)
+    certs = np.divide(certs, norms, out=certs, where=norms > 0)
+
+    geo_codes = GEO_TABLE.encode(axis, table.vocab[geo_field])[table.codes(geo_field)]
+    geo       = np.zeros((n, GEO_TABLE.values.shape[_GEO_AXIS[axis]]))
+    geo[np.arange(n), geo_codes] = 1.0
+    return np.hstack([dense, certs, geo]).astype(np.float32)
+
+
+def query_vector(anchor, table: ProfileTable) -> np.ndarray:
+    """
+    Ideal-partner vector of `anchor` against candidates stored in `table`
+    (its certification vocabulary fixes the cert dimensions).
+    """
+    w    = CC_WEIGHTS
+    a_ex = is_exporter(anchor)
+    rev  = float(_log(anchor.Revenue_Size_USD))
+    team = float(_log(anchor.Team_Size))
+    if a_ex:   # candidate orders should sit ~2× below our capacity
+        ideal = float(_log(anchor.Manufacturing_Capacity_Tons)) - HEADROOM / SIGMA
+    else:      # candidate capacity should sit ~2× above our order
+        ideal = float(_log(anchor.Avg_Order_Tons)) + HEADROOM / SIGMA
+    dense = [
+        0.6 * w["scale_fit"] * rev,  0.6 * w["scale_fit"],
+        0.4 * w["scale_fit"] * team, 0.4 * w["scale_fit"],
+        w["demand_fit"] * ideal,     w["demand_fit"],
+        0.3 * w["behavioral_fit"],
+        0.2 * w["behavioral_fit"],
+        0.3 * w["reliability"],
+        RECENCY_W * math.sqrt(max(anchor.Recency_Weight, 0.0)),
+    ]
+
+    certs = np.zeros(len(table.cert_vocab))
+    index = {c: i for i, c in enumerate(table.cert_vocab)}
+    for c in anchor.Certification or ():
+        if c in index and not is_null_cert(c):
+            certs[index[c]] = 1.0
+    if certs.any():
+        certs *= 0.4 * w["reliability"] / np.linalg.norm(certs)
+
+    ind = GEO_TABLE.code("industry", anchor.Industry)
+    if a_ex:
+        geo = GEO_TABLE.values[GEO_TABLE.code("state", anchor.State), :, ind, 0]
+    else:
+        geo = GEO_TABLE.values[:, GEO_TABLE.code("country", anchor.Country), ind, 0]
+    return np.concatenate([dense, certs, w["geo_fit"] * geo]).astype(np.float32)
+
+
+# ── IVF ───────────────────────────────────────────────────────────────────────
+
+def kmeans(x: np.ndarray, k: int, iters=KMEANS_ITERS, seed=0) -> np.ndarray:
+    """Lloyd's k-means from k distinct sampled rows; returns the centroids."""
+    rng = np.random.default_rng(seed)
+    cen = x[rng.choice(len(x), size=k, replace=False)].astype(np.float64)
+    sq  = (x.astype(np.float64) ** 2).sum(axis=1)
+    for _ in range(iters):
+        assign = np.argmin(sq[:, None] - 2.0 * x @ cen.T + (cen ** 2).sum(axis=1), axis=1)
+        counts = np.bincount(assign, minlength=k)
+        sums   = np.column_stack([np.bincount(assign, weights=x[:, j], minlength=k)
+                                  for j in range(x.shape[1])])
+        moved  = counts > 0
+        new    = cen.copy()
+        new[moved] = sums[moved] / counts[moved, None]
+        if np.allclose(new, cen):
+            break
+        cen = new
+    return cen
+
+
+class IVFIndex:
+    """Inverted-file index for maximum inner product search over fixed vectors."""
+
+    def __init__(self, vectors: np.ndarray, n_lists=None, seed=0):
+        n = len(vectors)
+        self.vectors   = vectors
+        self.n_lists   = max(1, min(n, n_lists or int(round(math.sqrt(n)))))
+        self.centroids = kmeans(vectors, self.n_lists, seed=seed).astype(np.float32) if n else \
+                         np.zeros((1, vectors.shape[1]), dtype=np.float32)
+        assign         = self._assign(vectors)
+        self.order     = np.argsort(assign, kind="stable")          # rows grouped by list
+        self.offsets   = np.zeros(self.n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assign, minlength=self.n_lists), out=self.offsets[1:])
+
+    def _assign(self, x):
+        if not len(x):
+            return np.zeros(0, dtype=np.int64)
+        c = self.centroids
+        return np.argmin((c ** 2).sum(axis=1) - 2.0 * x @ c.T, axis=1)
+
+    def search(self, query: np.ndarray, k: int, nprobe=None) -> np.ndarray:
+        """
+        Rows of the (approximately) k largest query · vector, best first.
+        Scans the nprobe best lists, and further lists while they hold fewer
+        than k rows between them.
+        """
+        nprobe = self.n_lists if nprobe is None else max(1, min(nprobe, self.n_lists))
+        ranked = np.argsort(-(self.centroids @ query), kind="stable")
+        sizes  = np.cumsum(np.diff(self.offsets)[ranked])
+        nprobe = max(nprobe, int(np.searchsorted(sizes, k)) + 1)
+        rows   = np.concatenate([self.order[self.offsets[l]:self.offsets[l + 1]]
+                                 for l in ranked[:nprobe]])
+        return rows[top_k_indices(self.vectors[rows] @ query, k)]
+
+
+# ── Per-industry shortlists ───────────────────────────────────────────────────
+
+class AnnIndex:
+    """
+    IVF shortlists on top of a MatchIndex, one per (side, industry) bucket.
+
+        ann = AnnIndex(match_index)
+        get_top_buyers(exporter, match_index, risk, ann=ann, prune=300)
+
+    nprobe defaults to NPROBE_SHARE of the lists; raise it for recall, lower
+    it for speed. Results are lossy (see the module header): use it only
+    where latency matters more than matching exhaustive scoring.
+    """
+
+    def __init__(self, index: MatchIndex, n_lists=None, nprobe=None, seed=0):
+        self.index   = index
+        self.n_lists = n_lists
+        self.nprobe  = nprobe
+        self.seed    = seed
+        self._ivf    = {}   # (side, industry) → (bucket table, IVFIndex)
+
+    def build(self):
+        """Build every bucket's index now instead of on first query."""
+        for side in ("exporter", "importer"):
+            for industry in self.index.industries(side):
+                self._get(side, industry)
+        return self
+
+    def _get(self, side: str, industry: str):
+        table = self.index.candidates(side, industry)
+        entry = self._ivf.get((side, industry))
+        if entry is None or entry[0] is not table:        # bucket replaced since
+            entry = (table, IVFIndex(item_vectors(table, side), self.n_lists, self.seed))
+            self._ivf[(side, industry)] = entry
+        return entry
+
+    def shortlist(self, anchor, size=SHORTLIST, nprobe=None) -> ProfileTable:
+        """Up to `size` same-industry candidates for anchor, in bucket order."""
+        side         = "importer" if is_exporter(anchor) else "exporter"
+        table, ivf   = self._get(side, anchor.Industry)
+        if len(table) <= size:
+            return table
+        nprobe = nprobe or self.nprobe or max(1, math.ceil(ivf.n_lists * NPROBE_SHARE))
+        rows   = ivf.search(query_vector(anchor, table), size, nprobe)
+        return table.take(np.sort(rows))
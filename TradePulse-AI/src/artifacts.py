@@ -0,0 +1,179 @@
+# artifacts.py  —  Versioned, memory-mappable matchmaker artifact
+#
+# An artifact is a directory:
+#   manifest.json             schema version, source CSV size / mtime / hash, reference
+#                             date, risk map, and per-side table layout
+#                             (fields, vocabularies, array files)
+#   exporter__<field>.npy     one file per ProfileTable buffer
+#   importer__<field>.npy
+#
+# load_artifact memory-maps every .npy, so opening one costs a JSON parse and
+# a few mmap calls: the OS pages columns in on first touch and processes that
+# open the same artifact share those pages. Columns are stored by field name,
+# so adding a field to a dataclass does not invalidate old artifacts unless
+# the new field is actually needed (load_artifact names what is missing).
+#
+# is_current trusts a source whose size and mtime_ns still match the
+# manifest and hashes it only when they do not (or with verify=True), so a
+# start-up check is a stat() per CSV rather than a full read.
+
+import dataclasses
+import hashlib
+import json
+import os
+import shutil
+import time
+import numpy as np
+from data_models import ExporterProfile, ImporterProfile
+from profile_table import ProfileTable
+from preprocess import REFERENCE_DATE
+
+SCHEMA_VERSION  = 1
+MANIFEST        = "manifest.json"
+PROFILE_CLASSES = {"exporter": ExporterProfile, "importer": ImporterProfile}
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def source_hashes(sources: dict) -> dict:
+    """{name: path} → {name: {"file", "bytes", "mtime_ns", "sha256"}} for the manifest."""
+    out = {}
+    for name, path in sources.items():
+        st        = os.stat(path)
+        out[name] = {"file": os.path.basename(path), "bytes": st.st_size,
+                     "mtime_ns": st.st_mtime_ns, "sha256": file_sha256(path)}
+    return out
+
+
+# ── Write ─────────────────────────────────────────────────────────────────────
+
+def replace_dir(tmp: str, path: str):
+    """
+    Swap the fully written directory `tmp` in at `path`. The old copy is
+    renamed aside to <path>.old first and deleted only after the swap, so a
+    failure at any point leaves a complete directory behind (the old one,
+    restored to `path` if the swap itself fails). Between the two renames
+    `path` briefly does not exist; readers never see a half-written one.
+    """
+    path = path.rstrip(os.sep)
+    old  = path + ".old"
+    shutil.rmtree(old, ignore_errors=True)
+    moved = os.path.exists(path)
+    if moved:
+        os.replace(path, old)
+    try:
+        os.replace(tmp, path)
+    except BaseException:
+        if moved:
+            os.replace(old, path)
+        raise
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def save_artifact(path: str, exporters: ProfileTable, importers: ProfileTable,
+                  industry_risk_map: dict, sources=None, reference_date=REFERENCE_DATE) -> dict:
+    """
+    Write both tables and the risk map to the directory `path`, built in
+    <path>.tmp and swapped in by replace_dir. `sources` maps a name to the CSV it was built from; their
+    hashes let readers tell whether the artifact is stale. Returns the manifest.
+    """
+    tmp = path.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    tables = {}
+    for side, table in (("exporter", exporters), ("importer", importers)):
+        arrays, meta = table.to_arrays()
+        files = {}
+        for name, arr in arrays.items():
+            fname = f"{side}__{name.lstrip('_')}.npy"
+            np.save(os.path.join(tmp, fname), np.ascontiguousarray(arr))
+            files[name] = fname
+        tables[side] = {
+            "profile_class": meta["profile_cls"].__name__,
+            "rows":          len(table),
+            "fields":        list(table.kinds),
+            "vocab":         meta["vocab"],
+            "cert_vocab":    meta["cert_vocab"],
+            "arrays":        files,
+        }
+
+    manifest = {
+        "schema_version":    SCHEMA_VERSION,
+        "created":           time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "reference_date":    str(reference_date.date()),
+        "sources":           source_hashes(sources or {}),
+        "industry_risk_map": {k: float(v) for k, v in industry_risk_map.items()},
+        "tables":            tables,
+    }
+    with open(os.path.join(tmp, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    replace_dir(tmp, path)
+    return manifest
+
+
+# ── Read ──────────────────────────────────────────────────────────────────────
+
+def read_manifest(path: str) -> dict:
+    with open(os.path.join(path, MANIFEST)) as f:
+        manifest = json.load(f)
+    version = manifest.get("schema_version")
+    if version != SCHEMA_VERSION:
+        raise ValueError(f"artifact schema {version} is not supported (expected {SCHEMA_VERSION})")
+    return manifest
+
+
+def _load_table(path: str, side: str, spec: dict, mmap: bool) -> ProfileTable:
+    profile_cls = PROFILE_CLASSES[side]
+    missing     = [f.name for f in dataclasses.fields(profile_cls) if f.name not in spec["fields"]]
+    if missing:
+        raise ValueError(f"{side} artifact lacks fields {missing}; rebuild it")
+    arrays = {name: np.load(os.path.join(path, fname), mmap_mode="r" if mmap else None)
+              for name, fname in spec["arrays"].items()}
+    meta   = {"profile_cls": profile_cls, "vocab": spec["vocab"], "cert_vocab": spec["cert_vocab"]}
+    table  = ProfileTable.from_arrays(arrays, meta)
+    # Fields dropped from the dataclass since the artifact was written are ignored.
+    table.columns = {k: v for k, v in table.columns.items() if k in table.kinds}
+    return table
+
+
+def load_artifact(path: str, mmap=True) -> dict:
+    """
+    {"exporters", "importers", "industry_risk_map", "manifest"}, the same keys
+    the old pickle held, with ProfileTables over memory-mapped columns.
+    """
+    manifest = read_manifest(path)
+    tables   = {side: _load_table(path, side, spec, mmap)
+                for side, spec in manifest["tables"].items()}
+    return {
+        "exporters":         tables["exporter"],
+        "importers":         tables["importer"],
+        "industry_risk_map": manifest["industry_risk_map"],
+        "manifest":          manifest,
+    }
+
+
+def is_current(manifest: dict, sources: dict, verify=False) -> bool:
+    """
+    True when every named source CSV is unchanged since build time: same size,
+    and the same mtime or (when the mtime moved, or verify=True) the same hash.
+    """
+    recorded = manifest.get("sources", {})
+    for name, src in sources.items():
+        entry = recorded.get(name)
+        if entry is None or not os.path.exists(src):
+            return False
+        st = os.stat(src)
+        if entry["bytes"] != st.st_size:
+            return False
+        if not verify and entry.get("mtime_ns") == st.st_mtime_ns:
+            continue
+        if entry["sha256"] != file_sha256(src):
+            return False
+    return True
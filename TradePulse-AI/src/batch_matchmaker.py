@@ -0,0 +1,245 @@
+# batch_matchmaker.py  —  All-pairs batch matchmaking across a process pool
+#
+# Produces top-K buyers for every exporter and top-K exporters for every buyer
+# (the nightly job). Both ProfileTables are sorted by industry so that every
+# bucket is a contiguous row range. Their NumPy buffers then go into
+# multiprocessing.shared_memory once; workers attach to them by name and read
+# buckets as zero-copy slices, so nothing profile-sized is ever pickled.
+#
+# Anchors are cut into shards of SHARD_SIZE within one industry, and a worker
+# scores a shard as one block (compute_rrf_scores_many). The parent keeps at
+# most 2 × workers shards in flight and appends each finished shard to the
+# output file straight away, so memory stays bounded by the tables plus a few
+# shards of results, whatever the dataset size. Output rows are
+#   anchor_id, industry, rank, candidate_id, score
+# in shard completion order; sort by (anchor_id, rank) if order matters.
+#
+#   python batch_matchmaker.py out/ --workers 8 --top-k 100
+
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+import pandas as pd
+from profile_store import matching_view
+from profile_table import ProfileTable
+from scoring_engine import compute_rrf_scores_many
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:                      # parquet output is optional
+    pa = pq = None
+
+SHARD_SIZE     = 256
+RESULT_COLUMNS = ("anchor_id", "industry", "rank", "candidate_id", "score")
+OUTPUTS        = {"exporter": "buyers_for_exporters", "importer": "exporters_for_buyers"}
+OTHER_SIDE     = {"exporter": "importer", "importer": "exporter"}
+
+
+# ── Shared memory ─────────────────────────────────────────────────────────────
+
+def share_table(table: ProfileTable):
+    """Copy a table's buffers into shared memory → (blocks to close/unlink, spec to pickle)."""
+    arrays, meta = table.to_arrays()
+    blocks, layout = [], {}
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        shm = SharedMemory(create=True, size=max(arr.nbytes, 1))
+        np.ndarray(arr.shape, arr.dtype, buffer=shm.buf)[...] = arr
+        blocks.append(shm)
+        layout[name] = (shm.name, arr.dtype.str, arr.shape)
+    return blocks, (layout, meta)
+
+
+def attach_table(spec):
+    """ProfileTable whose columns are views into the shared blocks named in spec."""
+    layout, meta = spec
+    blocks, arrays = [], {}
+    for name, (shm_name, dtype, shape) in layout.items():
+        # Pool workers share the parent's resource tracker, so attaching
+        # does not take ownership; the parent unlinks the blocks.
+        shm = SharedMemory(name=shm_name)
+        blocks.append(shm)
+        arrays[name] = np.ndarray(shape, np.dtype(dtype), buffer=shm.buf)
+    return blocks, ProfileTable.from_arrays(arrays, meta)
+
+
+def group_by_industry(table: ProfileTable):
+    """(table sorted by industry, {industry: (lo, hi)}). Row order within an industry is kept."""
+    codes  = table.codes("Industry")
+    order  = np.argsort(codes, kind="stable")
+    table  = table.take(order)
+    codes  = codes[order]
+    bounds = {}
+    for c in np.unique(codes).tolist():
+        lo, hi = np.searchsorted(codes, c, "left"), np.searchsorted(codes, c, "right")
+        bounds[table.vocab["Industry"][c]] = (int(lo), int(hi))
+    return table, bounds
+
+
+# ── Worker side ───────────────────────────────────────────────────────────────
+
+_WORKER = {}
+
+
+def _init_worker(specs: dict, bounds: dict, industry_risk_map: dict, top_k: int):
+    blocks, tables = [], {}
+    for side, spec in specs.items():
+        side_blocks, tables[side] = attach_table(spec)
+        blocks.extend(side_blocks)
+    _WORKER.update(blocks=blocks, tables=tables, bounds=bounds,
+                   risk=industry_risk_map, top_k=top_k)
+
+
+def _score_shard(side: str, industry: str, rows) -> dict:
+    """Top-K lists for the anchor rows of one shard, as flat result columns."""
+    anchors = _WORKER["tables"][side].take(rows)
+    lo, hi  = _WORKER["bounds"][OTHER_SIDE[side]][industry]
+    cands   = _WORKER["tables"][OTHER_SIDE[side]][lo:hi]
+    out     = {name: [] for name in RESULT_COLUMNS}
+    results = compute_rrf_scores_many(anchors, cands, _WORKER["risk"],
+                                      top_k=_WORKER["top_k"], with_breakdown=False)
+    for anchor_id, pairs in zip(anchors.ids().tolist(), results):
+        out["anchor_id"].extend([anchor_id] * len(pairs))
+        out["rank"].extend(range(1, len(pairs) + 1))
+        for cid, score in pairs:
+            out["candidate_id"].append(cid)
+            out["score"].append(score)
+    out["industry"] = [industry] * len(out["rank"])
+    return {"side": side, "anchors": len(rows), "columns": out}
+
+
+# ── Output ────────────────────────────────────────────────────────────────────
+
+class _ShardWriter:
+    """Appends result shards to one CSV or Parquet file."""
+
+    def __init__(self, path: str, fmt: str):
+        self.path, self.fmt = path, fmt
+        self.rows, self._pq = 0, None
+
+    def write(self, columns: dict):
+        df = pd.DataFrame(columns, columns=list(RESULT_COLUMNS))
+        if self.fmt == "parquet":
+            batch = pa.Table.from_pandas(df, preserve_index=False)
+            if self._pq is None:
+                self._pq = pq.ParquetWriter(self.path, batch.schema)
+            self._pq.write_table(batch)
+        else:
+            df.to_csv(self.path, mode="a" if self.rows else "w",
+                      header=not self.rows, index=False)
+        self.rows += len(df)
+
+    def close(self):
+        if self._pq is not None:
+            self._pq.close()
+        elif not self.rows and self.fmt == "csv":
+            pd.DataFrame(columns=list(RESULT_COLUMNS)).to_csv(self.path, index=False)
+
+
+def _resolve_format(fmt: str) -> str:
+    if fmt == "auto":
+        return "parquet" if pq is not None else "csv"
+    if fmt == "parquet" and pq is None:
+        raise ImportError("parquet output needs pyarrow; use fmt='csv'")
+    return fmt
+
+
+# ── Entry point ───────────────────────────────────────────────────────────────
+
+def run_batch(exporters: ProfileTable, importers: ProfileTable, industry_risk_map: dict,
+              out_dir: str, top_k=100, workers=None, shard_size=SHARD_SIZE, fmt="auto",
+              sides=("exporter", "importer"), snapshots="latest") -> dict:
+    """
+    Score every anchor ID of `sides` and stream the top_k lists to out_dir.
+    Both sides are first reduced to profile_store.matching_view(snapshots):
+    one row per ID by default. With snapshots="all" every snapshot is a
+    candidate and each ID anchors once per industry, from its last row there.
+    workers=None uses every core; workers=1 runs in this process.
+    Returns {side: {"path", "anchors", "rows"}}.
+    """
+    fmt     = _resolve_format(fmt)
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(out_dir, exist_ok=True)
+
+    tables, bounds = {}, {}
+    for side, table in (("exporter", exporters), ("importer", importers)):
+        tables[side], bounds[side] = group_by_industry(matching_view(table, snapshots))
+
+    shards = []
+    for side in sides:
+        for industry, (lo, hi) in bounds[side].items():
+            if industry not in bounds[OTHER_SIDE[side]]:
+                continue
+            rows = tables[side][lo:hi].latest_rows() + lo
+            shards.extend((side, industry, rows[i:i + shard_size])
+                          for i in range(0, len(rows), shard_size))
+
+    ext     = "parquet" if fmt == "parquet" else "csv"
+    writers = {side: _ShardWriter(os.path.join(out_dir, f"{OUTPUTS[side]}.{ext}"), fmt)
+               for side in sides}
+    anchors = dict.fromkeys(sides, 0)
+
+    def _collect(result):
+        writers[result["side"]].write(result["columns"])
+        anchors[result["side"]] += result["anchors"]
+
+    if workers == 1:
+        _WORKER.update(tables=tables, bounds=bounds, risk=industry_risk_map, top_k=top_k)
+        for shard in shards:
+            _collect(_score_shard(*shard))
+        _WORKER.clear()
+    else:
+        blocks, specs = [], {}
+        for side, table in tables.items():
+            side_blocks, specs[side] = share_table(table)
+            blocks.extend(side_blocks)
+        try:
+            with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                     initargs=(specs, bounds, industry_risk_map, top_k)) as pool:
+                pending, queue = set(), deque(shards)
+                while queue or pending:
+                    while queue and len(pending) < 2 * workers:
+                        pending.add(pool.submit(_score_shard, *queue.popleft()))
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        _collect(fut.result())
+        finally:
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+
+    for w in writers.values():
+        w.close()
+    return {side: {"path": w.path, "anchors": anchors[side], "rows": w.rows}
+            for side, w in writers.items()}
+
+
+if __name__ == "__main__":
+    import argparse
+    from preprocess import load_exporter_table, load_importer_table, load_news
+    from risk_engine import compute_industry_risk
+
+    base = os.path.dirname(os.path.abspath(__file__))
+    data = os.path.join(base, "data")
+
+    ap = argparse.ArgumentParser(description="All-pairs top-K matchmaking job")
+    ap.add_argument("out_dir")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--top-k",   type=int, default=100)
+    ap.add_argument("--format",  default="auto", choices=("auto", "csv", "parquet"))
+    ap.add_argument("--snapshots", default="latest", choices=("latest", "aggregate", "all"))
+    args = ap.parse_args()
+
+    t0        = time.perf_counter()
+    exporters = load_exporter_table(os.path.join(data, "EXIM_DatasetAlgo_Hackathon(Exporter_LiveSignals_v5_Updated).csv"))
+    importers = load_importer_table(os.path.join(data, "EXIM_DatasetAlgo_Hackathon(Importer_LiveSignals_v5_Updated).csv"))
+    risk_map  = compute_industry_risk(load_news(os.path.join(data, "EXIM_DatasetAlgo_Hackathon(Global_News_LiveSignals_Updated) (1).csv")))
+    summary   = run_batch(exporters, importers, risk_map, args.out_dir, top_k=args.top_k,
+                          workers=args.workers, fmt=args.format, snapshots=args.snapshots)
+    for side, info in summary.items():
+        print(f"{info['anchors']:>6} {side}s → {info['rows']} rows  {info['path']}")
+    print(f"Done in {time.perf_counter() - t0:.1f}s")
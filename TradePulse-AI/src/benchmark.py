@@ -0,0 +1,397 @@
+# benchmark.py  —  Reproducible benchmarks for the loading, scoring, geo and risk hot paths
+#
+# Synthetic exporter / importer / news CSVs follow the shipped schemas
+# (same columns, vocabularies, value ranges and missing-value rates), so the
+# loaders take the same code paths as on real data. Each size runs --repeats
+# times, each run in a fresh process (so its peak RSS is its own), and the
+# report keeps the median of every metric over the runs.
+#
+#   python benchmark.py --sizes 10k 100k --out bench.json
+#   python benchmark.py --sizes 10k --baseline bench_baseline.json    # exit 1 on regression
+#   python benchmark.py --sizes 10k --save-baseline bench_baseline.json
+#
+# Per benchmark the report holds calls, throughput (items/s), p50/p95/p99
+# latency in ms and the process peak RSS in MB after it ran.
+
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
+import numpy as np
+import pandas as pd
+
+STATES     = ["Delhi", "Gujarat", "Haryana", "Karnataka", "Maharashtra", "Punjab",
+              "Rajasthan", "Tamil Nadu", "Telangana"]
+COUNTRIES  = ["Australia", "Canada", "France", "Germany", "Italy", "Japan", "Netherlands",
+              "Singapore", "UAE", "UK", "USA"]
+INDUSTRIES = ["Auto Parts", "Chemicals", "Electronics", "Engineering", "IT Software",
+              "Machinery", "Medical Devices", "Pharmaceuticals", "Solar", "Textiles"]
+CERTS      = ["CE", "EU-GMP", "FDA", "GDPR", "IEC", "ISO14001", "ISO27001", "ISO9001",
+              "REACH", "RoHS", "SOC2", "TUV", "UL", "WHO-GMP"]
+CHANNELS   = ["Email", "LinkedIn", "WhatsApp", "Call"]
+REGIONS    = ["Asia", "Global", "Middle East", "Europe", "North America"]
+EVENTS     = ["Supply Chain Shock", "Trade Agreement", "Tariff Update", "Stock Crash",
+              "Natural Calamity", "War Alert"]
+IMPACTS    = ["High", "Medium", "Low"]
+
+# Metrics that fail the baseline comparison, with the relative slowdown each
+# may show; tail percentiles over a few hundred calls are too noisy to gate
+# on and are only reported. Calls under FAST_MS (baseline p50) are at the
+# mercy of timer resolution and scheduling jitter, so their tolerance is
+# multiplied by FAST_FACTOR.
+TOLERANCES    = {"throughput": 0.25, "p50_ms": 0.25}
+FAST_MS       = 10.0
+FAST_FACTOR   = 2.0
+REPEATS       = 3
+WARMUP_CALLS  = 3
+
+
+# ── Synthetic data ────────────────────────────────────────────────────────────
+
+def _dates(rng, n):
+    days = rng.integers(0, 1501, n)
+    return (np.datetime64("2021-01-01") + days).astype(str)
+
+
+def _flags(rng, n):
+    return rng.integers(0, 2, n)
+
+
+def _unit(rng, n, lo=0.0, hi=1.0):
+    return np.round(rng.uniform(lo, hi, n), 2)
+
+
+def _with_nan(rng, values, rate):
+    out = np.asarray(values, dtype=object if np.asarray(values).dtype.kind in "OU" else float)
+    out[rng.random(len(out)) < rate] = np.nan
+    return out
+
+
+def synth_exporters(n: int, seed=0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    ids = max(1, int(n * 0.56))                   # ~1.8 rows per ID, as shipped
+    return pd.DataFrame({
+        "Record_ID":                   np.arange(1, n + 1),
+        "Date":                        _dates(rng, n),
+        "Exporter_ID":                 np.char.add("EXP_", rng.integers(0, ids, n).astype(str)),
+        "State":                       rng.choice(STATES, n),
+        "Industry":                    rng.choice(INDUSTRIES, n),
+        "MSME_Udyam":                  _with_nan(rng, _flags(rng, n), 0.33),
+        "Manufacturing_Capacity_Tons": _with_nan(rng, rng.integers(50, 9001, n), 0.50),
+        "Revenue_Size_USD":            rng.integers(500_000, 80_000_000, n),
+        "Team_Size":                   rng.integers(10, 2001, n),
+        "Certification":               _with_nan(rng, rng.choice(CERTS, n), 0.38),
+        "Good_Payment_Terms":          _flags(rng, n),
+        "Prompt_Response_Score":       _unit(rng, n),
+        "Hiring_Signal":               _flags(rng, n),
+        "LinkedIn_Activity":           rng.integers(0, 25_001, n),
+        "SalesNav_ProfileViews":       rng.integers(1, 15_001, n),
+        "SalesNav_JobChange":          _flags(rng, n),
+        "Intent_Score":                _unit(rng, n),
+        "Shipment_Value_USD":          _with_nan(rng, rng.integers(5_000, 900_000, n), 0.67),
+        "Quantity_Tons":               rng.integers(1, 5001, n),
+        "Tariff_Impact":               _unit(rng, n, -1, 1),
+        "StockMarket_Impact":          _unit(rng, n, -1, 1),
+        "War_Risk":                    _flags(rng, n),
+        "Natural_Calamity_Risk":       _flags(rng, n),
+        "Currency_Shift":              _unit(rng, n, -1, 1),
+    })
+
+
+def synth_importers(n: int, seed=0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed + 1)
+    ids = max(1, int(n * 0.89))
+    return pd.DataFrame({
+        "Record_ID":              np.arange(1, n + 1),
+        "Date":                   _dates(rng, n),
+        "Buyer_ID":               _with_nan(rng, np.char.add("BUY_", rng.integers(0, ids, n).astype(str)), 0.05),
+        "Country":                rng.choice(COUNTRIES, n),
+        "Industry":               rng.choice(INDUSTRIES, n),
+        "Avg_Order_Tons":         _with_nan(rng, rng.integers(8, 8001, n), 0.50),
+        "Revenue_Size_USD":       rng.integers(1_000_000, 200_000_000, n),
+        "Team_Size":              rng.integers(20, 7001, n),
+        "Certification":          _with_nan(rng, rng.choice(CERTS, n), 0.38),
+        "Good_Payment_History":   _flags(rng, n),
+        "Prompt_Response":        _unit(rng, n),
+        "Hiring_Growth":          _flags(rng, n),
+        "Funding_Event":          rng.choice(["0", "1", "Unknown"], n, p=[0.45, 0.45, 0.10]),
+        "Engagement_Spike":       _flags(rng, n),
+        "SalesNav_ProfileVisits": rng.integers(1, 20_000, n),
+        "DecisionMaker_Change":   _flags(rng, n),
+        "Intent_Score":           _unit(rng, n),
+        "Preferred_Channel":      _with_nan(rng, rng.choice(CHANNELS, n), 0.20),
+        "Response_Probability":   _with_nan(rng, _unit(rng, n), 0.67),
+        "Tariff_News":            _flags(rng, n),
+        "StockMarket_Shock":      _flags(rng, n),
+        "War_Event":              _flags(rng, n),
+        "Natural_Calamity":       _flags(rng, n),
+        "Currency_Fluctuation":   _unit(rng, n, -1, 1),
+    })
+
+
+def synth_news(n: int, seed=0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed + 2)
+    return pd.DataFrame({
+        "News_ID":               np.arange(1, n + 1),
+        "Date":                  _dates(rng, n),
+        "Region":                rng.choice(REGIONS, n),
+        "Event_Type":            rng.choice(EVENTS, n),
+        "Impact_Level":          rng.choice(IMPACTS, n),
+        "Affected_Industry":     rng.choice(INDUSTRIES, n),
+        "Tariff_Change":         _unit(rng, n, -1, 1),
+        "StockMarket_Shock":     _unit(rng, n, -1, 1),
+        "War_Flag":              _flags(rng, n),
+        "Natural_Calamity_Flag": _flags(rng, n),
+        "Currency_Shift":        _unit(rng, n, -1, 1),
+    })
+
+
+def write_synthetic(workdir: str, n: int, seed=0) -> dict:
+    """CSV paths for one size; files are reused when they already exist."""
+    os.makedirs(workdir, exist_ok=True)
+    paths = {}
+    for side, make in (("exporters", synth_exporters), ("importers", synth_importers),
+                       ("news", synth_news)):
+        path = os.path.join(workdir, f"{side}_{n}_{seed}.csv")
+        if not os.path.exists(path):
+            make(n, seed).to_csv(path, index=False)
+        paths[side] = path
+    return paths
+
+
+# ── Measurement ───────────────────────────────────────────────────────────────
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == "darwin" else rss / 1024.0   # bytes on macOS, KB on Linux
+
+
+def _summary(latencies, items=None) -> dict:
+    lat   = np.asarray(latencies, dtype=float)
+    items = len(lat) if items is None else items
+    return {
+        "calls":       len(lat),
+        "throughput":  items / lat.sum() if lat.sum() > 0 else float("inf"),
+        "p50_ms":      float(np.percentile(lat, 50) * 1000),
+        "p95_ms":      float(np.percentile(lat, 95) * 1000),
+        "p99_ms":      float(np.percentile(lat, 99) * 1000),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _time_calls(fn, arg_list, items=None, warmup=0) -> dict:
+    for args in arg_list[:warmup]:
+        fn(*args)
+    lat = []
+    for args in arg_list:
+        t0 = time.perf_counter()
+        fn(*args)
+        lat.append(time.perf_counter() - t0)
+    return _summary(lat, items)
+
+
+# ── Benchmarks for one size ───────────────────────────────────────────────────
+
+def run_size(n: int, queries: int, workdir: str, seed=0) -> dict:
+    """Every benchmark at n profiles per side; runs inside its own process."""
+    from preprocess import load_exporter_table, load_importer_table, load_exporters, load_news
+    from scoring_engine import (compute_components, compute_rrf_scores, compute_rrf_scores_pruned,
+                                compute_rrf_scores_many, compute_rrf_scores_streaming,
+                                FusionConfig)
+    from geo_engine import compute_geo_score, GEO_TABLE
+    from risk_engine import compute_industry_risk, RiskAggregator
+    from match_index import MatchIndex
+    from matchmaker import get_top_buyers
+    from fusion_lab import FusionLab
+
+    rng   = np.random.default_rng(seed)
+    paths = write_synthetic(workdir, n, seed)
+    out   = {}
+
+    reps  = 5 if n <= 100_000 else 2               # repeats for whole-dataset operations
+
+    out["load_exporter_table"] = _time_calls(load_exporter_table, [(paths["exporters"],)] * reps, n * reps)
+    out["load_importer_table"] = _time_calls(load_importer_table, [(paths["importers"],)] * reps, n * reps)
+    if n <= 100_000:                               # the dataclass list loader is the slow path
+        out["load_exporters"] = _time_calls(load_exporters, [(paths["exporters"],)] * reps, n * reps)
+    exporters = load_exporter_table(paths["exporters"])
+    importers = load_importer_table(paths["importers"])
+    news      = load_news(paths["news"])
+
+    out["compute_industry_risk"] = _time_calls(compute_industry_risk, [(news,)] * reps, len(news) * reps)
+    out["risk_aggregator_add"]   = _time_calls(lambda df: RiskAggregator().add(df),
+                                               [(news,)] * reps, len(news) * reps)
+    risk = compute_industry_risk(news)
+
+    combos = [(rng.choice(STATES + ["Unknown"]), rng.choice(COUNTRIES + ["Unknown"]),
+               rng.choice(INDUSTRIES)) for _ in range(5000)]
+    out["compute_geo_score"] = _time_calls(compute_geo_score, combos, warmup=WARMUP_CALLS)
+    codes = [GEO_TABLE.encode(axis, [c[k] for c in combos])
+             for k, axis in enumerate(("state", "country", "industry"))]
+    out["geo_table_gather"]  = _time_calls(GEO_TABLE.gather, [codes] * 20, 20 * len(combos))
+
+    out["match_index_build"] = _time_calls(MatchIndex, [(exporters, importers)] * reps,
+                                           (len(exporters) + len(importers)) * reps)
+    index = MatchIndex(exporters, importers)
+
+    rows    = rng.choice(len(exporters), size=min(queries, len(exporters)), replace=False)
+    anchors = [exporters[int(r)] for r in rows]
+    pairs   = []
+    for a in anchors[:50]:
+        bucket = index.candidates("importer", a.Industry)
+        pairs += [(a.to_profile(), bucket.to_profile(int(j)), risk)
+                  for j in rng.integers(0, len(bucket), 40)]
+    out["compute_components"] = _time_calls(compute_components, pairs, warmup=WARMUP_CALLS)
+
+    buckets = [index.candidates("importer", a.Industry) for a in anchors]
+    scored  = sum(len(b) for b in buckets)
+    out["compute_rrf_scores"] = _time_calls(
+        lambda a, b: compute_rrf_scores(a, b, risk, top_k=100),
+        list(zip(anchors, buckets)), scored, warmup=WARMUP_CALLS)
+    out["compute_rrf_scores_pruned"] = _time_calls(
+        lambda a, b: compute_rrf_scores_pruned(a, b, risk, keep=300, top_k=100),
+        list(zip(anchors, buckets)), scored, warmup=WARMUP_CALLS)
+    out["compute_rrf_scores_streaming"] = _time_calls(
+        lambda a, b: compute_rrf_scores_streaming(a, b, risk, top_k=100),
+        list(zip(anchors, buckets)), scored, warmup=WARMUP_CALLS)
+    by_industry = {}
+    for a, b in zip(anchors, buckets):
+        by_industry.setdefault(a.Industry, ([], b))[0].append(a)
+    out["compute_rrf_scores_many"] = _time_calls(
+        lambda a, b: compute_rrf_scores_many(a, b, risk, top_k=100, with_breakdown=False),
+        list(by_industry.values()), scored)
+    out["get_top_buyers"] = _time_calls(
+        lambda a: get_top_buyers(a, index, risk, top_k=10), [(a,) for a in anchors],
+        warmup=WARMUP_CALLS)
+    out["get_top_buyers_filtered"] = _time_calls(
+        lambda a: get_top_buyers(a, index, risk, top_k=10, filters={"Preferred_Channel": "Email"}),
+        [(a,) for a in anchors], warmup=WARMUP_CALLS)
+    lab = FusionLab(index, risk)
+    for a in anchors:
+        lab.top(a)                                 # component matrices cached up front
+    out["fusion_lab_refuse"] = _time_calls(
+        lambda a: lab.top(a, FusionConfig(alpha=0.5), top_k=100), [(a,) for a in anchors],
+        scored, warmup=WARMUP_CALLS)
+    out["peak_rss_mb"] = peak_rss_mb()
+    return out
+
+
+def median_runs(runs: list) -> dict:
+    """Per-metric median over repeated run_size results (same benchmarks in each)."""
+    out = {}
+    for bench, first in runs[0].items():
+        if isinstance(first, dict):
+            out[bench] = {m: float(np.median([r[bench][m] for r in runs])) for m in first}
+            out[bench]["calls"] = first["calls"]
+        else:
+            out[bench] = float(np.median([r[bench] for r in runs]))
+    return out
+
+
+# ── Baseline comparison ───────────────────────────────────────────────────────
+
+def tolerance_for(metric: str, base: dict, tolerances=TOLERANCES) -> float:
+    """Allowed relative slowdown of `metric`, widened for sub-FAST_MS calls."""
+    tol = tolerances[metric]
+    return tol * FAST_FACTOR if base.get("p50_ms", FAST_MS) < FAST_MS else tol
+
+
+def compare(current: dict, baseline: dict, tolerances=TOLERANCES) -> list:
+    """
+    [(size, bench, metric, baseline, current, change)] for every gated metric
+    that got worse by more than its tolerance (throughput down, latency up).
+    """
+    regressions = []
+    for size, benches in current["results"].items():
+        base_benches = baseline.get("results", {}).get(size, {})
+        for bench, metrics in benches.items():
+            base = base_benches.get(bench)
+            if not isinstance(metrics, dict) or not isinstance(base, dict):
+                continue
+            for metric in tolerances:
+                old, new = base.get(metric), metrics.get(metric)
+                if not old or new is None:
+                    continue
+                change = (new - old) / old
+                worse  = -change if metric == "throughput" else change
+                if worse > tolerance_for(metric, base, tolerances):
+                    regressions.append((size, bench, metric, old, new, change))
+    return regressions
+
+
+def _parse_size(s: str) -> int:
+    s = s.strip().lower()
+    mult = {"k": 1_000, "m": 1_000_000}.get(s[-1], 1)
+    return int(float(s.rstrip("km")) * mult)
+
+
+def _print_report(report: dict):
+    for size, benches in report["results"].items():
+        print(f"\n── {size} profiles per side " + "─" * 40)
+        print(f"  {'benchmark':<30} {'throughput/s':>14} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'RSS MB':>8}")
+        for bench, m in benches.items():
+            if isinstance(m, dict):
+                print(f"  {bench:<30} {m['throughput']:>14,.0f} {m['p50_ms']:>9.3f} "
+                      f"{m['p95_ms']:>9.3f} {m['p99_ms']:>9.3f} {m['peak_rss_mb']:>8.0f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Matchmaker benchmark suite")
+    ap.add_argument("--sizes",   nargs="+", default=["10k"], help="profiles per side, e.g. 10k 100k 1M")
+    ap.add_argument("--queries", type=int, default=200, help="anchors per query benchmark")
+    ap.add_argument("--seed",    type=int, default=0)
+    ap.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "tradepulse_bench"))
+    ap.add_argument("--out")
+    ap.add_argument("--baseline")
+    ap.add_argument("--save-baseline")
+    ap.add_argument("--repeats", type=int, default=REPEATS, help="runs per size; metrics are medians")
+    ap.add_argument("--tolerance", type=float,
+                    help="allowed slowdown for every gated metric (default: TOLERANCES)")
+    args = ap.parse_args()
+
+    from geo_engine import check_geo_table
+    check_geo_table()                              # the geo table must still match the scalar path
+
+    report = {
+        "meta": {"python": platform.python_version(), "numpy": np.__version__,
+                 "pandas": pd.__version__, "machine": platform.machine(),
+                 "cpus": os.cpu_count(), "seed": args.seed, "queries": args.queries,
+                 "repeats": args.repeats,
+                 "created": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": {},
+    }
+    ctx = mp.get_context("spawn")
+    for label in args.sizes:
+        n, runs = _parse_size(label), []
+        for _ in range(args.repeats):
+            with ProcessPoolExecutor(1, mp_context=ctx) as pool:
+                runs.append(pool.submit(run_size, n, args.queries, args.workdir, args.seed).result())
+        report["results"][label] = median_runs(runs)
+    _print_report(report)
+
+    for path in filter(None, (args.out, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {path}")
+
+    if args.baseline:
+        tolerances = TOLERANCES if args.tolerance is None else dict.fromkeys(TOLERANCES, args.tolerance)
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), tolerances)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond tolerance "
+                  f"(×{FAST_FACTOR:g} under {FAST_MS:g} ms):")
+            for size, bench, metric, old, new, change in regressions:
+                print(f"  {size:<6} {bench:<24} {metric:<11} {old:>12.3f} → {new:>12.3f} ({change:+.0%})")
+            raise SystemExit(1)
+        print(f"\nNo regressions beyond tolerance against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
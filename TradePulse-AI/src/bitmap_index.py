@@ -0,0 +1,144 @@
+# bitmap_index.py  —  Row bitmaps over a ProfileTable's categorical columns
+#
+# One bitmap per (field, value): uint64 words, bit i set when row i holds the
+# value, in the same little-endian word layout as the certification bitsets.
+# A filter is a list of clauses (field, values); rows must match every clause
+# and, within one clause, any of its values. Evaluating a filter is a few
+# word-wise OR / AND passes over n/64 words, so a query can cut its bucket
+# down before any scoring happens.
+#
+#   Country / State / Preferred_Channel   one bitmap per vocabulary entry
+#   MSME_Flag                             one bitmap per distinct value
+#   Certification                         one bitmap per certification
+#   geo_tier                              anchor-dependent: resolved to the
+#                                         candidates' Country / State values
+#                                         whose geo label falls in the tiers
+#
+#   bits = BitmapIndex(bucket)
+#   rows = bits.select([("Country", ["UAE", "Singapore"]),
+#                       ("Preferred_Channel", ["WhatsApp"])])
+#   bits.count([("Certification", ["ISO9001"])])
+
+import numpy as np
+from data_models import ExporterProfile
+from geo_engine import GEO_TABLE, GEO_LABELS
+from profile_table import ProfileTable
+
+FILTER_FIELDS = {
+    "exporter": ("State", "MSME_Flag", "Certification", "geo_tier"),
+    "importer": ("Country", "Preferred_Channel", "Certification", "geo_tier"),
+}
+GEO_FIELD = {"exporter": ("State", "state"), "importer": ("Country", "country")}
+
+
+def _pack(rows: np.ndarray) -> np.ndarray:
+    """(V, n) bool → (V, words) uint64 bitmaps."""
+    v, n  = rows.shape
+    words = max(1, (n + 63) // 64)
+    out   = np.zeros((v, words * 8), dtype=np.uint8)
+    out[:, :(n + 7) // 8] = np.packbits(rows, axis=1, bitorder="little")
+    return out.view("<u8")
+
+
+def _table_side(table: ProfileTable) -> str:
+    return "exporter" if table.profile_cls is ExporterProfile else "importer"
+
+
+class BitmapIndex:
+    """Per-value row bitmaps of one table, built per field on first use."""
+
+    def __init__(self, table: ProfileTable):
+        self.table = table
+        self.side  = _table_side(table)
+        self.n     = len(table)
+        self._maps = {}   # field → ({value: slot}, (V, words) bitmaps)
+
+    def _field(self, field: str):
+        if field not in self._maps:
+            t = self.table
+            if field == "Certification":
+                values = list(t.cert_vocab)
+                codes  = np.arange(len(values))
+                masks  = t.cert_masks()
+                rows   = ((masks[:, codes // 64] >> (codes % 64).astype(np.uint64)) & np.uint64(1)).T
+                rows   = rows.astype(bool)
+            elif t.kinds.get(field) == "category":
+                values = list(t.vocab[field])
+                rows   = t.codes(field)[None, :] == np.arange(len(values))[:, None]
+            else:
+                col    = t.numeric(field)
+                uniq   = np.unique(col)
+                values = uniq.tolist()
+                rows   = col[None, :] == uniq[:, None]
+            self._maps[field] = ({v: i for i, v in enumerate(values)},
+                                 _pack(rows.reshape(len(values), self.n)))
+        return self._maps[field]
+
+    def bitmap(self, field: str, values) -> np.ndarray:
+        """OR of the bitmaps of `values` in `field` (values never seen match nothing)."""
+        slots, maps = self._field(field)
+        if self.table.kinds.get(field) in ("int", "float"):
+            values = [float(v) for v in values]
+        hit = [slots[v] for v in values if v in slots]
+        if not hit:
+            return np.zeros(maps.shape[1], dtype=np.uint64)
+        return np.bitwise_or.reduce(maps[hit], axis=0)
+
+    def _and(self, clauses) -> np.ndarray:
+        words = np.full(max(1, (self.n + 63) // 64), np.uint64(0xFFFFFFFFFFFFFFFF))
+        for field, values in clauses:
+            words &= self.bitmap(field, values)
+        return words
+
+    def select(self, clauses) -> np.ndarray:
+        """Rows (ascending) matching every (field, values) clause."""
+        bits = np.unpackbits(self._and(clauses).view(np.uint8), bitorder="little")[:self.n]
+        return np.flatnonzero(bits)
+
+    def count(self, clauses) -> int:
+        return len(self.select(clauses))
+
+
+# ── Filter specs ──────────────────────────────────────────────────────────────
+
+def geo_tier_values(anchor, table: ProfileTable, tiers) -> list:
+    """
+    The candidates' geo values (State for exporters, Country for buyers) whose
+    geo label against `anchor` is one of `tiers` (names from GEO_LABELS).
+    """
+    unknown = set(tiers) - set(GEO_LABELS)
+    if unknown:
+        raise ValueError(f"unknown geo tiers {sorted(unknown)}; use {GEO_LABELS}")
+    side        = _table_side(table)
+    field, axis = GEO_FIELD[side]
+    vocab       = table.vocab[field]
+    codes       = GEO_TABLE.encode(axis, vocab)
+    industry    = GEO_TABLE.code("industry", anchor.Industry)   # candidates share it
+    if side == "importer":     # exporter anchor, buyer candidates
+        labels = GEO_TABLE.labels[GEO_TABLE.code("state", anchor.State), codes, industry]
+    else:
+        labels = GEO_TABLE.labels[codes, GEO_TABLE.code("country", anchor.Country), industry]
+    wanted = {GEO_LABELS.index(t) for t in tiers}
+    return [v for v, l in zip(vocab, labels) if int(l) in wanted]
+
+
+def filter_clauses(anchor, table: ProfileTable, filters: dict) -> list:
+    """
+    {field: value or list of values} → [(field, values)] for BitmapIndex.select,
+    with geo_tier resolved against `anchor`. Fields the candidate side lacks
+    raise ValueError.
+    """
+    side    = _table_side(table)
+    allowed = FILTER_FIELDS[side]
+    clauses = []
+    for field, values in filters.items():
+        if field not in allowed:
+            raise ValueError(f"cannot filter {side} candidates on {field!r}; use one of {allowed}")
+        if isinstance(values, (str, int, float)) or values is None:
+            values = [values]
+        values = list(values)
+        if field == "geo_tier":
+            clauses.append((GEO_FIELD[side][0], geo_tier_values(anchor, table, values)))
+        else:
+            clauses.append((field, values))
+    return clauses
@@ -0,0 +1,40 @@
+# conftest.py  —  pytest settings and shared fixtures for src/
+#
+# test_run.py is a manual smoke script: it loads the full CSVs from data/
+# at import time, so pytest must not collect it.
+#
+# The tests run on a small synthetic market (benchmark.py's generators):
+#   paths   →  {"exporters", "importers", "news"} CSV paths
+#   market  →  (exporters, importers, MatchIndex, risk map) loaded from them
+
+import numpy as np
+import pytest
+from benchmark import write_synthetic
+from match_index import MatchIndex
+from preprocess import load_exporter_table, load_importer_table, load_news
+from risk_engine import compute_industry_risk
+
+collect_ignore = ["test_run.py"]
+
+N_PROFILES = 2_000
+N_ANCHORS  = 6
+
+
+@pytest.fixture(scope="session")
+def paths(tmp_path_factory):
+    return write_synthetic(str(tmp_path_factory.mktemp("synthetic")), N_PROFILES, seed=7)
+
+
+@pytest.fixture(scope="session")
+def market(paths):
+    exporters = load_exporter_table(paths["exporters"])
+    importers = load_importer_table(paths["importers"])
+    risk      = compute_industry_risk(load_news(paths["news"]))
+    return exporters, importers, MatchIndex(exporters, importers), risk
+
+
+def anchors_for(table, index, side, n=N_ANCHORS):
+    """A few anchors spread over the table, each with a non-empty bucket."""
+    rows = np.linspace(0, len(table) - 1, n * 3).astype(int)
+    out  = [table[int(r)] for r in rows if len(index.candidates(side, table[int(r)].Industry))]
+    return out[:n]
@@ -3,6 +3,7 @@
 from dataclasses import dataclass
 from typing import List
 import math
+import numpy as np
 
 
 @dataclass
@@ -67,8 +68,17 @@ def clamp(x, lo=0.0, hi=1.0):
     return max(lo, min(hi, x))
 
 
+# Placeholder strings that mean "no certification" (compared case-insensitively).
+NULL_CERTS = frozenset({"", "none", "nan", "null", "na", "n/a", "-"})
+
+
+def is_null_cert(cert) -> bool:
+    return cert is None or str(cert).strip().lower() in NULL_CERTS
+
+
 def jaccard_similarity(a, b):
-    a, b = set(a), set(b)
+    a = {c for c in a if not is_null_cert(c)}
+    b = {c for c in b if not is_null_cert(c)}
     if not a and not b:
         return 1.0
     return len(a & b) / len(a | b)
@@ -84,3 +94,78 @@ def log_ratio_similarity(x, y):
         return 0.0
     ratio = math.log(x / y)
     return math.exp(-0.5 * (ratio / 1.5) ** 2)
+
+
+# ── certification bitsets ─────────────────────────────────────────────────────
+# Certifications are interned into a small vocabulary and every profile's set
+# becomes a row of uint64 words, bit c set for vocabulary code c. One word
+# covers 64 certifications; larger vocabularies simply get more words per row.
+# Jaccard is then popcount(a & b) / popcount(a | b) over a whole column.
+
+_popcount = getattr(np, "bitwise_count", None)
+if _popcount is None:                                  # NumPy < 2.0
+    _BYTE_BITS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(x):
+        x = np.ascontiguousarray(x)
+        return _BYTE_BITS[x.view(np.uint8)].reshape(x.shape + (8,)).sum(axis=-1)
+
+
+def cert_words(n_vocab: int) -> int:
+    return max(1, (n_vocab + 63) // 64)
+
+
+def cert_masks(offsets, codes, vocab) -> np.ndarray:
+    """(n, words) uint64 bitsets from CSR certifications; null placeholders are dropped."""
+    n     = len(offsets) - 1
+    masks = np.zeros((n, cert_words(len(vocab))), dtype=np.uint64)
+    codes = np.asarray(codes, dtype=np.int64)
+    rows  = np.repeat(np.arange(n), np.diff(offsets))
+    null  = np.array([is_null_cert(v) for v in vocab], dtype=bool)
+    if null.any():
+        keep        = ~null[codes]
+        rows, codes = rows[keep], codes[keep]
+    bits = np.left_shift(np.uint64(1), (codes % 64).astype(np.uint64))
+    np.bitwise_or.at(masks, (rows, codes // 64), bits)
+    return masks
+
+
+def cert_masks_from_lists(cert_lists):
+    """(masks, vocab) for a sequence of certification lists."""
+    index, codes, lengths = {}, [], []
+    for certs in cert_lists:
+        lengths.append(len(certs))
+        codes.extend(index.setdefault(c, len(index)) for c in certs)
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    vocab = list(index)
+    return cert_masks(offsets, codes, vocab), vocab
+
+
+def cert_mask(certs, vocab, words=None):
+    """
+    (mask, extra) of one profile against `vocab`: its bitset, plus how many
+    of its certifications the vocabulary lacks (they only ever enlarge the union).
+    """
+    index = {c: i for i, c in enumerate(vocab)}
+    mask  = np.zeros(words or cert_words(len(vocab)), dtype=np.uint64)
+    extra = 0
+    for c in set(certs):
+        if is_null_cert(c):
+            continue
+        code = index.get(c)
+        if code is None:
+            extra += 1
+        else:
+            mask[code // 64] |= np.uint64(1) << np.uint64(code % 64)
+    return mask, extra
+
+
+def jaccard_similarity_masks(mask, extra, masks) -> np.ndarray:
+    """
+    jaccard_similarity of one bitset (+ `extra` unshared certs) against every
+    row of masks. A stack of (A, 1, words) bitsets with (A, 1) extras gives (A, n).
+    """
+    inter = _popcount(masks & mask).sum(axis=-1, dtype=np.int64)
+    union = _popcount(masks | mask).sum(axis=-1, dtype=np.int64) + extra
+    return np.where(union == 0, 1.0, inter / np.maximum(union, 1))
@@ -1,11 +1,16 @@
 # demo.py
 
-from preprocess import load_exporters, load_importers
+import os
+from preprocess import load_exporters, load_importers, load_news
 from matchmaker import run_matchmaking
+from risk_engine import compute_industry_risk
 
-EXPORTER_PATH = r"C:\Users\PRASAD\Downloads\3.0-Model+Training\exim_matchmaker\data\EXIM_DatasetAlgo_Hackathon(Exporter_LiveSignals_v5_Updated).csv"
+BASE = os.path.dirname(os.path.abspath(__file__))
+DATA = os.path.join(BASE, "data")
 
-IMPORTER_PATH = r"C:\Users\PRASAD\Downloads\3.0-Model+Training\exim_matchmaker\data\EXIM_DatasetAlgo_Hackathon(Importer_LiveSignals_v5_Updated).csv"
+EXPORTER_PATH = os.path.join(DATA, "EXIM_DatasetAlgo_Hackathon(Exporter_LiveSignals_v5_Updated).csv")
+IMPORTER_PATH = os.path.join(DATA, "EXIM_DatasetAlgo_Hackathon(Importer_LiveSignals_v5_Updated).csv")
+NEWS_PATH     = os.path.join(DATA, "EXIM_DatasetAlgo_Hackathon(Global_News_LiveSignals_Updated) (1).csv")
 
 
 print("Loading Data...")
@@ -18,7 +23,8 @@ print("Importers:", len(importers))
 
 print("\nRunning Matching...\n")
 
-results = run_matchmaking(exporters, importers)
+industry_risk_map = compute_industry_risk(load_news(NEWS_PATH))
+results = run_matchmaking(exporters, importers, industry_risk_map)
 
 for exp, matches in results.items():
     print("\nExporter:", exp)
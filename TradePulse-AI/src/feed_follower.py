@@ -0,0 +1,202 @@
+# feed_follower.py  —  Tail-following ingestion of the append-only LiveSignals CSVs
+#
+# The exporter / importer feeds only ever grow by new dated snapshot rows.
+# A FeedFollower loads its file once, then remembers how far it got:
+#
+#   offset   bytes consumed (always at a line end; a half-written last line
+#            waits for the next poll)
+#   rows     data lines ingested
+#   sha256   running hash of bytes[0:offset], updated with each new tail
+#
+# poll() reads only the bytes past `offset`, parses them (preprocess.parse_rows)
+# and appends them to its ProfileStore. Before that it checks that the
+# file still starts with what was ingested: the size, the header line, and
+# a hash of the last TAIL_CHECK bytes before `offset`. If any of these no
+# longer match, the file was rewritten and is reloaded from scratch. Missing
+# values in median-imputed columns get the median over every row seen so
+# far, so rows filled on an earlier poll may differ from a full reload.
+#
+# Each poll returns a FeedDelta naming exactly the IDs whose latest snapshot
+# changed, along with those snapshots, and hands it to every subscriber.
+# index_listener() keeps a MatchIndex (built on the latest view) in step.
+# Downstream structures that check their own buckets (MatchGraph.refresh,
+# FusionLab, CachedMatcher) then recompute only the touched industries.
+# Per-profile features are computed only for the new rows.
+#
+#   feed  = FeedFollower(exporter_csv, "exporter")
+#   index = MatchIndex(feed.store.latest(), importers)
+#   feed.subscribe(index_listener(index))
+#   delta = feed.poll()                  # → FeedDelta(rows=120, changed={...})
+#
+#   python feed_follower.py exporters.csv --side exporter --interval 5
+
+import argparse
+import hashlib
+import io
+import os
+import time
+from dataclasses import dataclass, field
+import numpy as np
+from preprocess import REFERENCE_DATE, csv_header, parse_rows
+from profile_store import ProfileStore
+from profile_table import ProfileTable
+
+TAIL_CHECK = 1 << 16
+
+
+@dataclass
+class FeedDelta:
+    side:    str
+    rows:    int                                # data lines read this poll
+    changed: set = field(default_factory=set)   # IDs whose latest snapshot changed
+    removed: set = field(default_factory=set)   # IDs gone after a reload
+    latest:  ProfileTable = None                # latest snapshot of each changed ID
+    reset:   bool = False                       # the file was rewritten and reloaded
+
+    def __bool__(self):
+        return bool(self.changed or self.removed)
+
+
+class FeedFollower:
+    """One side's feed file, loaded once and then followed by its appended rows."""
+
+    def __init__(self, path: str, side: str, float_dtype=np.float64, reference_date=REFERENCE_DATE):
+        self.path           = path
+        self.side           = side
+        self.float_dtype    = float_dtype
+        self.reference_date = reference_date
+        self.listeners      = []
+        self._start()
+        self.poll()
+
+    def _start(self):
+        self.store   = None
+        self.offset  = 0
+        self.rows    = 0
+        self.header  = b""
+        self.names   = None
+        self._pools  = {}                  # median-imputed column → values seen so far
+        self._digest = hashlib.sha256()
+        self._tail   = b""
+
+    def subscribe(self, listener):
+        """Call listener(delta) after every poll that changed something."""
+        self.listeners.append(listener)
+        return listener
+
+    def state(self) -> dict:
+        return {"path": self.path, "side": self.side, "offset": self.offset,
+                "rows": self.rows, "sha256": self._digest.hexdigest()}
+
+    # ── polling ───────────────────────────────────────────────────────────────
+
+    def _intact(self, f) -> bool:
+        """The file still starts with the bytes already ingested."""
+        if os.fstat(f.fileno()).st_size < self.offset:
+            return False
+        f.seek(0)
+        if f.read(len(self.header)) != self.header:
+            return False
+        lo = max(len(self.header), self.offset - TAIL_CHECK)
+        f.seek(lo)
+        return hashlib.sha256(f.read(self.offset - lo)).digest() == self._tail
+
+    def poll(self) -> FeedDelta:
+        """Ingest whatever was appended since the last poll."""
+        with open(self.path, "rb") as f:
+            if self.offset and not self._intact(f):
+                return self._reload()
+            f.seek(self.offset)
+            data = f.read()
+        data = data[:data.rfind(b"\n") + 1]          # complete lines only
+        if not data:
+            return FeedDelta(self.side, 0)
+
+        body = data
+        if not self.offset:
+            self.header = data[:data.find(b"\n") + 1]
+            self.names  = csv_header(self.path, self.side)
+            body        = data[len(self.header):]
+        self.offset += len(data)
+        self.rows   += body.count(b"\n")
+        self._digest.update(data)
+        self._tail   = self._window(data)
+
+        delta = FeedDelta(self.side, body.count(b"\n"))
+        if body.strip():
+            history = self.store.table if self.store is not None else None
+            table   = parse_rows(io.BytesIO(body), self.side, self.names, self._pools,
+                                 history, self.float_dtype, self.reference_date)
+            if self.store is None:
+                self.store    = ProfileStore(table)
+                delta.changed = set(self.store.ids().tolist())
+            else:
+                delta.changed = self.store.append(table)
+        if self.store is not None:
+            delta.latest = self.store.latest_of(delta.changed)
+        self._notify(delta)
+        return delta
+
+    def _window(self, data: bytes) -> bytes:
+        """Hash of the last TAIL_CHECK ingested bytes after the header."""
+        keep = min(TAIL_CHECK, self.offset - len(self.header))
+        if keep > len(data):                          # window reaches into earlier polls
+            with open(self.path, "rb") as f:
+                f.seek(self.offset - keep)
+                return hashlib.sha256(f.read(keep)).digest()
+        return hashlib.sha256(data[len(data) - keep:]).digest()
+
+    def ids(self) -> set:
+        return set() if self.store is None else set(self.store.ids().tolist())
+
+    def _reload(self) -> FeedDelta:
+        old, listeners = self.ids(), self.listeners
+        self.listeners = []                           # notify once, with the full picture
+        self._start()
+        delta = self.poll()
+        self.listeners = listeners
+        delta.removed  = old - self.ids()
+        delta.reset    = True
+        self._notify(delta)
+        return delta
+
+    def _notify(self, delta: FeedDelta):
+        if delta:
+            for listener in self.listeners:
+                listener(delta)
+
+
+def index_listener(index):
+    """Listener applying each delta to a MatchIndex built on the latest view."""
+    def apply(delta: FeedDelta):
+        if delta.removed:
+            index.remove(delta.side, sorted(delta.removed))
+        if delta.latest is not None and len(delta.latest):
+            index.update(delta.side, delta.latest)
+    return apply
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def main():
+    ap = argparse.ArgumentParser(description="Follow an append-only profile feed")
+    ap.add_argument("path")
+    ap.add_argument("--side",     required=True, choices=("exporter", "importer"))
+    ap.add_argument("--interval", type=float, default=5.0, help="seconds between polls")
+    args = ap.parse_args()
+
+    t0   = time.perf_counter()
+    feed = FeedFollower(args.path, args.side)
+    print(f"{feed.rows} rows, {len(feed.ids())} IDs loaded in {time.perf_counter() - t0:.2f}s")
+    while True:
+        time.sleep(args.interval)
+        t0    = time.perf_counter()
+        delta = feed.poll()
+        if delta:
+            kind = "reloaded" if delta.reset else f"+{delta.rows} rows"
+            print(f"{kind}: {len(delta.changed)} IDs changed, {len(delta.removed)} removed "
+                  f"({(time.perf_counter() - t0) * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
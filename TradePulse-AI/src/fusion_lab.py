@@ -0,0 +1,148 @@
+# fusion_lab.py  —  Re-fuse cached component matrices under different fusion configs
+#
+# The nine component scores of an (anchor, bucket) pair do not depend on the
+# fusion parameters (CC weights, CC/WRRF blend, RRF k, SRRF β). FusionLab
+# keeps, per anchor, the component matrix and the config-independent half of
+# the fusion (scoring_engine.prepare_fusion), so trying another FusionConfig
+# only runs fuse_prepared: the blend, the WRRF terms and the normalisation.
+#
+# Entries are dropped least-recently-used, and rebuilt when the anchor's
+# profile, its candidate bucket (MatchIndex replaces buckets on change) or
+# the industry risk value changes.
+#
+#   lab = FusionLab(index, industry_risk_map)
+#   lab.top(exporter, FusionConfig.from_weights({"geo_fit": 0.30}), top_k=10)
+#   lab.compare(exporter, {"base": DEFAULT_FUSION, "cc .8": FusionConfig(alpha=0.8)})
+#
+#   python fusion_lab.py --id EXP_5094 --alpha 0.4 0.8 --weight geo_fit=0.30 --k 10
+
+import argparse
+import os
+import time
+from collections import OrderedDict
+from dataclasses import replace
+from match_index import MatchIndex
+from scoring_engine import (CC_WEIGHTS, DEFAULT_FUSION, FusionConfig, compute_component_matrix,
+                            fuse_prepared, is_exporter, prepare_fusion, rank_results)
+
+BASE        = os.path.dirname(os.path.abspath(__file__))
+MAX_ENTRIES = 256
+OTHER_SIDE  = {"exporter": "importer", "importer": "exporter"}
+
+
+def _profile(anchor):
+    """Dataclass copy of the anchor, compared to tell whether an entry is stale."""
+    return anchor.to_profile() if hasattr(anchor, "to_profile") else anchor
+
+
+class FusionLab:
+    """Cached component matrices of recently tried anchors, re-fused on demand."""
+
+    def __init__(self, index: MatchIndex, industry_risk_map: dict, max_entries=MAX_ENTRIES):
+        self.index       = index
+        self.risk_map    = industry_risk_map
+        self.max_entries = max_entries
+        self._entries    = OrderedDict()   # (side, id) → entry dict
+        self.hits        = 0
+        self.misses      = 0
+
+    def _entry(self, anchor) -> dict:
+        side    = "exporter" if is_exporter(anchor) else "importer"
+        key     = (side, getattr(anchor, "Exporter_ID" if side == "exporter" else "Buyer_ID"))
+        cands   = self.index.candidates(OTHER_SIDE[side], anchor.Industry)
+        risk    = self.risk_map.get(anchor.Industry, 0.5)
+        profile = _profile(anchor)
+        entry   = self._entries.get(key)
+        if entry is not None and entry["candidates"] is cands and entry["risk"] == risk \
+                and entry["profile"] == profile:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        comp  = compute_component_matrix(anchor, cands, self.risk_map) if len(cands) else None
+        entry = {"candidates": cands, "risk": risk, "profile": profile, "comp": comp,
+                 "prep": prepare_fusion(comp["matrix"]) if comp else None}
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def top(self, anchor, config=None, top_k=10, with_breakdown=False) -> list:
+        """compute_rrf_scores(anchor, its bucket, top_k=...) under `config`."""
+        entry = self._entry(anchor)
+        if entry["comp"] is None:
+            return []
+        comp  = entry["comp"]
+        fused = fuse_prepared(entry["prep"], comp["recency"], comp["msme"], config)
+        return rank_results(entry["candidates"], comp, fused, top_k, with_breakdown)
+
+    def compare(self, anchor, configs: dict, top_k=10) -> dict:
+        """
+        {name: {"results", "overlap"}} for every named config, all fused from
+        one component matrix. "overlap" is the share of the first config's
+        top_k that the config also returns.
+        """
+        out, base = {}, None
+        for name, config in configs.items():
+            res = self.top(anchor, config, top_k)
+            ids = {cid for cid, _ in res}
+            if base is None:
+                base = ids
+            out[name] = {"results": res, "overlap": len(ids & base) / len(base) if base else 1.0}
+        return out
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def _variants(args) -> dict:
+    """The baseline plus one config per value given on the command line."""
+    configs = {"default": DEFAULT_FUSION}
+    for a in args.alpha or ():
+        configs[f"alpha={a}"] = replace(DEFAULT_FUSION, alpha=a)
+    for k in args.rrf_k or ():
+        configs[f"rrf_k={k}"] = replace(DEFAULT_FUSION, rrf_k=k)
+    for b in args.beta or ():
+        configs[f"beta={b}"] = replace(DEFAULT_FUSION, srrf_beta=b)
+    for spec in args.weight or ():
+        name, _, value = spec.partition("=")
+        configs[spec] = FusionConfig.from_weights({name: float(value)})
+    return configs
+
+
+def main():
+    from artifacts import load_artifact
+    from profile_store import matching_view
+    ap = argparse.ArgumentParser(description="Compare fusion configs on one anchor's cached matrix")
+    ap.add_argument("--id",       required=True, help="exporter or buyer ID")
+    ap.add_argument("--artifact", default=os.path.join(BASE, "exim_matchmaker"))
+    ap.add_argument("--k",        type=int, default=10)
+    ap.add_argument("--alpha",    type=float, nargs="+", help="CC share of the hybrid")
+    ap.add_argument("--rrf-k",    type=float, nargs="+")
+    ap.add_argument("--beta",     type=float, nargs="+", help="SRRF sigmoid steepness")
+    ap.add_argument("--weight",   nargs="+", help=f"component=weight, components: {', '.join(CC_WEIGHTS)}")
+    args = ap.parse_args()
+
+    art    = load_artifact(args.artifact)
+    index  = MatchIndex(matching_view(art["exporters"]), matching_view(art["importers"]))
+    side   = "exporter" if args.id.startswith("EXP") else "importer"
+    anchor = index.lookup(side, args.id)
+    if anchor is None:
+        raise SystemExit(f"unknown {side} {args.id}")
+
+    lab = FusionLab(index, art["industry_risk_map"])
+    t0  = time.perf_counter()
+    lab.top(anchor)
+    t1  = time.perf_counter()
+    res = lab.compare(anchor, _variants(args), args.k)
+    t2  = time.perf_counter()
+    print(f"{args.id}: matrix + first fusion {(t1 - t0) * 1000:.1f} ms, "
+          f"{len(res)} re-fusions {(t2 - t1) * 1000:.1f} ms")
+    print(f"{'config':<28} {'overlap':>7}  top {args.k}")
+    for name, r in res.items():
+        print(f"{name:<28} {r['overlap']:>7.0%}  " + " ".join(cid for cid, _ in r["results"]))
+
+
+if __name__ == "__main__":
+    main()
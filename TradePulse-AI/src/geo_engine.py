@@ -24,6 +24,8 @@
 # standalone component in the scoring engine AND as a multiplier on
 # demand_fit (location affects whether the order can even be fulfilled).
 
+import numpy as np
+
 # ── Trade corridor strengths (Industry × Buyer Country) ───────────────────────
 # Source: India EXIM Bank data, DGFT export statistics, WTO trade profiles
 # Scale: 1.0 = very strong proven corridor, 0.5 = moderate, 0.3 = weak/emerging
@@ -285,3 +287,90 @@ def compute_geo_score(state: str, country: str, industry: str) -> dict:
         "logistics_score":  round(logistics,  4),
         "geo_label":        label,
     }
+
+
+# ── Precomputed geo table ──────────────────────────────────────────────────────
+# The whole geo domain is tiny (states × countries × industries), so every
+# combination is scored once through compute_geo_score and kept in a dense
+# tensor indexed by interned codes. The last slot on each axis stands for
+# "not in the tables" and holds the DEFAULT_* fallbacks. compute_geo_score
+# stays the scalar reference; check_geo_table() asserts the two agree.
+
+GEO_LABELS = ("Premium", "Strong", "Moderate", "Weak")
+GEO_FIELDS = ("geo_score", "corridor_score", "state_spec_score",
+              "regulatory_score", "logistics_score")
+
+
+class GeoTable:
+    """Dense (state, country, industry) → geo scores, with a vectorised gather."""
+
+    def __init__(self, states, countries, industries):
+        self.states     = tuple(states)
+        self.countries  = tuple(countries)
+        self.industries = tuple(industries)
+        self._codes     = {
+            "state":    {s: i for i, s in enumerate(self.states)},
+            "country":  {c: i for i, c in enumerate(self.countries)},
+            "industry": {d: i for i, d in enumerate(self.industries)},
+        }
+        shape       = (len(self.states) + 1, len(self.countries) + 1, len(self.industries) + 1)
+        self.values = np.empty(shape + (len(GEO_FIELDS),), dtype=np.float64)
+        self.labels = np.empty(shape, dtype=np.int8)
+        for si, s in enumerate(self.states + (None,)):
+            for ci, c in enumerate(self.countries + (None,)):
+                for ii, d in enumerate(self.industries + (None,)):
+                    bd = compute_geo_score(s, c, d)
+                    self.values[si, ci, ii] = [bd[f] for f in GEO_FIELDS]
+                    self.labels[si, ci, ii] = GEO_LABELS.index(bd["geo_label"])
+
+    def code(self, axis: str, name) -> int:
+        """Code of one state / country / industry; unknown names get the default slot."""
+        codes = self._codes[axis]
+        return codes.get(name, len(codes))
+
+    def encode(self, axis: str, names) -> np.ndarray:
+        """Codes for a sequence of names (one dict lookup per distinct name)."""
+        names = list(names)
+        memo  = {n: self.code(axis, n) for n in set(names)}
+        return np.fromiter((memo[n] for n in names), dtype=np.int16, count=len(names))
+
+    def gather(self, state_codes, country_codes, industry_codes) -> dict:
+        """
+        Geo breakdown for broadcastable code arrays: one array per GEO_FIELDS
+        entry plus "geo_label" as codes into GEO_LABELS.
+        """
+        vals = self.values[state_codes, country_codes, industry_codes]
+        out  = {f: vals[..., j] for j, f in enumerate(GEO_FIELDS)}
+        out["geo_label"] = self.labels[state_codes, country_codes, industry_codes]
+        return out
+
+
+def build_geo_table() -> GeoTable:
+    """Rebuild from the current corridor / specialisation / FTA / logistics tables."""
+    countries  = {c for _, c in TRADE_CORRIDORS} | set(REGULATORY_EASE) | set(LOGISTICS_SCORE)
+    industries = {i for i, _ in TRADE_CORRIDORS}
+    for spec in STATE_SPECIALISATION.values():
+        industries |= set(spec)
+    return GeoTable(sorted(STATE_SPECIALISATION), sorted(countries), sorted(industries))
+
+
+GEO_TABLE = build_geo_table()
+
+
+def check_geo_table(table: GeoTable = None):
+    """Assert every table cell (unknown slots included) equals compute_geo_score bit for bit."""
+    table = table or GEO_TABLE
+    for s in table.states + ("<unknown>",):
+        for c in table.countries + ("<unknown>",):
+            for d in table.industries + ("<unknown>",):
+                ref = compute_geo_score(s, c, d)
+                got = table.gather(table.code("state", s), table.code("country", c),
+                                   table.code("industry", d))
+                for f in GEO_FIELDS:
+                    assert float(got[f]) == ref[f], (s, c, d, f)
+                assert GEO_LABELS[int(got["geo_label"])] == ref["geo_label"], (s, c, d)
+
+
+if __name__ == "__main__":
+    check_geo_table()
+    print(f"GEO_TABLE OK: {GEO_TABLE.values.shape[:3]} cells match compute_geo_score")
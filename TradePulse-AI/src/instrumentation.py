@@ -0,0 +1,319 @@
+# instrumentation.py  —  Opt-in per-stage timing for the scoring hot path
+#
+# compute_rrf_scores / fuse_scores read the module-level PROBE once per call.
+# While it is None (the default) each stage boundary costs one `if` on a
+# local, so scoring runs at full speed. enable() installs a Probe that times
+#
+#   score_matrix  cc  wrrf  consensus  hybrid  recency  msme  normalise
+#   weights       select   (top-k selection + id / breakdown building)
+#
+# and counts queries, candidates scored and breakdowns built. At the end of
+# each query the probe hands one QueryTiming (anchor, industry, candidate
+# count, per-stage seconds) to every sink:
+#
+#   LoggingSink        one line per query (optionally only slow ones)
+#   HistogramSink      in-memory latency histograms per stage and industry,
+#                      plus the slowest anchors seen
+#   PrometheusSink     HistogramSink that also writes a text exposition file
+#                      (node_exporter textfile-collector format)
+#
+#   import instrumentation
+#   hist = instrumentation.enable(instrumentation.HistogramSink())
+#   ... score ...
+#   print(hist.report())
+#
+# Setting TRADEPULSE_METRICS_DIR enables a PrometheusSink at import time that
+# writes <dir>/scoring_<pid>.prom, so pool workers report on their own too.
+
+import bisect
+import heapq
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+STAGES          = ("score_matrix", "cc", "wrrf", "consensus", "hybrid", "recency",
+                   "msme", "normalise", "weights", "select")
+COUNTERS        = ("queries", "candidates_scored", "breakdowns_built")
+BUCKETS         = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+METRIC_PREFIX   = "tradepulse_scoring"
+METRICS_DIR_ENV = "TRADEPULSE_METRICS_DIR"
+
+PROBE = None
+
+
+@dataclass
+class QueryTiming:
+    anchor_id:  str
+    industry:   str
+    candidates: int
+    breakdowns: int
+    seconds:    float
+    stages:     dict = field(default_factory=dict)   # stage → seconds
+
+
+def _anchor_id(anchor) -> str:
+    """Table rows carry `.id`; ExporterProfile / ImporterProfile only their ID field."""
+    for name in ("id", "Exporter_ID", "Buyer_ID"):
+        value = getattr(anchor, name, None)
+        if value is not None:
+            return str(value)
+    return ""
+
+
+# ── Probe ─────────────────────────────────────────────────────────────────────
+
+class Probe:
+    """Collects stage laps for the query running on each thread and fans them out."""
+
+    clock = staticmethod(time.perf_counter)
+
+    def __init__(self, sinks=()):
+        self.sinks    = list(sinks)
+        self.counters = Counter()
+        self._local   = threading.local()
+        self._lock    = threading.Lock()
+
+    def _stages(self) -> dict:
+        stages = getattr(self._local, "stages", None)
+        if stages is None:
+            stages = self._local.stages = {}
+        return stages
+
+    def begin(self) -> float:
+        self._stages().clear()
+        return self.clock()
+
+    def lap(self, stage: str, t0: float) -> float:
+        """Charge the time since t0 to `stage`; returns the new t0."""
+        t1 = self.clock()
+        stages = self._stages()
+        stages[stage] = stages.get(stage, 0.0) + (t1 - t0)
+        return t1
+
+    def end(self, anchor, candidates: int, breakdowns: int, t0: float, queries=1):
+        """Report the query; a many-anchor block is one timing, labelled with its first anchor."""
+        seconds = self.clock() - t0
+        timing  = QueryTiming(_anchor_id(anchor), str(getattr(anchor, "Industry", "")),
+                              candidates, breakdowns, seconds, dict(self._stages()))
+        with self._lock:
+            self.counters["queries"]           += queries
+            self.counters["candidates_scored"] += candidates
+            self.counters["breakdowns_built"]  += breakdowns
+            for sink in self.sinks:
+                sink.record(timing, self.counters)
+
+    def flush(self):
+        with self._lock:
+            for sink in self.sinks:
+                sink.flush(self.counters)
+
+
+def enable(*sinks):
+    """Install a Probe feeding `sinks`; returns the first sink (or the probe)."""
+    global PROBE
+    PROBE = Probe(sinks)
+    return sinks[0] if sinks else PROBE
+
+
+def disable():
+    """Flush and remove the probe; scoring goes back to the untimed path."""
+    global PROBE
+    probe, PROBE = PROBE, None
+    if probe is not None:
+        probe.flush()
+
+
+# ── Sinks ─────────────────────────────────────────────────────────────────────
+
+class Sink:
+    def record(self, timing: QueryTiming, counters: Counter):
+        pass
+
+    def flush(self, counters: Counter):
+        pass
+
+
+class LoggingSink(Sink):
+    """Logs one line per query; min_ms > 0 keeps only the slow ones."""
+
+    def __init__(self, logger="tradepulse.scoring", level=logging.INFO, min_ms=0.0):
+        self.logger = logging.getLogger(logger) if isinstance(logger, str) else logger
+        self.level  = level
+        self.min_ms = min_ms
+
+    def record(self, timing: QueryTiming, counters: Counter):
+        ms = timing.seconds * 1000
+        if ms < self.min_ms or not self.logger.isEnabledFor(self.level):
+            return
+        stages = " ".join(f"{s}={t * 1000:.3f}" for s, t in timing.stages.items())
+        self.logger.log(self.level, "%s industry=%s n=%d breakdowns=%d total_ms=%.3f %s",
+                        timing.anchor_id, timing.industry, timing.candidates,
+                        timing.breakdowns, ms, stages)
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)   # last slot = +Inf
+        self.sum    = 0.0
+        self.count  = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.sum   += seconds
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bucket bound holding the q-quantile (Prometheus-style estimate)."""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return BUCKETS[i] if i < len(BUCKETS) else float("inf")
+        return float("inf")
+
+
+class HistogramSink(Sink):
+    """
+    In-memory latency histograms: one per stage, one per industry for the
+    whole query, plus the `slowest` most expensive anchors seen so far.
+    """
+
+    def __init__(self, slowest=20):
+        self.stages     = {}    # stage → _Histogram
+        self.industries = {}    # industry → _Histogram
+        self.candidates = {}    # industry → candidates scored
+        self.counters   = Counter()
+        self.slowest_n  = slowest
+        self._slowest   = []    # min-heap of (seconds, anchor_id, industry, candidates)
+
+    def record(self, timing: QueryTiming, counters: Counter):
+        for stage, seconds in timing.stages.items():
+            h = self.stages.get(stage)
+            if h is None:
+                h = self.stages[stage] = _Histogram()
+            h.observe(seconds)
+        h = self.industries.get(timing.industry)
+        if h is None:
+            h = self.industries[timing.industry] = _Histogram()
+        h.observe(timing.seconds)
+        self.candidates[timing.industry] = self.candidates.get(timing.industry, 0) + timing.candidates
+        self.counters = counters
+
+        if self.slowest_n:
+            item = (timing.seconds, timing.anchor_id, timing.industry, timing.candidates)
+            if len(self._slowest) < self.slowest_n:
+                heapq.heappush(self._slowest, item)
+            elif item > self._slowest[0]:
+                heapq.heapreplace(self._slowest, item)
+
+    def slowest(self) -> list:
+        """[(seconds, anchor_id, industry, candidates)], slowest first."""
+        return sorted(self._slowest, reverse=True)
+
+    def summary(self) -> dict:
+        """{"stages": {stage: stats}, "industries": {industry: stats}} with count/sum/mean/p50/p95/p99."""
+        def stats(h):
+            return {"count": h.count, "sum": h.sum, "mean": h.sum / h.count if h.count else 0.0,
+                    "p50": h.quantile(0.50), "p95": h.quantile(0.95), "p99": h.quantile(0.99)}
+        return {
+            "stages":     {s: stats(h) for s, h in self.stages.items()},
+            "industries": {i: stats(h) for i, h in self.industries.items()},
+        }
+
+    def report(self) -> str:
+        s     = self.summary()
+        total = sum(v["sum"] for v in s["stages"].values()) or 1.0
+        lines = [f"{'stage':<14} {'calls':>8} {'total ms':>10} {'share':>6} {'p50 ms':>8} {'p95 ms':>8}"]
+        for stage in sorted(s["stages"], key=lambda k: -s["stages"][k]["sum"]):
+            v = s["stages"][stage]
+            lines.append(f"{stage:<14} {v['count']:>8} {v['sum'] * 1000:>10.1f} "
+                         f"{v['sum'] / total:>6.1%} {v['p50'] * 1000:>8.3f} {v['p95'] * 1000:>8.3f}")
+        lines.append("")
+        lines.append(f"{'industry':<24} {'queries':>8} {'avg n':>8} {'mean ms':>8} {'p95 ms':>8}")
+        for ind in sorted(s["industries"], key=lambda k: -s["industries"][k]["sum"]):
+            v = s["industries"][ind]
+            lines.append(f"{ind:<24} {v['count']:>8} {self.candidates[ind] / v['count']:>8.0f} "
+                         f"{v['mean'] * 1000:>8.3f} {v['p95'] * 1000:>8.3f}")
+        if self._slowest:
+            lines.append("")
+            lines.append("slowest anchors:")
+            for sec, aid, ind, n in self.slowest():
+                lines.append(f"  {aid:<14} {ind:<24} n={n:<7} {sec * 1000:.3f} ms")
+        lines.append("")
+        lines.append("  ".join(f"{k}={self.counters.get(k, 0)}" for k in COUNTERS))
+        return "\n".join(lines)
+
+
+def _histogram_lines(name: str, label: str, hists: dict) -> list:
+    lines = [f"# TYPE {name} histogram"]
+    for key, h in sorted(hists.items()):
+        lbl, cum = f'{label}="{_escape(key)}"', 0
+        for bound, c in zip(BUCKETS, h.counts):
+            cum += c
+            lines.append(f'{name}_bucket{{{lbl},le="{bound:g}"}} {cum}')
+        lines.append(f'{name}_bucket{{{lbl},le="+Inf"}} {h.count}')
+        lines.append(f"{name}_sum{{{lbl}}} {h.sum!r}")
+        lines.append(f"{name}_count{{{lbl}}} {h.count}")
+    return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class PrometheusSink(HistogramSink):
+    """
+    HistogramSink that rewrites `path` in the Prometheus text exposition
+    format at most every `interval` seconds (and on flush / disable).
+    The file is replaced atomically so a scraper never reads half of it.
+    """
+
+    def __init__(self, path: str, interval=10.0, slowest=0):
+        super().__init__(slowest=slowest)
+        self.path     = path
+        self.interval = interval
+        self._written = 0.0
+
+    def record(self, timing: QueryTiming, counters: Counter):
+        super().record(timing, counters)
+        if time.monotonic() - self._written >= self.interval:
+            self.flush(counters)
+
+    def exposition(self) -> str:
+        lines = []
+        for name in COUNTERS:
+            metric = f"{METRIC_PREFIX}_{name}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {self.counters.get(name, 0)}"]
+        lines += _histogram_lines(f"{METRIC_PREFIX}_stage_seconds", "stage", self.stages)
+        lines += _histogram_lines(f"{METRIC_PREFIX}_query_seconds", "industry", self.industries)
+        metric = f"{METRIC_PREFIX}_candidates_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines += [f'{metric}{{industry="{_escape(k)}"}} {v}' for k, v in sorted(self.candidates.items())]
+        return "\n".join(lines) + "\n"
+
+    def flush(self, counters: Counter):
+        self.counters = counters
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.exposition())
+        os.replace(tmp, self.path)
+        self._written = time.monotonic()
+
+
+def _enable_from_env():
+    if os.environ.get(METRICS_DIR_ENV):
+        enable(PrometheusSink(os.path.join(os.environ[METRICS_DIR_ENV], f"scoring_{os.getpid()}.prom")))
+
+
+# Forked pool workers start from a fresh probe and a file of their own.
+_enable_from_env()
+os.register_at_fork(after_in_child=_enable_from_env)
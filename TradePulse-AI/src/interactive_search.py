@@ -1,9 +1,14 @@
 # interactive_search.py
 
+import argparse
 import os
-from preprocess import load_exporters, load_importers, load_news
+import time
+from preprocess import load_exporter_table, load_importer_table, load_news
+from match_index import MatchIndex
+from profile_store import ProfileStore, SNAPSHOT_MODES
 from matchmaker import get_top_buyers, get_top_exporters
 from risk_engine import compute_industry_risk
+from artifacts import load_artifact, read_manifest, is_current
 
 # ── Paths ─────────────────────────────────────────────────────────────────────
 BASE = os.path.dirname(os.path.abspath(__file__))
@@ -12,24 +17,152 @@ DATA = os.path.join(BASE, "data")
 EXPORTER_PATH = os.path.join(DATA, "EXIM_DatasetAlgo_Hackathon(Exporter_LiveSignals_v5_Updated).csv")
 IMPORTER_PATH = os.path.join(DATA, "EXIM_DatasetAlgo_Hackathon(Importer_LiveSignals_v5_Updated).csv")
 NEWS_PATH     = os.path.join(DATA, "EXIM_DatasetAlgo_Hackathon(Global_News_LiveSignals_Updated) (1).csv")
+ARTIFACT_PATH = os.path.join(BASE, "exim_matchmaker")
+
+
+# ── Session ───────────────────────────────────────────────────────────────────
+
+class SearchSession:
+    """
+    Profiles, index and risk map for one CLI session, built as late as possible.
+
+    Profiles come from the prebuilt artifact (save_artifacts.py) when it exists
+    and its source CSVs have not changed since (size + mtime, or their hashes
+    with verify=True); otherwise from the CSVs. The
+    risk map and the MatchIndex are built on the first query that needs them.
+    Every stage's wall time lands in `timings`.
+
+    Matching sees one row per ID: its latest snapshot (snapshots="latest"),
+    that snapshot with signals averaged over the ID's history ("aggregate"),
+    or every snapshot as a separate candidate ("all").
+    """
+
+    def __init__(self, artifact_path=ARTIFACT_PATH, exporter_path=EXPORTER_PATH,
+                 importer_path=IMPORTER_PATH, news_path=NEWS_PATH, snapshots="latest",
+                 verify=False):
+        if snapshots not in SNAPSHOT_MODES:
+            raise ValueError(f"snapshots must be one of {SNAPSHOT_MODES}")
+        self.paths     = {"exporters": exporter_path, "importers": importer_path, "news": news_path}
+        self.snapshots = snapshots
+        self.verify    = verify
+        self.timings   = {}
+        self.source    = None
+        self._risk     = None
+        self._index    = None
+        self._rows     = {}
+        self._stores   = {}
+        self._manifest = None
+        self._load_profiles(artifact_path)
+
+    def _timed(self, stage, fn, *args):
+        t0  = time.perf_counter()
+        out = fn(*args)
+        self.timings[stage] = time.perf_counter() - t0
+        return out
+
+    def _artifact_usable(self, artifact_path) -> bool:
+        if not os.path.isdir(artifact_path):
+            return False
+        # Only CSVs present on this machine can prove the artifact stale.
+        present = {k: p for k, p in self.paths.items() if k != "news" and os.path.exists(p)}
+        return is_current(read_manifest(artifact_path), present, self.verify)
+
+    def _load_profiles(self, artifact_path):
+        if self._timed("check artifact", self._artifact_usable, artifact_path):
+            art = self._timed("load artifact", load_artifact, artifact_path)
+            self.exporters, self.importers = art["exporters"], art["importers"]
+            self._manifest = art["manifest"]
+            self.source    = "artifact"
+        else:
+            self.exporters = self._timed("load exporters csv", load_exporter_table, self.paths["exporters"])
+            self.importers = self._timed("load importers csv", load_importer_table, self.paths["importers"])
+            self.source    = "csv"
+
+    @property
+    def industry_risk_map(self) -> dict:
+        if self._risk is None:
+            self._risk = self._timed("risk map", self._build_risk)
+        return self._risk
+
+    def _build_risk(self) -> dict:
+        # The artifact's risk map is reused while the news CSV it came from is unchanged.
+        news = {"news": self.paths["news"]}
+        if self._manifest is not None and (not os.path.exists(news["news"])
+                                           or is_current(self._manifest, news, self.verify)):
+            return self._manifest["industry_risk_map"]
+        return compute_industry_risk(load_news(news["news"]))
+
+    def store(self, table) -> ProfileStore:
+        """Snapshot history of one side (exporters or importers table)."""
+        key = table.id_field
+        if key not in self._stores:
+            label = "exporter store" if key == "Exporter_ID" else "buyer store"
+            self._stores[key] = self._timed(label, ProfileStore, table)
+        return self._stores[key]
+
+    def _view(self, table):
+        if self.snapshots == "all":
+            return table
+        return self.store(table).latest(aggregate=self.snapshots == "aggregate")
+
+    @property
+    def index(self) -> MatchIndex:
+        if self._index is None:
+            exporters, importers = self._view(self.exporters), self._view(self.importers)
+            self._index = self._timed("match index", MatchIndex, exporters, importers)
+        return self._index
+
+    def _lookup(self, table, profile_id: str):
+        if self.snapshots != "all":
+            return self.store(table).latest_row(profile_id, self.snapshots == "aggregate")
+        row = self._id_rows(table).get(profile_id)
+        return None if row is None else table[row]
+
+    def _id_rows(self, table) -> dict:
+        """ID → row of its last occurrence in the file (later rows win)."""
+        key = "id lookup " + table.id_field
+        if key not in self._rows:
+            ids = table.ids().tolist()
+            self._rows[key] = self._timed(key, lambda: dict(zip(ids, range(len(ids)))))
+        return self._rows[key]
+
+    def exporter(self, profile_id: str):
+        return self._lookup(self.exporters, profile_id)
+
+    def buyer(self, profile_id: str):
+        return self._lookup(self.importers, profile_id)
+
+    def history(self, profile_id: str):
+        """Every snapshot of an exporter or buyer ID, oldest first (None if unknown)."""
+        for table in (self.exporters, self.importers):
+            store = self.store(table)
+            if profile_id in store:
+                return store.history(profile_id)
+        return None
+
+    def print_timings(self):
+        print("  Timings:")
+        for stage, secs in self.timings.items():
+            print(f"    {stage:<20} {secs * 1000:8.1f} ms")
+        print()
 
-# ── Load ──────────────────────────────────────────────────────────────────────
-print("Loading dataset...")
-exporters         = load_exporters(EXPORTER_PATH)
-importers         = load_importers(IMPORTER_PATH)
-news_df           = load_news(NEWS_PATH)
-industry_risk_map = compute_industry_risk(news_df)
-
-print(f"Loaded {len(exporters)} exporters | {len(importers)} importers\n")
-
-print("Industry risk scores (from news signals):")
-for ind, risk in sorted(industry_risk_map.items(), key=lambda x: -x[1]):
-    bar = "█" * int(risk * 25)
-    print(f"  {ind:<20} {bar:<25} {risk:.3f}")
-print()
+    def print_risk(self):
+        print("Industry risk scores (from news signals):")
+        for ind, risk in sorted(self.industry_risk_map.items(), key=lambda x: -x[1]):
+            bar = "█" * int(risk * 25)
+            print(f"  {ind:<20} {bar:<25} {risk:.3f}")
+        print()
 
-exporter_dict = {e.Exporter_ID: e for e in exporters}
-buyer_dict    = {b.Buyer_ID:    b for b in importers}
+    def print_history(self, profile_id: str):
+        hist = self.history(profile_id)
+        if hist is None:
+            print(f"  ID '{profile_id}' not found.\n")
+            return
+        print(f"Snapshots of {profile_id} (oldest first, the last one is matched):")
+        print(f"  {'Date':<12} {'Industry':<18} {'Intent':>7} {'Recency':>8}")
+        for row in hist:
+            print(f"  {row.Date:<12} {row.Industry:<18} {row.Intent_Score:>7.2f} {row.Recency_Weight:>8.3f}")
+        print()
 
 # ── Display helpers ───────────────────────────────────────────────────────────
 
@@ -119,91 +252,131 @@ def _classification_basis():
 """)
 
 
-# ── Main loop ─────────────────────────────────────────────────────────────────
-print("Commands:")
-print("  <ID>        search   (e.g.  EXP_5094  or  BUY_69687)")
-print("  <ID> -v     search + full per-match breakdown")
-print("  basis       show classification basis explanation")
-print("  exit        quit")
-print()
+# ── Searches ──────────────────────────────────────────────────────────────────
 
-while True:
-    user_input = input("Enter ID: ").strip()
+def search_exporter(session: SearchSession, exp, show_v: bool):
+    print(f"\nTop 10 Buyers for Exporter [{exp.Exporter_ID}]")
+    print(f"  Industry : {exp.Industry}")
+    print(f"  State    : {exp.State}")
+    print(f"  MSME     : {'Yes' if exp.MSME_Flag else 'No'}")
+    print("=" * 72)
 
-    if not user_input:
-        continue
+    results = get_top_buyers(exp, session.index, session.industry_risk_map, top_k=10)
 
-    if user_input.lower() == "exit":
-        break
+    if not results:
+        return
 
-    if user_input.lower() == "basis":
-        _classification_basis()
-        continue
+    _print_effective_weights(results[0][2].get("effective_weights", {}))
 
-    show_v    = user_input.endswith(" -v")
-    target_id = user_input[:-3].strip() if show_v else user_input
+    print(f"  {'Rank':<5} {'Buyer ID':<15} {'Country':<14} {'Geo Tier':<10} {'Score':>7}")
+    print("  " + "─" * 58)
+    for rank, (bid, score, bd) in enumerate(results[:10], 1):
+        buyer   = session.buyer(bid)
+        country = buyer.Country if buyer else "?"
+        geo_lbl = bd.get("geo_label", "?")
+        print(f"  {rank:<5} {bid:<15} {country:<14} {geo_lbl:<10} {score:.4f}")
 
-    # ── Exporter search ───────────────────────────────────────────────────────
-    if target_id in exporter_dict:
-        exp = exporter_dict[target_id]
-        print(f"\nTop 10 Buyers for Exporter [{target_id}]")
-        print(f"  Industry : {exp.Industry}")
-        print(f"  State    : {exp.State}")
-        print(f"  MSME     : {'Yes' if exp.MSME_Flag else 'No'}")
-        print("=" * 72)
+    if show_v:
+        for rank, (bid, score, bd) in enumerate(results[:5], 1):
+            buyer = session.buyer(bid)
+            _print_breakdown(rank, bid, score, bd, exp=exp, imp=buyer)
 
-        results = get_top_buyers(exp, importers, industry_risk_map)
+    print()
 
-        if not results:
-            continue
 
-        _print_effective_weights(results[0][2].get("effective_weights", {}))
+def search_buyer(session: SearchSession, imp, show_v: bool):
+    print(f"\nTop 10 Exporters for Buyer [{imp.Buyer_ID}]")
+    print(f"  Industry : {imp.Industry}")
+    print(f"  Country  : {imp.Country}")
+    print("=" * 72)
 
-        print(f"  {'Rank':<5} {'Buyer ID':<15} {'Country':<14} {'Geo Tier':<10} {'Score':>7}")
-        print("  " + "─" * 58)
-        for rank, (bid, score, bd) in enumerate(results[:10], 1):
-            buyer   = buyer_dict.get(bid)
-            country = buyer.Country if buyer else "?"
-            geo_lbl = bd.get("geo_label", "?")
-            print(f"  {rank:<5} {bid:<15} {country:<14} {geo_lbl:<10} {score:.4f}")
+    results = get_top_exporters(imp, session.index, session.industry_risk_map, top_k=10)
 
-        if show_v:
-            for rank, (bid, score, bd) in enumerate(results[:5], 1):
-                buyer = buyer_dict.get(bid)
-                _print_breakdown(rank, bid, score, bd, exp=exp, imp=buyer)
+    if not results:
+        return
 
-        print()
-        continue
+    _print_effective_weights(results[0][2].get("effective_weights", {}))
+
+    print(f"  {'Rank':<5} {'Exporter ID':<15} {'State':<14} {'Geo Tier':<10} {'Score':>7}")
+    print("  " + "─" * 58)
+    for rank, (eid, score, bd) in enumerate(results[:10], 1):
+        exp     = session.exporter(eid)
+        state   = exp.State if exp else "?"
+        geo_lbl = bd.get("geo_label", "?")
+        print(f"  {rank:<5} {eid:<15} {state:<14} {geo_lbl:<10} {score:.4f}")
+
+    if show_v:
+        for rank, (eid, score, bd) in enumerate(results[:5], 1):
+            exp = session.exporter(eid)
+            _print_breakdown(rank, eid, score, bd, exp=exp, imp=imp)
+
+    print()
+
+
+# ── Main loop ─────────────────────────────────────────────────────────────────
 
-    # ── Buyer search ──────────────────────────────────────────────────────────
-    if target_id in buyer_dict:
-        imp = buyer_dict[target_id]
-        print(f"\nTop 10 Exporters for Buyer [{target_id}]")
-        print(f"  Industry : {imp.Industry}")
-        print(f"  Country  : {imp.Country}")
-        print("=" * 72)
+def main():
+    ap = argparse.ArgumentParser(description="Interactive exporter / buyer search")
+    ap.add_argument("--verify", action="store_true",
+                    help="hash the source CSVs instead of trusting their size and mtime")
+    args = ap.parse_args()
+
+    print("Loading dataset...")
+    session = SearchSession(verify=args.verify)
+    load_ms = sum(session.timings.values()) * 1000
+    print(f"Loaded {len(session.exporters)} exporters | {len(session.importers)} importers "
+          f"from {session.source} in {load_ms:.0f} ms\n")
+
+    print("Commands:")
+    print("  <ID>        search   (e.g.  EXP_5094  or  BUY_69687)")
+    print("  <ID> -v     search + full per-match breakdown")
+    print("  basis       show classification basis explanation")
+    print("  risk        show industry risk scores")
+    print("  timings     show load / build timings")
+    print("  history ID  show every snapshot of an ID")
+    print("  exit        quit")
+    print()
 
-        results = get_top_exporters(imp, exporters, industry_risk_map)
+    while True:
+        user_input = input("Enter ID: ").strip()
 
-        if not results:
+        if not user_input:
             continue
 
-        _print_effective_weights(results[0][2].get("effective_weights", {}))
+        if user_input.lower() == "exit":
+            break
+
+        if user_input.lower() == "basis":
+            _classification_basis()
+            continue
 
-        print(f"  {'Rank':<5} {'Exporter ID':<15} {'State':<14} {'Geo Tier':<10} {'Score':>7}")
-        print("  " + "─" * 58)
-        for rank, (eid, score, bd) in enumerate(results[:10], 1):
-            exp     = exporter_dict.get(eid)
-            state   = exp.State if exp else "?"
-            geo_lbl = bd.get("geo_label", "?")
-            print(f"  {rank:<5} {eid:<15} {state:<14} {geo_lbl:<10} {score:.4f}")
+        if user_input.lower() == "risk":
+            session.print_risk()
+            continue
 
-        if show_v:
-            for rank, (eid, score, bd) in enumerate(results[:5], 1):
-                exp = exporter_dict.get(eid)
-                _print_breakdown(rank, eid, score, bd, exp=exp, imp=imp)
+        if user_input.lower() == "timings":
+            session.print_timings()
+            continue
+
+        if user_input.lower().startswith("history "):
+            session.print_history(user_input[8:].strip())
+            continue
+
+        show_v    = user_input.endswith(" -v")
+        target_id = user_input[:-3].strip() if show_v else user_input
+
+        exp = session.exporter(target_id)
+        if exp is not None:
+            search_exporter(session, exp, show_v)
+            continue
+
+        imp = session.buyer(target_id)
+        if imp is not None:
+            search_buyer(session, imp, show_v)
+            continue
+
+        print(f"  ID '{target_id}' not found. Try EXP_XXXX or BUY_XXXXX\n")
 
-        print()
-        continue
 
-    print(f"  ID '{target_id}' not found. Try EXP_XXXX or BUY_XXXXX\n")
+if __name__ == "__main__":
+    main()
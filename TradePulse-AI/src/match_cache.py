@@ -0,0 +1,259 @@
+# match_cache.py  —  Persistent top-K match cache around the matchmaker
+#
+# An offline job (build_match_cache) scores every anchor once and writes each
+# anchor's top-K (candidate_id, score) list to a directory of .npy arrays plus
+# a JSON manifest. Lookups memory-map those arrays, so a hit is a dict lookup
+# and one row slice: no scoring, no deserialising the whole cache.
+#
+# Validity is tracked per (anchor side, industry) bucket. Its tag hashes
+#   - the candidate bucket's rows, in order (tie order depends on it),
+#   - the industry's risk value from compute_industry_risk,
+#   - the fusion config (CC weights, RRF k/β, CC/WRRF blend).
+# Each anchor's own row hash is stored too. A lookup is served only when both
+# the bucket tag and the anchor's current content still match; anything else
+# falls through to live scoring. A row-view anchor's hash is read from its
+# table's row_hashes(), computed once per (side, industry) table.
+#
+#   build_match_cache("cache/", index, industry_risk_map, top_k=100)
+#   matcher = CachedMatcher(index, industry_risk_map, MatchCache("cache/"))
+#   matcher.top_buyers(exporter, top_k=10)   → [(buyer_id, score), ...]
+
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+import scoring_engine
+from artifacts import replace_dir
+from match_index import MatchIndex
+from matchmaker import get_top_buyers, get_top_exporters
+from profile_table import ProfileTable
+from scoring_engine import compute_rrf_scores
+
+CACHE_FORMAT = 1
+MANIFEST     = "manifest.json"
+OTHER_SIDE   = {"exporter": "importer", "importer": "exporter"}
+
+
+def _scoring_fingerprint() -> str:
+    """Changes whenever the default fusion config changes, invalidating every entry."""
+    return repr(scoring_engine.DEFAULT_FUSION)
+
+
+def profile_hash(profile) -> int:
+    """Content hash of a single profile (dataclass or row view)."""
+    if hasattr(profile, "to_profile"):
+        profile = profile.to_profile()
+    return int(ProfileTable.from_profiles([profile]).row_hashes()[0])
+
+
+def bucket_tag(candidates: ProfileTable, risk: float) -> str:
+    """Version tag for one bucket: candidate rows + industry risk + fusion config."""
+    h = hashlib.sha1(_scoring_fingerprint().encode())
+    h.update(repr(float(risk)).encode())
+    h.update(candidates.row_hashes().tobytes())
+    return h.hexdigest()[:20]
+
+
+# ── Offline build ─────────────────────────────────────────────────────────────
+
+def build_match_cache(path: str, index: MatchIndex, industry_risk_map: dict,
+                      top_k=100, sides=("exporter", "importer")) -> dict:
+    """
+    Score every anchor of `sides` against its industry bucket and write the
+    top_k lists to `path`, built in <path>.tmp and swapped in by
+    artifacts.replace_dir. Returns the manifest.
+    """
+    tmp = path.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    manifest = {"format": CACHE_FORMAT, "top_k": int(top_k), "sides": {}}
+    for side in sides:
+        other = OTHER_SIDE[side]
+        anchor_ids, anchor_hash, anchor_ind = [], [], []
+        cand_codes, cand_vocab, rows_idx, rows_score, counts = {}, [], [], [], []
+        tags = {}
+
+        for ind_code, industry in enumerate(index.industries(side)):
+            anchors = index.candidates(side, industry)
+            cands   = index.candidates(other, industry)
+            risk    = industry_risk_map.get(industry, 0.5)
+            tags[industry] = bucket_tag(cands, risk)
+            hashes  = anchors.row_hashes()
+
+            for r in anchors.latest_rows().tolist():
+                pairs = compute_rrf_scores(anchors[r], cands, industry_risk_map,
+                                           top_k=top_k, with_breakdown=False) if len(cands) else []
+                idx   = np.full(top_k, -1, dtype=np.int32)
+                score = np.zeros(top_k, dtype=np.float64)
+                for j, (cid, s) in enumerate(pairs):
+                    if cid not in cand_codes:
+                        cand_codes[cid] = len(cand_vocab)
+                        cand_vocab.append(cid)
+                    idx[j], score[j] = cand_codes[cid], s
+                anchor_ids.append(str(anchors.ids()[r]))
+                anchor_hash.append(hashes[r])
+                anchor_ind.append(ind_code)
+                rows_idx.append(idx)
+                rows_score.append(score)
+                counts.append(len(pairs))
+
+        arrays = {
+            "anchor_ids":   np.asarray(anchor_ids, dtype=str),
+            "anchor_hash":  np.asarray(anchor_hash, dtype=np.uint64),
+            "anchor_ind":   np.asarray(anchor_ind, dtype=np.int16),
+            "count":        np.asarray(counts, dtype=np.int32),
+            "cand_vocab":   np.asarray(cand_vocab, dtype=str),
+            "cand_idx":     np.asarray(rows_idx, dtype=np.int32).reshape(-1, top_k),
+            "score":        np.asarray(rows_score, dtype=np.float64).reshape(-1, top_k),
+        }
+        for name, arr in arrays.items():
+            np.save(os.path.join(tmp, f"{side}_{name}.npy"), arr)
+        manifest["sides"][side] = {"industries": index.industries(side), "tags": tags,
+                                   "anchors": len(anchor_ids)}
+
+    with open(os.path.join(tmp, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    replace_dir(tmp, path)
+    return manifest
+
+
+# ── Lookup ────────────────────────────────────────────────────────────────────
+
+class MatchCache:
+    """Read side of a cache directory; arrays are memory-mapped, not loaded."""
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format") != CACHE_FORMAT:
+            raise ValueError(f"unsupported match cache format: {self.manifest.get('format')}")
+        self.path   = path
+        self.top_k  = self.manifest["top_k"]
+        self._sides = {}
+
+    def _side(self, side: str):
+        if side not in self._sides:
+            meta = self.manifest["sides"].get(side)
+            if meta is None:
+                self._sides[side] = None
+            else:
+                arr = {name: np.load(os.path.join(self.path, f"{side}_{name}.npy"), mmap_mode="r")
+                       for name in ("anchor_ids", "anchor_hash", "anchor_ind", "count",
+                                    "cand_vocab", "cand_idx", "score")}
+                inds = meta["industries"]
+                arr["rows"] = {(aid, inds[c]): r for r, (aid, c) in
+                               enumerate(zip(arr["anchor_ids"].tolist(), arr["anchor_ind"].tolist()))}
+                arr["tags"] = meta["tags"]
+                self._sides[side] = arr
+        return self._sides[side]
+
+    def tag(self, side: str, industry: str):
+        arr = self._side(side)
+        return None if arr is None else arr["tags"].get(industry)
+
+    def get(self, side: str, anchor_id: str, industry: str, anchor_hash: int,
+            current_tag: str, top_k: int):
+        """
+        Cached (candidate_id, score) list, or None when the entry is missing,
+        stale, or shorter than the top_k asked for.
+        """
+        arr = self._side(side)
+        if arr is None or arr["tags"].get(industry) != current_tag:
+            return None
+        r = arr["rows"].get((anchor_id, industry))
+        if r is None or int(arr["anchor_hash"][r]) != anchor_hash:
+            return None
+        count = int(arr["count"][r])
+        # A full row may have been cut at K; top_k=None asks for unsorted rows.
+        if top_k is None or (top_k > count and count == self.top_k):
+            return None
+        n     = min(top_k, count)
+        vocab = arr["cand_vocab"]
+        return [(str(vocab[c]), float(s))
+                for c, s in zip(arr["cand_idx"][r, :n].tolist(), arr["score"][r, :n].tolist())]
+
+
+class CachedMatcher:
+    """
+    get_top_buyers / get_top_exporters with a MatchCache in front. Cached lists
+    carry no breakdowns, so with_breakdown=True always scores live.
+    """
+
+    def __init__(self, index: MatchIndex, industry_risk_map: dict, cache=None):
+        self.index             = index
+        self.industry_risk_map = industry_risk_map
+        self.cache             = cache
+        self.hits              = 0
+        self.misses            = 0
+        self._tags             = {}   # (side, industry) → (candidate table, risk, tag)
+        self._hashes           = {}   # (side, industry) → (anchor table, its row hashes)
+
+    def current_tag(self, side: str, industry: str) -> str:
+        """Tag of the live bucket; recomputed only when the bucket or risk changed."""
+        cands = self.index.candidates(OTHER_SIDE[side], industry)
+        risk  = self.industry_risk_map.get(industry, 0.5)
+        seen  = self._tags.get((side, industry))
+        if seen is None or seen[0] is not cands or seen[1] != risk:
+            seen = (cands, risk, bucket_tag(cands, risk))
+            self._tags[(side, industry)] = seen
+        return seen[2]
+
+    def anchor_hash(self, side: str, anchor) -> int:
+        """Content hash of an anchor; row views use their table's row hashes."""
+        table = getattr(anchor, "table", None)
+        if table is None:
+            return profile_hash(anchor)
+        key  = (side, anchor.Industry)
+        seen = self._hashes.get(key)
+        if seen is None or seen[0] is not table:
+            seen = self._hashes[key] = (table, table.row_hashes())
+        return int(seen[1][anchor.row])
+
+    def _lookup(self, side: str, anchor, top_k):
+        if self.cache is None:
+            return None
+        tag = self.current_tag(side, anchor.Industry)
+        if self.cache.tag(side, anchor.Industry) != tag:
+            return None
+        anchor_id = anchor.Exporter_ID if side == "exporter" else anchor.Buyer_ID
+        return self.cache.get(side, anchor_id, anchor.Industry, self.anchor_hash(side, anchor),
+                              tag, top_k)
+
+    def _match(self, side: str, anchor, top_k, with_breakdown, live):
+        if not with_breakdown:
+            cached = self._lookup(side, anchor, top_k)
+            if cached is not None:
+                self.hits += 1
+                return cached
+        self.misses += 1
+        return live(anchor, self.index, self.industry_risk_map,
+                    top_k=top_k, with_breakdown=with_breakdown)
+
+    def top_buyers(self, exporter, top_k=100, with_breakdown=False):
+        return self._match("exporter", exporter, top_k, with_breakdown, get_top_buyers)
+
+    def top_exporters(self, buyer, top_k=100, with_breakdown=False):
+        return self._match("importer", buyer, top_k, with_breakdown, get_top_exporters)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    from preprocess import load_exporter_table, load_importer_table, load_news
+    from risk_engine import compute_industry_risk
+    from profile_store import matching_view
+
+    base = os.path.dirname(os.path.abspath(__file__))
+    data = os.path.join(base, "data")
+    out  = sys.argv[1] if len(sys.argv) > 1 else os.path.join(base, "match_cache")
+
+    t0        = time.perf_counter()
+    exporters = load_exporter_table(os.path.join(data, "EXIM_DatasetAlgo_Hackathon(Exporter_LiveSignals_v5_Updated).csv"))
+    importers = load_importer_table(os.path.join(data, "EXIM_DatasetAlgo_Hackathon(Importer_LiveSignals_v5_Updated).csv"))
+    risk_map  = compute_industry_risk(load_news(os.path.join(data, "EXIM_DatasetAlgo_Hackathon(Global_News_LiveSignals_Updated) (1).csv")))
+    index     = MatchIndex(matching_view(exporters), matching_view(importers))
+    manifest  = build_match_cache(out, index, risk_map)
+    counts    = {side: meta["anchors"] for side, meta in manifest["sides"].items()}
+    print(f"Match cache written to {out}: {counts} in {time.perf_counter() - t0:.1f}s")
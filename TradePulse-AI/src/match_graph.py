@@ -0,0 +1,247 @@
+# match_graph.py  —  Reciprocal (mutual) match graph, built in bulk per industry
+#
+# The swipe flow wants pairs that like each other: the buyer is in the
+# exporter's top-K *and* the exporter is in the buyer's top-K. Per industry,
+# both directions are scored as two blocks (compute_rrf_scores_many: every
+# exporter against the buyer bucket, every buyer against the exporter
+# bucket) and the two top-K lists are intersected. Each mutual edge keeps
+#
+#   score          harmonic mean of the two one-sided scores, 2ab / (a + b)
+#   exporter_rank  the buyer's rank in the exporter's list (1-based)
+#   buyer_rank     the exporter's rank in the buyer's list
+#
+# and a profile's neighbours come best score first, ties going to the lower
+# mutual rank (the max of the two ranks). Edges live once per industry,
+# ordered by exporter row and then that order, so the exporter side is a CSR
+# (indptr + buyer rows). The buyer side is a permutation of the same edges
+# with its own indptr. An ID → (industry, row) map makes neighbours() one
+# dict lookup and one slice.
+#
+# Every industry remembers the bucket tables it was built from. MatchIndex
+# replaces a bucket whenever its rows change, so stale() lists the industries
+# to rebuild and refresh() redoes just those.
+#
+#   graph = MatchGraph(index, industry_risk_map, top_k=50).build()
+#   graph.neighbours("exporter", "EXP_5094")  → [(buyer_id, score, exporter_rank, buyer_rank), ...]
+#   index.update("importer", changed); graph.refresh()
+#
+#   python match_graph.py --top-k 50 --out mutual_matches.csv
+
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from match_index import MatchIndex
+from scoring_engine import compute_rrf_scores_many
+
+BASE         = os.path.dirname(os.path.abspath(__file__))
+TOP_K        = 50
+EDGE_COLUMNS = ("industry", "exporter_id", "buyer_id", "score", "exporter_rank", "buyer_rank")
+
+
+def _ranked(results, rows: dict):
+    """Top-K lists → (anchor row, candidate row, 1-based rank, score) arrays."""
+    src, dst, rank, score = [], [], [], []
+    for i, res in enumerate(results):
+        for r, (cid, s) in enumerate(res, 1):
+            src.append(i)
+            dst.append(rows[cid])
+            rank.append(r)
+            score.append(s)
+    return (np.asarray(src, dtype=np.int64), np.asarray(dst, dtype=np.int64),
+            np.asarray(rank, dtype=np.int32), np.asarray(score, dtype=np.float64))
+
+
+def _same(built, current) -> bool:
+    """The bucket is unchanged (empty buckets are fresh tables on every call)."""
+    return built is current or (not len(built) and not len(current))
+
+
+def _indptr(rows: np.ndarray, n: int) -> np.ndarray:
+    out = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=out[1:])
+    return out
+
+
+class _IndustryGraph:
+    """Mutual edges of one industry, in CSR form from both sides."""
+
+    ARRAYS    = ("exporter_ids", "buyer_ids", "exp_indptr", "exp_rows", "buy_rows", "score",
+                 "exporter_rank", "buyer_rank", "buy_indptr", "buy_order")
+    __slots__ = ("exporters", "importers") + ARRAYS
+
+    def __init__(self, exporters, importers, top_k, risk_map, config):
+        self.exporters    = exporters
+        self.importers    = importers
+        self.exporter_ids = exporters.ids()
+        self.buyer_ids    = importers.ids()
+        n_exp, n_buy      = len(exporters), len(importers)
+
+        fwd = compute_rrf_scores_many(exporters, importers, risk_map, top_k=top_k,
+                                      with_breakdown=False, config=config)
+        bwd = compute_rrf_scores_many(importers, exporters, risk_map, top_k=top_k,
+                                      with_breakdown=False, config=config)
+        e_src, e_dst, e_rank, e_score = _ranked(fwd, {b: i for i, b in enumerate(self.buyer_ids)})
+        b_src, b_dst, b_rank, b_score = _ranked(bwd, {e: i for i, e in enumerate(self.exporter_ids)})
+
+        # An edge is keyed exporter_row * n_buy + buyer_row from either direction.
+        _, ei, bi = np.intersect1d(e_src * n_buy + e_dst, b_dst * n_buy + b_src,
+                                   return_indices=True)
+        a, b   = e_score[ei], b_score[bi]
+        total  = a + b
+        score  = np.divide(2 * a * b, total, out=np.zeros_like(total), where=total > 0)
+        mutual = np.maximum(e_rank[ei], b_rank[bi])
+        order  = np.lexsort((mutual, -score, e_src[ei]))
+
+        self.exp_rows      = e_src[ei][order].astype(np.int32)
+        self.buy_rows      = e_dst[ei][order].astype(np.int32)
+        self.score         = score[order].astype(np.float32)
+        self.exporter_rank = e_rank[ei][order].astype(np.int16)
+        self.buyer_rank    = b_rank[bi][order].astype(np.int16)
+        self.exp_indptr    = _indptr(self.exp_rows, n_exp)
+        self.buy_order     = np.lexsort((mutual[order], -self.score, self.buy_rows)).astype(np.int32)
+        self.buy_indptr    = _indptr(self.buy_rows, n_buy)
+
+    def __len__(self):
+        return len(self.score)
+
+    def edges(self, side: str, row: int) -> np.ndarray:
+        """Edge positions of one profile's neighbours, best first."""
+        if side == "exporter":
+            return np.arange(self.exp_indptr[row], self.exp_indptr[row + 1])
+        return self.buy_order[self.buy_indptr[row]:self.buy_indptr[row + 1]]
+
+    def nbytes(self) -> int:
+        return sum(getattr(self, a).nbytes for a in self.ARRAYS)
+
+
+class MatchGraph:
+    """Per-industry mutual-match graphs over a MatchIndex, refreshed per industry."""
+
+    def __init__(self, index: MatchIndex, industry_risk_map: dict, top_k=TOP_K, config=None):
+        self.index    = index
+        self.risk_map = industry_risk_map
+        self.top_k    = top_k
+        self.config   = config
+        self._graphs  = {}                                # industry → _IndustryGraph
+        self._where   = {"exporter": {}, "importer": {}}  # id → (industry, row)
+
+    def _industries(self) -> set:
+        return set(self.index.industries("exporter")) | set(self.index.industries("importer"))
+
+    def _drop(self, industry: str):
+        g = self._graphs.pop(industry, None)
+        if g is None:
+            return
+        for side, ids in (("exporter", g.exporter_ids), ("importer", g.buyer_ids)):
+            where = self._where[side]
+            for pid in ids.tolist():
+                if where.get(pid, (None,))[0] == industry:
+                    del where[pid]
+
+    def rebuild(self, industry: str):
+        """Recompute one industry's graph from the index's current buckets."""
+        self._drop(industry)
+        exporters = self.index.candidates("exporter", industry)
+        importers = self.index.candidates("importer", industry)
+        if not len(exporters) and not len(importers):
+            return
+        g = self._graphs[industry] = _IndustryGraph(exporters, importers, self.top_k,
+                                                    self.risk_map, self.config)
+        for side, ids in (("exporter", g.exporter_ids), ("importer", g.buyer_ids)):
+            self._where[side].update((pid, (industry, i)) for i, pid in enumerate(ids.tolist()))
+
+    def build(self):
+        for industry in sorted(self._industries()):
+            self.rebuild(industry)
+        return self
+
+    def stale(self) -> list:
+        """Industries whose buckets changed (or appeared / vanished) since they were built."""
+        out = []
+        for industry in sorted(self._industries() | set(self._graphs)):
+            g = self._graphs.get(industry)
+            exporters = self.index.candidates("exporter", industry)
+            importers = self.index.candidates("importer", industry)
+            if g is None:
+                if len(exporters) or len(importers):
+                    out.append(industry)
+            elif not (_same(g.exporters, exporters) and _same(g.importers, importers)):
+                out.append(industry)
+        return out
+
+    def refresh(self, industries=None) -> list:
+        """Rebuild `industries` (default: the stale ones); returns those rebuilt."""
+        industries = self.stale() if industries is None else list(industries)
+        for industry in industries:
+            self.rebuild(industry)
+        return industries
+
+    # ── lookups ───────────────────────────────────────────────────────────────
+
+    def neighbours(self, side: str, profile_id: str) -> list:
+        """
+        Mutual matches of one profile, best first:
+        [(other_id, score, exporter_rank, buyer_rank)]. Unknown IDs get [].
+        """
+        hit = self._where[side].get(profile_id)
+        if hit is None:
+            return []
+        g     = self._graphs[hit[0]]
+        edges = g.edges(side, hit[1])
+        other = g.buyer_ids[g.buy_rows[edges]] if side == "exporter" else g.exporter_ids[g.exp_rows[edges]]
+        return list(zip(other.tolist(), g.score[edges].tolist(),
+                        g.exporter_rank[edges].tolist(), g.buyer_rank[edges].tolist()))
+
+    def is_mutual(self, exporter_id: str, buyer_id: str) -> bool:
+        return any(b == buyer_id for b, *_ in self.neighbours("exporter", exporter_id))
+
+    def edges(self, industry=None) -> pd.DataFrame:
+        """Every mutual edge (EDGE_COLUMNS), for one industry or all of them."""
+        frames = []
+        for ind in ([industry] if industry else sorted(self._graphs)):
+            g = self._graphs.get(ind)
+            if g is None or not len(g):
+                continue
+            frames.append(pd.DataFrame({
+                "industry":      ind,
+                "exporter_id":   g.exporter_ids[g.exp_rows],
+                "buyer_id":      g.buyer_ids[g.buy_rows],
+                "score":         g.score,
+                "exporter_rank": g.exporter_rank,
+                "buyer_rank":    g.buyer_rank,
+            }))
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=EDGE_COLUMNS)
+
+    def __len__(self):
+        return sum(len(g) for g in self._graphs.values())
+
+    def nbytes(self) -> int:
+        return sum(g.nbytes() for g in self._graphs.values())
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def main():
+    from artifacts import load_artifact
+    from profile_store import matching_view
+    ap = argparse.ArgumentParser(description="Build the mutual-match graph for every industry")
+    ap.add_argument("--artifact", default=os.path.join(BASE, "exim_matchmaker"))
+    ap.add_argument("--top-k",    type=int, default=TOP_K, help="list length on each side")
+    ap.add_argument("--out",      help="write the edges to this CSV")
+    args = ap.parse_args()
+
+    art   = load_artifact(args.artifact)
+    index = MatchIndex(matching_view(art["exporters"]), matching_view(art["importers"]))
+    t0    = time.perf_counter()
+    graph = MatchGraph(index, art["industry_risk_map"], top_k=args.top_k).build()
+    print(f"{len(graph)} mutual edges, {graph.nbytes() / 2**20:.1f} MB, "
+          f"built in {time.perf_counter() - t0:.1f}s")
+    if args.out:
+        graph.edges().to_csv(args.out, index=False)
+        print(f"→ {args.out}")
+
+
+if __name__ == "__main__":
+    main()
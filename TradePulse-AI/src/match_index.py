@@ -0,0 +1,163 @@
+# match_index.py  —  Industry-partitioned candidate index for the matchmaker
+#
+# Matching only ever compares profiles within one industry, so both sides are
+# split into per-industry ProfileTable buckets once, at load time. A query
+# touches exactly one bucket instead of scanning every profile. Inside a
+# bucket, secondary partitions (Country for buyers, State for exporters) and
+# the per-value row bitmaps behind filtered queries (bitmap_index) are built
+# on first use and dropped whenever that bucket changes.
+#
+# Inserts and removals only rewrite the buckets they touch, so a profile
+# refresh costs O(bucket), not O(side).
+
+import numpy as np
+from bitmap_index import BitmapIndex
+from data_models import ExporterProfile, ImporterProfile
+from profile_table import ProfileTable
+from scoring_engine import attach_features
+
+SIDES = ("exporter", "importer")
+
+DEFAULT_SECONDARY = {
+    "exporter": ("State",),
+    "importer": ("Country",),
+}
+
+
+def _as_table(profiles, profile_cls=None):
+    if isinstance(profiles, ProfileTable):
+        return attach_features(profiles)
+    return attach_features(ProfileTable.from_profiles(profiles, profile_cls))
+
+
+class _Bucket:
+    """One industry's profiles for one side, plus lazily built sub-partitions and bitmaps."""
+
+    __slots__ = ("table", "_parts", "_bits")
+
+    def __init__(self, table: ProfileTable):
+        self.table  = table
+        self._parts = {}
+        self._bits  = None
+
+    def bitmaps(self) -> BitmapIndex:
+        if self._bits is None:
+            self._bits = BitmapIndex(self.table)
+        return self._bits
+
+    def partition(self, field: str, value):
+        """Sub-table of this bucket where `field == value` (None if absent)."""
+        if field not in self._parts:
+            codes = self.table.codes(field)
+            vocab = self.table.vocab[field]
+            self._parts[field] = {vocab[c]: self.table.take(np.flatnonzero(codes == c))
+                                  for c in np.unique(codes) if c >= 0}
+        return self._parts[field].get(value)
+
+
+class MatchIndex:
+    """
+    Per-industry candidate index over both sides of the market.
+
+        index = MatchIndex(exporter_table, importer_table)
+        get_top_buyers(exporter, index, industry_risk_map)
+
+    Secondary partitions are only available on the fields listed in
+    `secondary` (default: Country for buyers, State for exporters).
+    """
+
+    def __init__(self, exporters, importers, secondary=None):
+        self.secondary = dict(DEFAULT_SECONDARY, **(secondary or {}))
+        self._buckets  = {side: {} for side in SIDES}
+        self._where    = {side: {} for side in SIDES}   # id → industries holding it
+        self.insert("exporter", exporters)
+        self.insert("importer", importers)
+
+    # ── queries ───────────────────────────────────────────────────────────────
+
+    def candidates(self, side: str, industry: str, **partition) -> ProfileTable:
+        """
+        Profiles of `side` in `industry`, optionally narrowed to one value of
+        a secondary field, e.g. candidates("importer", "Solar", Country="UAE").
+        """
+        if len(partition) > 1:
+            raise ValueError("at most one secondary partition per query")
+        bucket = self._buckets[side].get(industry)
+        if bucket is None:
+            return self._empty(side)
+        if not partition:
+            return bucket.table
+        (field, value), = partition.items()
+        if field not in self.secondary[side]:
+            raise KeyError(f"no secondary partition on {side}.{field}")
+        table = bucket.partition(field, value)
+        return table if table is not None else self._empty(side)
+
+    def bitmaps(self, side: str, industry: str):
+        """BitmapIndex over the rows of candidates(side, industry), or None for no bucket."""
+        bucket = self._buckets[side].get(industry)
+        return None if bucket is None else bucket.bitmaps()
+
+    def industries(self, side: str) -> list:
+        return sorted(self._buckets[side])
+
+    def lookup(self, side: str, profile_id: str):
+        """Row view for an ID (its last row, as a dict comprehension would keep)."""
+        for industry in self._where[side].get(profile_id, ()):
+            table = self._buckets[side][industry].table
+            rows  = np.flatnonzero(table.ids() == profile_id)
+            if len(rows):
+                return table[int(rows[-1])]
+        return None
+
+    def __len__(self):
+        return sum(len(b.table) for side in SIDES for b in self._buckets[side].values())
+
+    def size(self, side: str) -> int:
+        return sum(len(b.table) for b in self._buckets[side].values())
+
+    # ── maintenance ───────────────────────────────────────────────────────────
+
+    def insert(self, side: str, profiles):
+        """Add profiles (dataclass list or ProfileTable) to their industry buckets."""
+        if not len(profiles):
+            return
+        table = _as_table(profiles)
+        codes = table.codes("Industry")
+        for code in np.unique(codes):
+            industry = table.vocab["Industry"][code]
+            part     = table.take(np.flatnonzero(codes == code))
+            bucket   = self._buckets[side].get(industry)
+            merged   = part if bucket is None else ProfileTable.concat([bucket.table, part])
+            self._buckets[side][industry] = _Bucket(merged)
+            for pid in np.unique(part.ids()).tolist():
+                self._where[side].setdefault(pid, set()).add(industry)
+
+    def remove(self, side: str, ids):
+        """Drop every row of the given IDs; returns how many rows went."""
+        ids, touched = set(ids), {}
+        for pid in ids:
+            for industry in self._where[side].pop(pid, ()):
+                touched.setdefault(industry, []).append(pid)
+        removed = 0
+        for industry, pids in touched.items():
+            table = self._buckets[side][industry].table
+            keep  = ~np.isin(table.ids(), pids)
+            removed += int((~keep).sum())
+            if keep.any():
+                self._buckets[side][industry] = _Bucket(table.take(np.flatnonzero(keep)))
+            else:
+                del self._buckets[side][industry]
+        return removed
+
+    def update(self, side: str, profiles):
+        """Replace every row of the IDs in `profiles` with the given rows."""
+        table = _as_table(profiles)
+        self.remove(side, np.unique(table.ids()).tolist())
+        self.insert(side, table)
+
+    def _empty(self, side: str) -> ProfileTable:
+        for bucket in self._buckets[side].values():
+            return bucket.table.take(np.zeros(0, dtype=np.int64))
+        cls = ExporterProfile if side == "exporter" else ImporterProfile
+        return ProfileTable.from_profiles([], cls)
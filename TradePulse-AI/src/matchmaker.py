@@ -1,25 +1,131 @@
 # matchmaker.py
 
-from scoring_engine import compute_rrf_scores
+from ann_index import AnnIndex, SHORTLIST
+from bitmap_index import BitmapIndex, filter_clauses
+from match_index import MatchIndex
+from profile_store import matching_view
+from profile_table import ProfileTable
+from scoring_engine import compute_rrf_scores, compute_rrf_scores_streaming, prune_candidates
 
 
-def get_top_buyers(exporter, importers, industry_risk_map, top_k=100):
-    """Top buyers for an exporter. Returns (buyer_id, score, breakdown) list."""
-    candidates = [imp for imp in importers if imp.Industry == exporter.Industry]
-    if not candidates:
+def _same_industry(pool, industry, side):
+    """
+    Candidates in `pool` sharing the industry. A MatchIndex answers from its
+    industry bucket; plain lists and tables fall back to a linear scan.
+    """
+    if isinstance(pool, MatchIndex):
+        return pool.candidates(side, industry)
+    if isinstance(pool, ProfileTable):
+        return pool.take(pool.rows_where("Industry", industry))
+    return [p for p in pool if p.Industry == industry]
+
+
+def _apply_filters(anchor, pool, candidates, side, filters):
+    """
+    The candidates matching `filters` (see bitmap_index.filter_clauses),
+    picked through row bitmaps before any scoring. A MatchIndex keeps the
+    bitmaps of each bucket; other pools build them for this query.
+    """
+    if not filters:
+        return candidates
+    table = candidates if isinstance(candidates, ProfileTable) else ProfileTable.from_profiles(candidates)
+    bits  = pool.bitmaps(side, anchor.Industry) if isinstance(pool, MatchIndex) else BitmapIndex(table)
+    rows  = bits.select(filter_clauses(anchor, table, filters))
+    if isinstance(candidates, ProfileTable):
+        return candidates.take(rows)
+    return [candidates[i] for i in rows]
+
+
+def _retrieve(anchor, pool, candidates, prune, ann, filtered=False):
+    """
+    Shortlist for full fusion: the ANN index if given, else the cheap bound.
+    The ANN index covers whole buckets of the MatchIndex it was built on, so
+    it must be that pool; a filtered pool uses the bound.
+    """
+    if ann is not None and ann.index is not pool:
+        raise ValueError("ann was built over a different pool than the one being searched")
+    if ann is not None and not filtered:
+        return ann.shortlist(anchor, prune or SHORTLIST)
+    if ann is not None:
+        prune = prune or SHORTLIST
+    return prune_candidates(anchor, candidates, prune)
+
+
+def _score(anchor, candidates, industry_risk_map, top_k, with_breakdown, memory_mb, config):
+    if memory_mb is not None:
+        return compute_rrf_scores_streaming(anchor, candidates, industry_risk_map, top_k=top_k,
+                                            with_breakdown=with_breakdown, memory_mb=memory_mb,
+                                            config=config)
+    return compute_rrf_scores(anchor, candidates, industry_risk_map, top_k=top_k,
+                              with_breakdown=with_breakdown, config=config)
+
+
+def get_top_buyers(exporter, importers, industry_risk_map, top_k=100, with_breakdown=True,
+                   prune=None, ann=None, memory_mb=None, config=None, filters=None):
+    """
+    Top buyers for an exporter, best first. Returns (buyer_id, score, breakdown)
+    list, or (buyer_id, score) pairs with with_breakdown=False. By default
+    every buyer in the bucket is scored. prune=N is lossy two-stage
+    retrieval: only the N buyers with the best cheap bound are fused, and
+    fusion normalises over those N, so the ranking can differ from the
+    exhaustive one (prune=300 keeps about half of the exhaustive top 10 on
+    the shipped data, recall@10 0.47–0.48, prune_recall.py). ann, off by
+    default, is an ann_index.AnnIndex built over `importers` (which must then
+    be that MatchIndex); the N come from its shortlist instead. It is lossy
+    in the same way: fusion renormalises over the shortlist, not the bucket
+    (recall@10 0.39 at nprobe 64 / 3,000 on 100k synthetic rows).
+    memory_mb=M scores in streaming mode with chunks capped at M MB (same results).
+    config is a scoring_engine.FusionConfig (default weights / blend when None).
+    filters keeps only matching buyers before scoring, e.g.
+    {"Country": ["UAE", "Singapore"], "Preferred_Channel": "WhatsApp"}: any
+    listed value per field, every field (bitmap_index.FILTER_FIELDS). Fusion
+    then normalises over the buyers that pass.
+    """
+    candidates = _same_industry(importers, exporter.Industry, "importer")
+    if not len(candidates):
         print(f"  [Warning] No buyers found for industry: {exporter.Industry}")
         return []
-    results = compute_rrf_scores(exporter, candidates, industry_risk_map)
-    results.sort(key=lambda x: x[1], reverse=True)
-    return results[:top_k]
+    candidates = _apply_filters(exporter, importers, candidates, "importer", filters)
+    if not len(candidates):
+        return []
+    candidates = _retrieve(exporter, importers, candidates, prune, ann, bool(filters))
+    return _score(exporter, candidates, industry_risk_map, top_k, with_breakdown, memory_mb, config)
 
 
-def get_top_exporters(buyer, exporters, industry_risk_map, top_k=100):
-    """Top exporters for a buyer. Returns (exporter_id, score, breakdown) list."""
-    candidates = [exp for exp in exporters if exp.Industry == buyer.Industry]
-    if not candidates:
+def get_top_exporters(buyer, exporters, industry_risk_map, top_k=100, with_breakdown=True,
+                      prune=None, ann=None, memory_mb=None, config=None, filters=None):
+    """
+    Top exporters for a buyer, best first. Returns (exporter_id, score, breakdown)
+    list, or (exporter_id, score) pairs with with_breakdown=False. prune / ann /
+    memory_mb / config / filters as in get_top_buyers, e.g. filters=
+    {"State": "Gujarat", "MSME_Flag": 1}.
+    """
+    candidates = _same_industry(exporters, buyer.Industry, "exporter")
+    if not len(candidates):
         print(f"  [Warning] No exporters found for industry: {buyer.Industry}")
         return []
-    results = compute_rrf_scores(buyer, candidates, industry_risk_map)
-    results.sort(key=lambda x: x[1], reverse=True)
-    return results[:top_k]
+    candidates = _apply_filters(buyer, exporters, candidates, "exporter", filters)
+    if not len(candidates):
+        return []
+    candidates = _retrieve(buyer, exporters, candidates, prune, ann, bool(filters))
+    return _score(buyer, candidates, industry_risk_map, top_k, with_breakdown, memory_mb, config)
+
+
+def run_matchmaking(exporters, importers, industry_risk_map=None, top_k=10, prune=None,
+                    ann=False, snapshots="latest") -> dict:
+    """
+    Top buyers for every exporter, in this process:
+    {exporter_id: [(buyer_id, score), ...]}. Without a risk map every industry
+    gets the neutral 0.5. Scoring is exhaustive by default; prune=N enables
+    two-stage retrieval and ann=True takes the shortlist from a per-industry
+    ANN index, both lossy (see get_top_buyers). Both sides are reduced to
+    profile_store.matching_view(snapshots) first: one row per ID by default.
+    For the full all-pairs job use batch_matchmaker.run_batch.
+    """
+    exporters   = matching_view(exporters, snapshots)
+    importers   = matching_view(importers, snapshots)
+    index, risk = MatchIndex(exporters, importers), industry_risk_map or {}
+    ann_index   = AnnIndex(index) if ann else None
+    return {exp.Exporter_ID: get_top_buyers(exp, index, risk, top_k=top_k, with_breakdown=False,
+                                             prune=prune, ann=ann_index)
+            for exp in exporters}
@@ -1,17 +1,38 @@
 # preprocess.py
 
+import dataclasses
 import pandas as pd
 import numpy as np
-from data_models import ExporterProfile, ImporterProfile
+from data_models import ExporterProfile, ImporterProfile, NULL_CERTS
+from profile_table import ProfileTable, compact_column
+from scoring_engine import attach_features
+
+REFERENCE_DATE = pd.Timestamp("2025-01-01")
+
+# ── CSV layout ────────────────────────────────────────────────────────────────
+# CSV column → dataclass field, where the two differ.
+EXPORTER_RENAMES = {"MSME_Udyam": "MSME_Flag"}
+IMPORTER_RENAMES = {}
+
+EXPORTER_TEXT = ("Date", "Exporter_ID", "State", "Industry", "Certification")
+IMPORTER_TEXT = ("Date", "Buyer_ID", "Country", "Industry", "Certification", "Preferred_Channel")
+
+# Numeric columns filled with the column median (over every row of the file).
+EXPORTER_MEDIAN = ("Manufacturing_Capacity_Tons", "Shipment_Value_USD")
+IMPORTER_MEDIAN = ("Avg_Order_Tons",)
+
+# Columns that may hold non-numeric junk ("Unknown"): read as text, coerced to NaN.
+COERCED = ("MSME_Udyam", "Funding_Event")
 
 
 def split_cert(x):
+    """Comma-separated certifications; "None" and other placeholders are no certification."""
     if pd.isna(x):
         return []
-    return [i.strip() for i in str(x).split(",") if i.strip()]
+    return [i.strip() for i in str(x).split(",") if i.strip().lower() not in NULL_CERTS]
 
 
-def recency_weight(date_str, reference_date=pd.Timestamp("2025-01-01")):
+def recency_weight(date_str, reference_date=REFERENCE_DATE):
     """Exponential decay: 1.0 for recent records, ~0.5 at 2 years old."""
     try:
         d = pd.to_datetime(date_str)
@@ -21,89 +42,231 @@ def recency_weight(date_str, reference_date=pd.Timestamp("2025-01-01")):
         return 0.5
 
 
-def _fill_median(series: pd.Series) -> pd.Series:
-    return series.fillna(series.median())
+def recency_weights(dates, reference_date=REFERENCE_DATE) -> np.ndarray:
+    """Vectorised recency_weight: the date column is parsed once, not per row."""
+    dates  = pd.Series(dates).reset_index(drop=True)
+    parsed = pd.to_datetime(dates, errors="coerce", format="ISO8601")
+    days   = (reference_date - parsed).dt.days.clip(lower=0).to_numpy(dtype=float)
+    out    = np.exp(-days / 730)
+    # Non-ISO stragglers get the per-value parser; unparseable ones end at 0.5.
+    for i in np.flatnonzero(np.isnan(out)):
+        out[i] = recency_weight(dates.iloc[i], reference_date)
+    return out
+
+
+def split_cert_csr(series: pd.Series):
+    """split_cert over a whole column, straight to CSR (offsets, codes, vocab)."""
+    # dropna first: a chunk with no certifications would explode to floats
+    parts = series.dropna().str.split(",").explode().str.strip()
+    parts = parts[parts.notna() & ~parts.str.lower().isin(NULL_CERTS)]
+    rows  = series.index.get_indexer(parts.index)
+    codes, vocab = pd.factorize(parts.to_numpy(dtype=object))
+    offsets = np.zeros(len(series) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(series)), out=offsets[1:])
+    return offsets, codes.astype(np.int32), [str(v) for v in vocab]
+
+
+def _header(path: str, profile_cls, renames: dict) -> list:
+    """
+    CSV header with names stripped. A single blank header is given the one
+    expected column that is missing (the exporter dump ships LinkedIn_Activity
+    with a whitespace-only name).
+    """
+    names    = [c.strip() for c in pd.read_csv(path, nrows=0).columns]
+    expected = {renames.get(c, c) for c in names}
+    missing  = [f.name for f in dataclasses.fields(profile_cls)
+                if f.name not in expected and f.name != "Recency_Weight"]
+    blanks   = [i for i, c in enumerate(names) if not c]
+    if len(missing) == 1 and len(blanks) == 1:
+        names[blanks[0]] = missing[0]
+    return names
+
+
+def _read_csv(source, profile_cls, renames: dict, text: tuple, chunksize=None, names=None):
+    """
+    read_csv with dtypes applied at parse time; yields DataFrames. With
+    `names` given, `source` is headerless rows (e.g. the tail of a feed).
+    """
+    header = 0 if names is None else None
+    names  = names or _header(source, profile_cls, renames)
+    fields = {f.name for f in dataclasses.fields(profile_cls)}
+    use    = [c for c in names if renames.get(c, c) in fields]
+    dtype  = {c: (str if c in text or c in COERCED else "float64") for c in use}
+    reader = pd.read_csv(source, names=names, header=header, usecols=use, dtype=dtype,
+                         skipinitialspace=True, chunksize=chunksize)
+    frames = reader if chunksize else [reader]
+    for df in frames:
+        for c in COERCED:
+            if c in df:
+                df[c] = pd.to_numeric(df[c], errors="coerce")
+        yield df.rename(columns=renames).reset_index(drop=True)
+
+
+def _text(series: pd.Series) -> pd.Series:
+    """str() of every value, as the per-row loaders did (missing → "nan")."""
+    return series.astype(object).where(series.notna(), "nan").astype(str)
+
+
+def _prepare(df: pd.DataFrame, profile_cls, text: tuple, defaults: dict,
+             reference_date) -> dict:
+    """
+    One DataFrame chunk → dataclass-field columns. Median-imputed columns keep
+    their NaNs here; callers fill them once the whole file has been seen.
+    """
+    n, out = len(df), {}
+    for f in dataclasses.fields(profile_cls):
+        name = f.name
+        if name == "Recency_Weight":
+            out[name] = recency_weights(df["Date"], reference_date)
+        elif name == "Certification":
+            out[name] = split_cert_csr(df[name])
+        elif name not in df:
+            out[name] = np.full(n, defaults.get(name, "Unknown"), dtype=object)
+        elif name in text:
+            out[name] = _text(df[name]).to_numpy()
+        else:
+            col = df[name]
+            if name in defaults:
+                col = col.fillna(defaults[name])
+            out[name] = col.to_numpy(dtype=float)
+    return out
+
+
+def _fill_remaining(columns: dict, medians: dict):
+    """Median fill for the declared columns, then for any other numeric NaNs."""
+    for name, col in columns.items():
+        if isinstance(col, np.ndarray) and col.dtype.kind == "f" and np.isnan(col).any():
+            med = medians[name] if name in medians else float(np.nanmedian(col))
+            columns[name] = np.where(np.isnan(col), med, col)
+
+
+def _to_profiles(profile_cls, columns: dict) -> list:
+    values = []
+    for f in dataclasses.fields(profile_cls):
+        col = columns[f.name]
+        if f.name == "Certification":
+            offsets, codes, vocab = col
+            flat = np.asarray(vocab, dtype=object)[codes].tolist()
+            values.append([flat[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)])
+        elif f.type is int:
+            values.append(np.asarray(col).astype(np.int64).tolist())
+        elif f.type is float:
+            values.append(np.asarray(col, dtype=float).tolist())
+        else:
+            values.append(list(col))
+    return [profile_cls(*row) for row in zip(*values)]
+
+
+# ── Side-specific rules ───────────────────────────────────────────────────────
+
+def _exporter_columns(df: pd.DataFrame, reference_date) -> dict:
+    df["MSME_Flag"] = df["MSME_Flag"].fillna(0)
+    return _prepare(df, ExporterProfile, EXPORTER_TEXT, {}, reference_date)
+
+
+def _importer_columns(df: pd.DataFrame, reference_date) -> dict:
+    defaults = {"Response_Probability": 0.5, "Funding_Event": 0}
+    df["Preferred_Channel"] = df["Preferred_Channel"].fillna("Email")
+    df = df[df["Buyer_ID"].notna()].reset_index(drop=True)
+    return _prepare(df, ImporterProfile, IMPORTER_TEXT, defaults, reference_date)
+
+
+_SIDES = {
+    "exporter": (ExporterProfile, EXPORTER_RENAMES, EXPORTER_TEXT, EXPORTER_MEDIAN, _exporter_columns),
+    "importer": (ImporterProfile, IMPORTER_RENAMES, IMPORTER_TEXT, IMPORTER_MEDIAN, _importer_columns),
+}
+
+
+def _ingest(path: str, side: str, chunksize, reference_date, medians: dict):
+    """Yields prepared column chunks; fills `medians` with the file-wide medians at the end."""
+    profile_cls, renames, text, median_cols, columns_of = _SIDES[side]
+    pools = {name: [] for name in median_cols}
+    for df in _read_csv(path, profile_cls, renames, text, chunksize):
+        # Medians are taken over every row, before rows without an ID drop out.
+        for name in median_cols:
+            pools[name].append(df[name].dropna().to_numpy())
+        yield columns_of(df, reference_date)
+    medians.update({name: float(np.median(np.concatenate(vals)))
+                    for name, vals in pools.items()})
+
+
+def load_profiles(path: str, side: str, reference_date=REFERENCE_DATE) -> list:
+    medians = {}
+    (columns,) = list(_ingest(path, side, None, reference_date, medians))
+    _fill_remaining(columns, medians)
+    return _to_profiles(_SIDES[side][0], columns)
+
+
+def load_table(path: str, side: str, chunksize=None, float_dtype=np.float64,
+               reference_date=REFERENCE_DATE) -> ProfileTable:
+    """
+    Bulk-load one side straight into a ProfileTable. With chunksize set the CSV
+    is parsed chunk by chunk and each chunk is compacted into table columns
+    before the next is read, so peak memory is the table plus one chunk.
+    """
+    profile_cls     = _SIDES[side][0]
+    tables, medians = [], {}
+    for cols in _ingest(path, side, chunksize, reference_date, medians):
+        csr = cols.pop("Certification")
+        tables.append(ProfileTable.from_columns(profile_cls, cols, cert_csr=csr))
+
+    table = ProfileTable.concat(tables)
+    _fill_remaining(table.columns, medians)
+    for name, kind in table.kinds.items():
+        if kind in ("float", "int"):
+            table.columns[name] = compact_column(table.columns[name], float_dtype)
+    return attach_features(table)
+
+
+def csv_header(path: str, side: str) -> list:
+    """Column names of one side's CSV, as parse_rows expects them."""
+    profile_cls, renames = _SIDES[side][:2]
+    return _header(path, profile_cls, renames)
+
+
+def parse_rows(source, side: str, names: list, pools: dict, history=None,
+               float_dtype=np.float64, reference_date=REFERENCE_DATE) -> ProfileTable:
+    """
+    Headerless CSV rows (path or file object) → ProfileTable, for rows that
+    extend a file already loaded. `pools` keeps the non-missing values seen
+    so far of each median-imputed column and is extended here, so missing
+    values get the median over every row ingested up to now. Other numeric
+    gaps use the median of these rows plus `history` (the table so far).
+    """
+    profile_cls, renames, text, median_cols, columns_of = _SIDES[side]
+    (df,) = _read_csv(source, profile_cls, renames, text, names=names)
+    for name in median_cols:
+        pools[name] = np.concatenate([pools.get(name, np.zeros(0)), df[name].dropna().to_numpy()])
+    columns = columns_of(df, reference_date)
+    medians = {name: float(np.median(vals)) for name, vals in pools.items() if len(vals)}
+    for name, col in columns.items():
+        if history is not None and len(history) and name not in medians and \
+                isinstance(col, np.ndarray) and col.dtype.kind == "f" and np.isnan(col).any():
+            medians[name] = float(np.nanmedian(np.concatenate([history.numeric(name), col])))
+    _fill_remaining(columns, medians)
+
+    csr   = columns.pop("Certification")
+    table = ProfileTable.from_columns(profile_cls, columns, cert_csr=csr)
+    for name, kind in table.kinds.items():
+        if kind in ("float", "int"):
+            table.columns[name] = compact_column(table.columns[name], float_dtype)
+    return table
 
 
 def load_exporters(path: str):
-    df = pd.read_csv(path)
-
-    # ── Null imputation ───────────────────────────────────────────────────────
-    df["Manufacturing_Capacity_Tons"] = _fill_median(df["Manufacturing_Capacity_Tons"])
-    df["Shipment_Value_USD"]          = _fill_median(df["Shipment_Value_USD"])
-    df["MSME_Udyam"]  = pd.to_numeric(df["MSME_Udyam"], errors="coerce").fillna(0).astype(int)
-
-    exporters = []
-    for _, r in df.iterrows():
-        exporters.append(ExporterProfile(
-            Exporter_ID                 = str(r["Exporter_ID"]),
-            Date                        = str(r["Date"]),
-            Industry                    = str(r["Industry"]),
-            State                       = str(r.get("State", "Unknown")),
-            MSME_Flag                   = int(r["MSME_Udyam"]),
-            Manufacturing_Capacity_Tons = float(r["Manufacturing_Capacity_Tons"]),
-            Revenue_Size_USD            = float(r["Revenue_Size_USD"]),
-            Team_Size                   = int(r["Team_Size"]),
-            Certification               = split_cert(r["Certification"]),
-            Good_Payment_Terms          = float(r["Good_Payment_Terms"]),
-            Prompt_Response_Score       = float(r["Prompt_Response_Score"]),
-            Hiring_Signal               = float(r["Hiring_Signal"]),
-            LinkedIn_Activity           = float(r["LinkedIn_Activity"]),
-            SalesNav_ProfileViews       = float(r["SalesNav_ProfileViews"]),
-            SalesNav_JobChange          = float(r["SalesNav_JobChange"]),
-            Intent_Score                = float(r["Intent_Score"]),
-            Shipment_Value_USD          = float(r["Shipment_Value_USD"]),
-            Quantity_Tons               = float(r["Quantity_Tons"]),
-            Tariff_Impact               = float(r["Tariff_Impact"]),
-            StockMarket_Impact          = float(r["StockMarket_Impact"]),
-            War_Risk                    = float(r["War_Risk"]),
-            Natural_Calamity_Risk       = float(r["Natural_Calamity_Risk"]),
-            Currency_Shift              = float(r["Currency_Shift"]),
-            Recency_Weight              = recency_weight(r["Date"]),
-        ))
-    return exporters
+    return load_profiles(path, "exporter")
 
 
 def load_importers(path: str):
-    df = pd.read_csv(path)
-
-    # ── Null imputation ───────────────────────────────────────────────────────
-    df["Avg_Order_Tons"]      = _fill_median(df["Avg_Order_Tons"])
-    df["Response_Probability"]= df["Response_Probability"].fillna(0.5)
-    df["Funding_Event"]       = pd.to_numeric(df["Funding_Event"], errors="coerce").fillna(0)
-    df["Preferred_Channel"]   = df["Preferred_Channel"].fillna("Email")
-
-    importers = []
-    for _, r in df.iterrows():
-        if pd.isna(r["Buyer_ID"]):
-            continue
-        importers.append(ImporterProfile(
-            Buyer_ID              = str(r["Buyer_ID"]),
-            Date                  = str(r["Date"]),
-            Industry              = str(r["Industry"]),
-            Country               = str(r.get("Country", "Unknown")),
-            Avg_Order_Tons        = float(r["Avg_Order_Tons"]),
-            Revenue_Size_USD      = float(r["Revenue_Size_USD"]),
-            Team_Size             = int(r["Team_Size"]),
-            Certification         = split_cert(r["Certification"]),
-            Good_Payment_History  = float(r["Good_Payment_History"]),
-            Prompt_Response       = float(r["Prompt_Response"]),
-            Hiring_Growth         = float(r["Hiring_Growth"]),
-            Funding_Event         = float(r["Funding_Event"]),
-            Engagement_Spike      = float(r["Engagement_Spike"]),
-            SalesNav_ProfileVisits= float(r["SalesNav_ProfileVisits"]),
-            DecisionMaker_Change  = float(r["DecisionMaker_Change"]),
-            Intent_Score          = float(r["Intent_Score"]),
-            Preferred_Channel     = str(r["Preferred_Channel"]),
-            Response_Probability  = float(r["Response_Probability"]),
-            Tariff_News           = float(r["Tariff_News"]),
-            StockMarket_Shock     = float(r["StockMarket_Shock"]),
-            War_Event             = float(r["War_Event"]),
-            Natural_Calamity      = float(r["Natural_Calamity"]),
-            Currency_Fluctuation  = float(r["Currency_Fluctuation"]),
-            Recency_Weight        = recency_weight(r["Date"]),
-        ))
-    return importers
+    return load_profiles(path, "importer")
+
+
+def load_exporter_table(path: str, chunksize=None, float_dtype=np.float64) -> ProfileTable:
+    return load_table(path, "exporter", chunksize, float_dtype)
+
+
+def load_importer_table(path: str, chunksize=None, float_dtype=np.float64) -> ProfileTable:
+    return load_table(path, "importer", chunksize, float_dtype)
 
 
 def load_news(path: str):
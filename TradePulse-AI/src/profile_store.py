@@ -0,0 +1,299 @@
+# profile_store.py  —  Snapshot history per profile ID, with a latest-state view
+#
+# The source CSVs hold several dated snapshots of most IDs (up to 7 per
+# exporter). Scoring every snapshot as its own candidate inflates the buckets
+# and returns the same company more than once, so matching works on the
+# latest-state view: one row per ID, the snapshot with the newest Date (for
+# equal dates, or dates that do not parse, the later row in the file wins).
+#
+# The history is the ProfileTable itself plus a permutation that groups rows
+# by ID in time order (CSR: order + offsets), so it costs two int arrays on
+# top of the columns. latest(aggregate=True) keeps the latest snapshot's
+# static fields but replaces the live-signal fields with their
+# recency-weighted mean over every snapshot of the ID.
+#
+# append() is sized by the new rows, not the history: the columns live in
+# buffers with spare capacity (doubling when full), the new IDs are merged
+# into unique / order / offsets with searchsorted inserts, and cached latest
+# views are patched for the IDs the new rows touched.
+#
+#   store  = ProfileStore(load_exporter_table(path))
+#   latest = store.latest()                   # feed this to MatchIndex
+#   store.history("EXP_5094")                 # oldest → newest snapshots
+
+import numpy as np
+import pandas as pd
+from data_models import ExporterProfile
+from profile_table import ProfileTable, _merged_vocab, _remap, compact_column
+from scoring_engine import attach_features
+
+SNAPSHOT_MODES = ("latest", "aggregate", "all")
+
+# Behavioural signals that move between snapshots; everything else is taken
+# from the latest one.
+SIGNAL_FIELDS = {
+    "exporter": ("Intent_Score", "Prompt_Response_Score", "Hiring_Signal", "LinkedIn_Activity",
+                 "SalesNav_ProfileViews", "SalesNav_JobChange"),
+    "importer": ("Intent_Score", "Prompt_Response", "Hiring_Growth", "Engagement_Spike",
+                 "SalesNav_ProfileVisits", "DecisionMaker_Change", "Response_Probability"),
+}
+
+
+def _as_table(profiles) -> ProfileTable:
+    return profiles if isinstance(profiles, ProfileTable) else ProfileTable.from_profiles(profiles)
+
+
+def snapshot_times(table: ProfileTable) -> np.ndarray:
+    """Date column as int64 nanoseconds; unparseable dates sort before every real one."""
+    parsed = pd.to_datetime(pd.Series(table.columns["Date"]), errors="coerce", format="ISO8601")
+    return parsed.to_numpy(dtype="datetime64[ns]").view(np.int64)   # NaT is int64 min
+
+
+def _put(buf, at, values) -> np.ndarray:
+    """Write values at buf[at:], reallocating (doubled, or widened dtype) when needed."""
+    end   = at + len(values)
+    dtype = np.result_type(buf.dtype, values.dtype)
+    if end > len(buf) or dtype != buf.dtype:
+        grown = np.empty(max(end, 2 * len(buf)), dtype)
+        grown[:at] = buf[:at]
+        buf = grown
+    buf[at:end] = values
+    return buf
+
+
+class _Buffers:
+    """Append-only column buffers behind a store's table; `table` views the filled rows."""
+
+    def __init__(self, table: ProfileTable, times: np.ndarray):
+        self.table    = table
+        self.n        = len(table)
+        self.n_codes  = len(table.cert_codes)
+        self.columns  = dict(table.columns)
+        self.features = dict(table.features)
+        self.offsets  = table.cert_offsets
+        self.codes    = table.cert_codes
+        self.times    = times
+
+    def append(self, new: ProfileTable, times: np.ndarray):
+        old, n, k = self.table, self.n, self.n_codes
+        vocab  = {name: _merged_vocab([old.vocab[name], new.vocab[name]]) for name in old.vocab}
+        cvocab = _merged_vocab([old.cert_vocab, new.cert_vocab])
+        for name, col in new.columns.items():
+            if name in vocab:
+                col = _remap(col, new.vocab[name], vocab[name])
+            self.columns[name] = _put(self.columns[name], n, col)
+        for name in self.features:
+            self.features[name] = _put(self.features[name], n, new.features[name])
+        codes        = _remap(new.cert_codes, new.cert_vocab, cvocab).astype(np.int32)
+        self.offsets = _put(self.offsets, n + 1, new.cert_offsets[1:] + k)
+        self.codes   = _put(self.codes, k, codes)
+        self.times   = _put(self.times, n, times)
+        self.n      += len(new)
+        self.n_codes = k + len(codes)
+        n, k         = self.n, self.n_codes
+        self.table   = ProfileTable(old.profile_cls, {c: v[:n] for c, v in self.columns.items()},
+                                    vocab, self.offsets[:n + 1], self.codes[:k], cvocab,
+                                    {f: v[:n] for f, v in self.features.items()})
+
+
+class ProfileStore:
+    """Every snapshot of one side, grouped per ID in time order."""
+
+    def __init__(self, profiles):
+        self.table  = attach_features(_as_table(profiles))
+        self.side   = "exporter" if self.table.profile_cls is ExporterProfile else "importer"
+        self.times  = snapshot_times(self.table)
+        self._bufs  = None
+        self._index()
+
+    def _index(self):
+        ids    = self.table.ids()
+        uniq, inverse = np.unique(ids, return_inverse=True)
+        # group by ID, then time, then file position
+        self.order    = np.lexsort((np.arange(len(ids)), self.times, inverse))
+        self.offsets  = np.zeros(len(uniq) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(inverse, minlength=len(uniq)), out=self.offsets[1:])
+        self.unique   = uniq
+        self._latest  = {}
+        self._view    = None          # rows of the latest view, in file order
+        self._means   = None          # its averaged signals, for latest(aggregate=True)
+
+    # ── history ───────────────────────────────────────────────────────────────
+
+    def __len__(self):
+        return len(self.unique)
+
+    def __contains__(self, profile_id):
+        return self._group(profile_id) is not None
+
+    def _group(self, profile_id):
+        g = int(np.searchsorted(self.unique, profile_id))
+        return g if g < len(self.unique) and self.unique[g] == profile_id else None
+
+    def ids(self) -> np.ndarray:
+        return self.unique
+
+    def snapshot_counts(self) -> np.ndarray:
+        """Snapshots per ID, aligned with ids()."""
+        return np.diff(self.offsets)
+
+    def history(self, profile_id) -> ProfileTable:
+        """Every snapshot of one ID, oldest first (empty table for an unknown ID)."""
+        g = self._group(profile_id)
+        if g is None:
+            return self.table.take(np.zeros(0, dtype=np.int64))
+        return self.table.take(self.order[self.offsets[g]:self.offsets[g + 1]])
+
+    def append(self, profiles) -> set:
+        """Add snapshots; returns the IDs whose latest snapshot is now one of the new rows."""
+        new = _as_table(profiles)
+        if not len(new):
+            return set()
+        n = len(self.table)
+        if self._bufs is None:
+            self._bufs = _Buffers(self.table, self.times)
+        # only the new snapshots get their features computed and dates parsed
+        times = snapshot_times(new)
+        self._bufs.append(attach_features(new), times)
+        self.table, self.times = self._bufs.table, self._bufs.times[:len(self._bufs.table)]
+        touched, dropped = self._merge(n, new.ids(), times)
+        last    = self.order[self.offsets[touched + 1] - 1]
+        changed = touched[last >= n]
+        self._patch_latest(touched, last[last >= n], dropped)
+        return set(self.unique[changed].tolist())
+
+    def _merge(self, n, ids, times):
+        """
+        Fold rows n.. into unique / order / offsets. Returns the groups holding
+        new rows and the rows that stopped being the latest of their ID.
+        """
+        rows  = np.lexsort((np.arange(len(ids)), times, ids))      # ID, time, file position
+        ids, times, rows = ids[rows], times[rows], n + rows
+        g     = np.searchsorted(self.unique, ids)
+        known = g < len(self.unique)
+        known[known] = self.unique[g[known]] == ids[known]
+        # insert after the ID's snapshots that are not newer; a new ID goes
+        # where its group will start
+        at = self.offsets[g]
+        for i in np.flatnonzero(known):
+            lo, hi = self.offsets[g[i]], self.offsets[g[i] + 1]
+            at[i]  = lo + np.searchsorted(self.times[self.order[lo:hi]], times[i], side="right")
+        # an ID's latest row changes when a new row lands at the end of its group
+        at_end        = np.zeros(len(g), dtype=bool)
+        at_end[known] = at[known] == self.offsets[g[known] + 1]
+        ends       = np.unique(g[at_end])
+        dropped    = self.order[self.offsets[ends + 1] - 1]
+        self.order = np.insert(self.order, at, rows)
+
+        counts = np.diff(self.offsets)
+        np.add.at(counts, g[known], 1)
+        fresh, n_fresh = np.unique(ids[~known], return_counts=True)
+        if len(fresh):
+            slots       = np.searchsorted(self.unique, fresh)
+            counts      = np.insert(counts, slots, n_fresh)
+            self.unique = np.insert(self.unique.astype(np.result_type(self.unique, fresh), copy=False),
+                                    slots, fresh)
+        self.offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.offsets[1:])
+        return np.searchsorted(self.unique, np.unique(ids)), dropped
+
+    # ── latest state ──────────────────────────────────────────────────────────
+
+    def _latest_groups(self):
+        """(rows, groups): each ID's newest row in file order, and its group index."""
+        last   = self.order[self.offsets[1:] - 1]
+        groups = np.argsort(last, kind="stable")
+        return last[groups], groups
+
+    def latest(self, aggregate=False) -> ProfileTable:
+        """One row per ID (in file order of the chosen snapshots); cached."""
+        key = bool(aggregate)
+        if key not in self._latest:
+            if self._view is None or (aggregate and self._means is None):
+                self._view, groups = self._latest_groups()
+                if aggregate:
+                    self._means = {name: self._weighted_mean(name)[groups]
+                                   for name in SIGNAL_FIELDS[self.side]}
+            view = self.table.take(self._view)
+            if aggregate:
+                for name, vals in self._means.items():
+                    view.columns[name] = compact_column(vals)
+                view.features = {}
+                attach_features(view)
+            self._latest[key] = view
+        return self._latest[key]
+
+    def _patch_latest(self, touched, added, dropped):
+        """
+        Carry the latest-view rows (and averaged signals) across an append:
+        rows that stopped being an ID's latest leave, the new latest rows
+        join at the end, and every touched ID is re-averaged. The views
+        themselves are re-taken from these rows when next asked for.
+        """
+        self._latest = {}
+        if self._view is None:
+            return
+        keep = None
+        if len(added):
+            keep       = np.ones(len(self._view), dtype=bool)
+            keep[np.searchsorted(self._view, dropped)] = False
+            self._view = np.concatenate([self._view[keep], np.sort(added)])
+        if self._means is not None:
+            pos = np.searchsorted(self._view, self.order[self.offsets[touched + 1] - 1])
+            for name, vals in self._means.items():
+                if keep is not None:
+                    vals = self._means[name] = np.concatenate([vals[keep], np.zeros(len(added))])
+                vals[pos] = self._weighted_mean(name, touched)
+
+    def _weighted_mean(self, name, groups=None) -> np.ndarray:
+        """Per-ID mean of a field over its snapshots (all IDs, or `groups`), weighted by Recency_Weight."""
+        if groups is None:
+            at, counts = np.arange(len(self.order)), np.diff(self.offsets)
+        else:
+            lo     = self.offsets[groups]
+            counts = self.offsets[groups + 1] - lo
+            at     = np.repeat(lo - (np.cumsum(counts) - counts), counts) + np.arange(counts.sum())
+        if not len(counts):
+            return np.zeros(0)
+        rows   = self.order[at]
+        starts = np.cumsum(counts) - counts
+        vals   = self.table.numeric(name)[rows]
+        w      = np.maximum(self.table.numeric("Recency_Weight")[rows], 0.0)
+        wsum   = np.add.reduceat(w, starts)
+        plain  = np.add.reduceat(vals, starts) / counts
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.add.reduceat(vals * w, starts) / wsum
+        return np.where(wsum > 0, mean, plain)
+
+    def _latest_rows(self, ids):
+        """(known IDs sorted, row of each one's latest snapshot)."""
+        ids  = np.unique(np.asarray(list(ids), dtype=str))
+        g    = np.searchsorted(self.unique, ids)
+        keep = g < len(self.unique)
+        keep[keep] = self.unique[g[keep]] == ids[keep]
+        return ids[keep], self.order[self.offsets[g[keep] + 1] - 1]
+
+    def latest_of(self, ids) -> ProfileTable:
+        """Latest snapshot of each of `ids` held by the store (sorted by ID; unknown IDs skipped)."""
+        return self.table.take(self._latest_rows(ids)[1])
+
+    def latest_row(self, profile_id, aggregate=False):
+        """ProfileRow of an ID in latest(aggregate), or None."""
+        g = self._group(profile_id)
+        if g is None:
+            return None
+        view = self.latest(aggregate)
+        return view[int(np.searchsorted(self._view, self.order[self.offsets[g + 1] - 1]))]
+
+
+def matching_view(profiles, snapshots="latest") -> ProfileTable:
+    """
+    The table matching should see: "latest" (one row per ID), "aggregate"
+    (latest, with signals averaged over the ID's snapshots) or "all" (every
+    snapshot as its own candidate, the old behaviour).
+    """
+    if snapshots not in SNAPSHOT_MODES:
+        raise ValueError(f"snapshots must be one of {SNAPSHOT_MODES}, not {snapshots!r}")
+    if snapshots == "all":
+        return _as_table(profiles)
+    return ProfileStore(profiles).latest(aggregate=snapshots == "aggregate")
@@ -0,0 +1,375 @@
+# profile_table.py  —  Columnar (struct-of-arrays) profile storage
+#
+# One ProfileTable holds every profile of one side (exporters or importers):
+#   - numeric fields   → one NumPy array each, stored in the narrowest dtype
+#                        that holds the values exactly (0/1 flags → int8,
+#                        whole-number counts → int32, the rest → float64)
+#   - category fields  → int32 codes into an interned vocabulary
+#                        (Industry, State, Country, Preferred_Channel)
+#   - string fields    → fixed-width NumPy unicode arrays (IDs, Date)
+#   - Certification    → CSR: cert_offsets (n+1) + cert_codes into cert_vocab,
+#                        plus uint64 bitsets per row built on first use
+#   - features         → derived float64 columns (scoring_engine.profile_features)
+#                        that travel with their rows through take / concat / save
+#
+# Rows are handed out as ProfileRow views that answer the same attribute
+# names as ExporterProfile / ImporterProfile, so code written against the
+# dataclasses (interactive_search, compute_components) keeps working.
+
+import dataclasses
+from operator import attrgetter
+import numpy as np
+import pandas as pd
+from data_models import ExporterProfile, cert_masks, is_null_cert
+
+CATEGORY_FIELDS = ("Industry", "State", "Country", "Preferred_Channel")
+LIST_FIELDS     = ("Certification",)
+
+_INT_DTYPES = (np.int8, np.int16, np.int32)
+_HASH_MIX   = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _field_kinds(profile_cls) -> dict:
+    """Storage kind per dataclass field: float / int / category / string / list."""
+    kinds = {}
+    for f in dataclasses.fields(profile_cls):
+        if f.name in LIST_FIELDS:
+            kinds[f.name] = "list"
+        elif f.name in CATEGORY_FIELDS:
+            kinds[f.name] = "category"
+        elif f.type is str:
+            kinds[f.name] = "string"
+        elif f.type is int:
+            kinds[f.name] = "int"
+        else:
+            kinds[f.name] = "float"
+    return kinds
+
+
+def compact_column(values, float_dtype=np.float64) -> np.ndarray:
+    """Narrowest dtype that round-trips the values; whole numbers become ints."""
+    arr = np.asarray(values, dtype=np.float64)
+    if arr.size and np.isfinite(arr).all() and (arr == np.floor(arr)).all():
+        lo, hi = arr.min(), arr.max()
+        for dt in _INT_DTYPES:
+            info = np.iinfo(dt)
+            if info.min <= lo and hi <= info.max:
+                return arr.astype(dt)
+    return arr.astype(float_dtype)
+
+
+def _intern(values):
+    """(int32 codes, vocabulary list) — vocabulary in order of first appearance."""
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    return codes.astype(np.int32), [str(u) for u in uniques]
+
+
+def _merged_vocab(vocabs) -> list:
+    merged = {}
+    for vocab in vocabs:
+        for v in vocab:
+            merged.setdefault(v, len(merged))
+    return list(merged)
+
+
+def _remap(codes, old_vocab, new_vocab) -> np.ndarray:
+    """Translate codes from old_vocab to positions in new_vocab (-1 stays -1)."""
+    pos = {v: i for i, v in enumerate(new_vocab)}
+    lut = np.array([pos[v] for v in old_vocab] + [-1], dtype=np.int32)
+    return lut[codes]
+
+
+class ProfileRow:
+    """Lightweight read-only view of one table row, attribute-compatible with the dataclasses."""
+
+    __slots__ = ("_table", "_i")
+
+    def __init__(self, table, i):
+        self._table = table
+        self._i     = i
+
+    def __getattr__(self, name):
+        return self._table.value(name, self._i)
+
+    def __repr__(self):
+        return f"{self._table.profile_cls.__name__}Row({self._table.id_field}={self.id!r})"
+
+    @property
+    def id(self):
+        return self._table.value(self._table.id_field, self._i)
+
+    @property
+    def row(self):
+        return self._i
+
+    @property
+    def table(self):
+        return self._table
+
+    def to_profile(self):
+        return self._table.to_profile(self._i)
+
+
+class ProfileTable:
+    """
+    Struct-of-arrays store for one side of the market.
+
+    Build with from_profiles (dataclass list) or from_columns (field → values).
+    `float_dtype=np.float32` halves the footprint of the non-integral columns
+    at the cost of scores drifting slightly from the float64 path.
+
+    `features` holds per-row values derived from the columns; code that
+    rewrites a column in place must clear it.
+    """
+
+    def __init__(self, profile_cls, columns: dict, vocab: dict,
+                 cert_offsets: np.ndarray, cert_codes: np.ndarray, cert_vocab: list,
+                 features=None):
+        self.profile_cls  = profile_cls
+        self.kinds        = _field_kinds(profile_cls)
+        self.id_field     = "Exporter_ID" if profile_cls is ExporterProfile else "Buyer_ID"
+        self.columns      = columns
+        self.vocab        = vocab
+        self.cert_offsets = cert_offsets
+        self.cert_codes   = cert_codes
+        self.cert_vocab   = cert_vocab
+        self.features     = features or {}
+        self._n           = len(cert_offsets) - 1
+        self._cert_masks  = None
+
+    # ── construction ──────────────────────────────────────────────────────────
+
+    @classmethod
+    def from_columns(cls, profile_cls, data: dict, float_dtype=np.float64, cert_csr=None):
+        """
+        `data` maps every dataclass field to a sequence (Certification: list of
+        lists). Pass cert_csr=(offsets, codes, vocab) instead when the
+        certifications are already CSR-encoded.
+        """
+        kinds   = _field_kinds(profile_cls)
+        columns, vocab = {}, {}
+        for name, kind in kinds.items():
+            if kind == "list":
+                continue
+            if kind == "category":
+                columns[name], vocab[name] = _intern(data[name])
+            elif kind == "string":
+                columns[name] = np.asarray(data[name], dtype=str)
+            else:
+                columns[name] = compact_column(data[name], float_dtype)
+
+        if cert_csr is not None:
+            offsets, codes, cert_vocab = cert_csr
+        else:
+            certs   = [[c for c in row if not is_null_cert(c)] for row in data["Certification"]]
+            lengths = np.fromiter((len(c) for c in certs), dtype=np.int64, count=len(certs))
+            offsets = np.zeros(len(certs) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=offsets[1:])
+            flat    = [c for row in certs for c in row]
+            codes, cert_vocab = _intern(flat) if flat else (np.zeros(0, np.int32), [])
+        return cls(profile_cls, columns, vocab, offsets, codes.astype(np.int32), cert_vocab)
+
+    @classmethod
+    def concat(cls, tables):
+        """Stack tables of the same profile class, merging their vocabularies."""
+        tables = list(tables)
+        first  = tables[0]
+        vocab  = {name: _merged_vocab(t.vocab[name] for t in tables) for name in first.vocab}
+        cvocab = _merged_vocab(t.cert_vocab for t in tables)
+        columns = {}
+        for name, kind in first.kinds.items():
+            if kind == "list":
+                continue
+            if kind == "category":
+                columns[name] = np.concatenate([
+                    _remap(t.columns[name], t.vocab[name], vocab[name]) for t in tables])
+            else:
+                columns[name] = np.concatenate([t.columns[name] for t in tables])
+        codes   = np.concatenate([_remap(t.cert_codes, t.cert_vocab, cvocab) for t in tables])
+        lengths = np.concatenate([np.diff(t.cert_offsets) for t in tables])
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        # features survive only when every part carries the same set
+        names    = set(first.features)
+        features = {} if any(set(t.features) != names for t in tables) else \
+                   {k: np.concatenate([t.features[k] for t in tables]) for k in first.features}
+        return cls(first.profile_cls, columns, vocab, offsets, codes.astype(np.int32), cvocab,
+                   features)
+
+    @classmethod
+    def from_profiles(cls, profiles, profile_cls=None, float_dtype=np.float64):
+        profiles    = list(profiles)
+        profile_cls = profile_cls or type(profiles[0])
+        names       = [f.name for f in dataclasses.fields(profile_cls)]
+        cols        = list(zip(*map(attrgetter(*names), profiles))) or [()] * len(names)
+        return cls.from_columns(profile_cls, dict(zip(names, cols)), float_dtype)
+
+    # ── size / access ─────────────────────────────────────────────────────────
+
+    def __len__(self):
+        return self._n
+
+    def __iter__(self):
+        return (ProfileRow(self, i) for i in range(self._n))
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            if key < 0:
+                key += self._n
+            if not 0 <= key < self._n:
+                raise IndexError(key)
+            return ProfileRow(self, int(key))
+        if isinstance(key, slice) and key.step in (None, 1):
+            return self._view(*key.indices(self._n)[:2])
+        idx = np.arange(self._n)[key] if isinstance(key, slice) else np.asarray(key)
+        return self.take(idx)
+
+    def _view(self, lo, hi):
+        """Rows lo:hi sharing this table's arrays (only the cert offsets are copied)."""
+        hi      = max(lo, hi)
+        columns = {k: v[lo:hi] for k, v in self.columns.items()}
+        offsets = self.cert_offsets[lo:hi + 1] - self.cert_offsets[lo]
+        codes   = self.cert_codes[self.cert_offsets[lo]:self.cert_offsets[hi]]
+        return ProfileTable(self.profile_cls, columns, self.vocab, offsets, codes, self.cert_vocab,
+                            {k: v[lo:hi] for k, v in self.features.items()})
+
+    def value(self, name, i):
+        """Python value of one field for row i, as the dataclass would hold it."""
+        kind = self.kinds.get(name)
+        if kind is None:
+            raise AttributeError(name)
+        if kind == "list":
+            lo, hi = self.cert_offsets[i], self.cert_offsets[i + 1]
+            return [self.cert_vocab[c] for c in self.cert_codes[lo:hi]]
+        if kind == "category":
+            return self.vocab[name][self.columns[name][i]]
+        if kind == "string":
+            return str(self.columns[name][i])
+        if kind == "int":
+            return int(self.columns[name][i])
+        return float(self.columns[name][i])
+
+    def numeric(self, name) -> np.ndarray:
+        """float64 view/copy of a numeric column, ready for scoring arithmetic."""
+        return np.asarray(self.columns[name], dtype=np.float64)
+
+    def codes(self, name) -> np.ndarray:
+        return self.columns[name]
+
+    def code_of(self, name, value) -> int:
+        """Interned code of a category value, or -1 when it never occurs."""
+        try:
+            return self.vocab[name].index(value)
+        except ValueError:
+            return -1
+
+    def strings(self, name) -> np.ndarray:
+        """Decoded category / string column as an object array."""
+        if self.kinds[name] == "category":
+            return np.asarray(self.vocab[name], dtype=object)[self.columns[name]]
+        return self.columns[name].astype(object)
+
+    def certifications(self) -> list:
+        """Certification lists for every row (decoded from the CSR arrays)."""
+        vocab = np.asarray(self.cert_vocab, dtype=object)
+        flat  = vocab[self.cert_codes].tolist()
+        off   = self.cert_offsets
+        return [flat[off[i]:off[i + 1]] for i in range(self._n)]
+
+    def cert_masks(self) -> np.ndarray:
+        """(n, words) uint64 certification bitsets over cert_vocab (cached)."""
+        if self._cert_masks is None:
+            self._cert_masks = cert_masks(self.cert_offsets, self.cert_codes, self.cert_vocab)
+        return self._cert_masks
+
+    def ids(self) -> np.ndarray:
+        return self.columns[self.id_field]
+
+    def latest_rows(self) -> np.ndarray:
+        """Row of the last occurrence of every distinct ID, in row order."""
+        ids = self.ids()
+        _, first_rev = np.unique(ids[::-1], return_index=True)
+        return np.sort(len(ids) - 1 - first_rev)
+
+    def rows_where(self, name, value) -> np.ndarray:
+        """Row positions whose category field equals value."""
+        code = self.code_of(name, value)
+        if code < 0:
+            return np.zeros(0, dtype=np.int64)
+        return np.flatnonzero(self.columns[name] == code)
+
+    def take(self, idx):
+        """New table holding rows idx (vocabularies are shared, not copied)."""
+        idx     = np.asarray(idx, dtype=np.int64)
+        columns = {k: v[idx] for k, v in self.columns.items()}
+        lo, hi  = self.cert_offsets[idx], self.cert_offsets[idx + 1]
+        lengths = hi - lo
+        offsets = np.zeros(len(idx) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        gather  = np.repeat(lo - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return ProfileTable(self.profile_cls, columns, self.vocab,
+                            offsets, self.cert_codes[gather], self.cert_vocab,
+                            {k: v[idx] for k, v in self.features.items()})
+
+    def to_arrays(self):
+        """
+        (arrays, meta): every NumPy buffer of the table by name, plus the small
+        Python-side state (profile class, vocabularies). from_arrays inverts it,
+        so the buffers can be placed in shared memory or on disk.
+        """
+        arrays = dict(self.columns)
+        arrays["__cert_offsets"] = self.cert_offsets
+        arrays["__cert_codes"]   = self.cert_codes
+        arrays.update({"__feature__" + k: v for k, v in self.features.items()})
+        meta = {"profile_cls": self.profile_cls, "vocab": self.vocab, "cert_vocab": self.cert_vocab}
+        return arrays, meta
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, meta: dict):
+        columns  = {k: v for k, v in arrays.items() if not k.startswith("__")}
+        features = {k[len("__feature__"):]: v for k, v in arrays.items()
+                    if k.startswith("__feature__")}
+        return cls(meta["profile_cls"], columns, meta["vocab"],
+                   arrays["__cert_offsets"], arrays["__cert_codes"], meta["cert_vocab"], features)
+
+    def to_profile(self, i):
+        return self.profile_cls(**{name: self.value(name, i) for name in self.kinds})
+
+    def to_profiles(self) -> list:
+        return [self.to_profile(i) for i in range(self._n)]
+
+    def row_hashes(self) -> np.ndarray:
+        """
+        uint64 content hash per row. Built from decoded values, so it does not
+        depend on vocabulary order or on the dtype a column was compacted to.
+        """
+        h = np.zeros(self._n, dtype=np.uint64)
+        for name, kind in self.kinds.items():
+            if kind == "list":
+                col = self._cert_hashes()
+            elif kind == "category":
+                col = pd.util.hash_array(np.asarray(self.vocab[name], dtype=object))
+                col = np.append(col, np.uint64(0))[self.columns[name]]   # -1 → 0
+            elif kind == "string":
+                col = pd.util.hash_array(self.columns[name].astype(object))
+            else:
+                col = pd.util.hash_array(self.numeric(name))
+            h = (h * _HASH_MIX) ^ col
+        return h
+
+    def _cert_hashes(self) -> np.ndarray:
+        """Order-insensitive hash of each row's certification set (0 when empty)."""
+        out = np.zeros(self._n, dtype=np.uint64)
+        if not len(self.cert_codes):
+            return out
+        per_code = pd.util.hash_array(np.asarray(self.cert_vocab, dtype=object))
+        lengths  = np.diff(self.cert_offsets)
+        filled   = lengths > 0
+        out[filled] = np.bitwise_xor.reduceat(per_code[self.cert_codes],
+                                              self.cert_offsets[:-1][filled])
+        return out
+
+    def nbytes(self) -> int:
+        return (sum(v.nbytes for v in self.columns.values())
+                + sum(v.nbytes for v in self.features.values())
+                + self.cert_offsets.nbytes + self.cert_codes.nbytes)
@@ -0,0 +1,142 @@
+# prune_recall.py  —  Recall@k of two-stage retrieval against exhaustive scoring
+#
+# For a sample of anchors, the exhaustive top-k (compute_rrf_scores over the
+# whole industry bucket) is compared with the top-k after cutting the bucket
+# down to N candidates, by prefilter_bound (--mode prune) or by the ANN
+# index shortlist (--mode ann). One row per N (and per nprobe for ann):
+#
+#   keep    recall@k (mean / min)   share of anchors with full recall
+#   covered share of the exhaustive top-k inside the shortlist
+#   mean candidates scored          mean ms pruned vs exhaustive
+#
+# Fusion normalises over the candidates it is given, so recall stays below
+# `covered` even for a perfect shortlist: re-fusing the exact exhaustive
+# top 300 of a ~1,140 bucket recovers only about half of its top 10.
+# `covered` is what a shortlist method (bound, nprobe, size) controls.
+#
+#   python prune_recall.py --keep 100 200 300 500 --k 10 --anchors 300
+#   python prune_recall.py --synthetic 100k --keep 300 1000 3000
+#   python prune_recall.py --mode ann --nprobe 2 4 8 16 --keep 100 300 1000
+
+import argparse
+import os
+import time
+import numpy as np
+from ann_index import AnnIndex
+from match_index import MatchIndex
+from scoring_engine import compute_rrf_scores, prune_candidates
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+DATA = os.path.join(BASE, "data")
+OTHER_SIDE = {"exporter": "importer", "importer": "exporter"}
+
+
+def exhaustive_top(anchors, index: MatchIndex, industry_risk_map: dict, k=10):
+    """(top-k ID sets, candidate buckets, ms per anchor) of exhaustive scoring."""
+    exhaustive, full_ms, buckets = [], [], []
+    for a in anchors:
+        side  = "importer" if hasattr(a, "Manufacturing_Capacity_Tons") else "exporter"
+        cands = index.candidates(side, a.Industry)
+        t0    = time.perf_counter()
+        exhaustive.append({cid for cid, _ in compute_rrf_scores(a, cands, industry_risk_map,
+                                                                top_k=k, with_breakdown=False)})
+        full_ms.append((time.perf_counter() - t0) * 1000)
+        buckets.append(cands)
+    return exhaustive, buckets, full_ms
+
+
+def pruning_recall(anchors, index: MatchIndex, industry_risk_map: dict, keeps, k=10,
+                   shortlist=prune_candidates, exhaustive=None) -> list:
+    """
+    One dict per keep value: recall@k stats and timings over `anchors` (all
+    one side). shortlist(anchor, bucket, keep) picks the candidates to fuse;
+    pass exhaustive_top()'s result to reuse it across shortlists.
+    """
+    exhaustive, buckets, full_ms = exhaustive or exhaustive_top(anchors, index,
+                                                                industry_risk_map, k)
+    rows = []
+    for keep in keeps:
+        recall, covered, ms, scored = [], [], [], []
+        for a, cands, truth in zip(anchors, buckets, exhaustive):
+            t0     = time.perf_counter()
+            subset = shortlist(a, cands, keep)
+            got    = compute_rrf_scores(a, subset, industry_risk_map, top_k=k, with_breakdown=False)
+            ms.append((time.perf_counter() - t0) * 1000)
+            scored.append(len(subset))
+            recall.append(len(truth & {cid for cid, _ in got}) / len(truth) if truth else 1.0)
+            covered.append(len(truth & set(subset.ids().tolist())) / len(truth) if truth else 1.0)
+        recall = np.array(recall)
+        rows.append({
+            "keep":       keep,
+            "recall":     float(recall.mean()),
+            "min_recall": float(recall.min()),
+            "full":       float((recall == 1.0).mean()),
+            "covered":    float(np.mean(covered)),
+            "scored":     float(np.mean(scored)),
+            "ms":         float(np.mean(ms)),
+            "full_ms":    float(np.mean(full_ms)),
+        })
+    return rows
+
+
+def _load(args):
+    from preprocess import load_exporter_table, load_importer_table, load_news
+    from risk_engine import compute_industry_risk
+    if args.synthetic:
+        from benchmark import write_synthetic, _parse_size
+        paths = write_synthetic(args.workdir, _parse_size(args.synthetic), args.seed)
+    else:
+        paths = {
+            "exporters": os.path.join(DATA, "EXIM_DatasetAlgo_Hackathon(Exporter_LiveSignals_v5_Updated).csv"),
+            "importers": os.path.join(DATA, "EXIM_DatasetAlgo_Hackathon(Importer_LiveSignals_v5_Updated).csv"),
+            "news":      os.path.join(DATA, "EXIM_DatasetAlgo_Hackathon(Global_News_LiveSignals_Updated) (1).csv"),
+        }
+    return (load_exporter_table(paths["exporters"]), load_importer_table(paths["importers"]),
+            compute_industry_risk(load_news(paths["news"])))
+
+
+def main():
+    import tempfile
+    ap = argparse.ArgumentParser(description="Recall@k of pruned vs exhaustive scoring")
+    ap.add_argument("--keep",      type=int, nargs="+", default=[100, 200, 300, 500, 1000])
+    ap.add_argument("--k",         type=int, default=10)
+    ap.add_argument("--anchors",   type=int, default=200)
+    ap.add_argument("--side",      default="exporter", choices=("exporter", "importer"))
+    ap.add_argument("--mode",      default="prune", choices=("prune", "ann"))
+    ap.add_argument("--nprobe",    type=int, nargs="+", default=[None],
+                    help="ANN lists scanned per query (default: AnnIndex's)")
+    ap.add_argument("--synthetic", help="use benchmark data of this size, e.g. 100k")
+    ap.add_argument("--seed",      type=int, default=0)
+    ap.add_argument("--workdir",   default=os.path.join(tempfile.gettempdir(), "tradepulse_bench"))
+    args = ap.parse_args()
+
+    exporters, importers, risk = _load(args)
+    index   = MatchIndex(exporters, importers)
+    table   = exporters if args.side == "exporter" else importers
+    rng     = np.random.default_rng(args.seed)
+    rows    = rng.choice(len(table), size=min(args.anchors, len(table)), replace=False)
+    anchors = [table[int(r)] for r in rows]
+    anchors = [a for a in anchors if len(index.candidates(OTHER_SIDE[args.side], a.Industry))]
+
+    shortlists = {None: prune_candidates}
+    if args.mode == "ann":
+        t0  = time.perf_counter()
+        ann = AnnIndex(index).build()
+        print(f"ANN index built in {time.perf_counter() - t0:.2f}s")
+        shortlists = {p: (lambda a, cands, keep, p=p: ann.shortlist(a, keep, p))
+                      for p in args.nprobe}
+
+    print(f"{len(anchors)} {args.side} anchors, {args.mode}, recall@{args.k}")
+    print(f"{'nprobe':>6} {'keep':>7} {'recall':>8} {'min':>6} {'full':>6} {'covered':>8} "
+          f"{'scored':>8} {'ms':>8} {'exh. ms':>8}")
+    exhaustive = exhaustive_top(anchors, index, risk, args.k)
+    for nprobe, shortlist in shortlists.items():
+        for r in pruning_recall(anchors, index, risk, sorted(args.keep), args.k, shortlist,
+                                exhaustive):
+            print(f"{nprobe or '-':>6} {r['keep']:>7} {r['recall']:>8.3f} {r['min_recall']:>6.2f} "
+                  f"{r['full']:>6.1%} {r['covered']:>8.3f} {r['scored']:>8.0f} {r['ms']:>8.2f} "
+                  f"{r['full_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,22 +4,13 @@ import pandas as pd
 import numpy as np
 
 IMPACT_WEIGHTS = {"High": 1.0, "Medium": 0.6, "Low": 0.3}
+REFERENCE_DATE = pd.Timestamp("2025-01-01")
+DECAY_DAYS     = 730    # e-folding time of the recency weight
+UNDATED_DAYS   = 730    # age assumed for events without a parseable date
 
 
-def compute_industry_risk(news_df: pd.DataFrame) -> dict:
-    """
-    Compute recency-weighted, impact-weighted risk score per industry (0–1).
-    Higher = riskier industry environment right now.
-    """
-    news_df = news_df.copy()
-    news_df["Date"] = pd.to_datetime(news_df["Date"], errors="coerce")
-    ref = pd.Timestamp("2025-01-01")
-    news_df["days_old"]  = (ref - news_df["Date"]).dt.days.fillna(730)
-    news_df["recency_w"] = np.exp(-news_df["days_old"] / 730)
-    news_df["impact_w"]  = news_df["Impact_Level"].map(IMPACT_WEIGHTS).fillna(0.5)
-    news_df["weight"]    = news_df["recency_w"] * news_df["impact_w"]
-
-    news_df["raw_risk"] = (
+def _raw_risk(news_df: pd.DataFrame) -> pd.Series:
+    return (
         news_df["Tariff_Change"].abs().clip(0, 1)       * 0.25 +
         news_df["StockMarket_Shock"].abs().clip(0, 1)   * 0.25 +
         news_df["War_Flag"].clip(0, 1)                  * 0.30 +
@@ -27,15 +18,143 @@ def compute_industry_risk(news_df: pd.DataFrame) -> dict:
         news_df["Currency_Shift"].abs().clip(0, 1)      * 0.10
     )
 
+
+def _impact_weights(news_df: pd.DataFrame) -> pd.Series:
+    return news_df["Impact_Level"].map(IMPACT_WEIGHTS).fillna(0.5)
+
+
+def _age_days(now, dates: pd.Series) -> pd.Series:
+    """
+    Whole days between each date and `now`, both taken at midnight (NaN for
+    unparseable dates). Ages never depend on the time of day, so moving
+    `now` shifts every age by the same whole number of days.
+    """
+    dates = pd.to_datetime(dates, errors="coerce")
+    return (pd.Timestamp(now).normalize() - dates.dt.normalize()).dt.days
+
+
+def _min_max(result: dict) -> dict:
+    if result:
+        lo, hi = min(result.values()), max(result.values())
+        span = hi - lo if hi > lo else 1.0
+        result = {k: (v - lo) / span for k, v in result.items()}
+    return result
+
+
+def compute_industry_risk(news_df: pd.DataFrame, reference_date=REFERENCE_DATE) -> dict:
+    """
+    Compute recency-weighted, impact-weighted risk score per industry (0–1).
+    Higher = riskier industry environment right now.
+    """
+    news_df = news_df.copy()
+    news_df["days_old"]  = _age_days(reference_date, news_df["Date"]).fillna(UNDATED_DAYS)
+    news_df["recency_w"] = np.exp(-news_df["days_old"] / DECAY_DAYS)
+    news_df["impact_w"]  = _impact_weights(news_df)
+    news_df["weight"]    = news_df["recency_w"] * news_df["impact_w"]
+    news_df["raw_risk"]  = _raw_risk(news_df)
+
     result = {}
     for ind, grp in news_df.groupby("Affected_Industry"):
         w = grp["weight"].values
         r = grp["raw_risk"].values
         result[ind] = float(np.average(r, weights=w)) if w.sum() > 0 else 0.5
 
-    if result:
-        lo, hi = min(result.values()), max(result.values())
-        span = hi - lo if hi > lo else 1.0
-        result = {k: (v - lo) / span for k, v in result.items()}
+    return _min_max(result)
 
-    return result
+
+# ── Incremental aggregation ───────────────────────────────────────────────────
+
+class RiskAggregator:
+    """
+    Streaming form of compute_industry_risk.
+
+    Keeps, per industry, Σw and Σw·raw_risk with every dated event's recency
+    weight taken relative to `now`. Appending news touches only the new rows;
+    moving `now` forward by Δ days multiplies the dated sums by exp(-Δ/730)
+    instead of reprocessing history. Ages are whole days between midnights
+    (as in compute_industry_risk), so Δ counts calendar days and an intraday
+    `now` ages nothing. Undated events always count as 730 days old, so they
+    sit in separate sums that never rescale.
+
+        agg = RiskAggregator(now="2025-01-01")
+        agg.add(news_df)             # history, once
+        agg.add(event_dict)          # then single events or micro-batches
+        agg.advance("2025-01-02")
+        agg.risk_map()               # == compute_industry_risk(all_news, now)
+
+    Results match compute_industry_risk up to float summation order (~1e-13).
+    """
+
+    def __init__(self, now=REFERENCE_DATE):
+        self.now      = pd.Timestamp(now)
+        self.events   = 0
+        self._dated   = {}   # industry → np.array([Σw, Σw·r]), decayed to self.now
+        self._undated = {}   # industry → np.array([Σw, Σw·r]), fixed weight
+        self._cache   = None
+
+    def add(self, news) -> int:
+        """Fold in a news DataFrame, one event dict, or a list of event dicts."""
+        if isinstance(news, dict):
+            return self._add_event(news)
+        df = news if isinstance(news, pd.DataFrame) else pd.DataFrame(news)
+        df = df[df["Affected_Industry"].notna()]
+        if df.empty:
+            return 0
+
+        days   = _age_days(self.now, df["Date"])
+        impact = _impact_weights(df).to_numpy(dtype=float)
+        raw    = _raw_risk(df).to_numpy(dtype=float)
+        dated  = days.notna().to_numpy()
+        age    = days.fillna(UNDATED_DAYS).to_numpy(dtype=float)
+        weight = np.exp(-age / DECAY_DAYS) * impact
+
+        sums = pd.DataFrame({"ind": df["Affected_Industry"].to_numpy(), "dated": dated,
+                             "w": weight, "wr": weight * raw})
+        for (ind, is_dated), grp in sums.groupby(["ind", "dated"]):
+            target = self._dated if is_dated else self._undated
+            acc    = target.setdefault(ind, np.zeros(2))
+            acc   += (grp["w"].sum(), grp["wr"].sum())
+
+        self.events += len(df)
+        self._cache  = None
+        return len(df)
+
+    def _add_event(self, ev: dict) -> int:
+        """Single-event path: same arithmetic as add(), without a DataFrame."""
+        ind = ev.get("Affected_Industry")
+        if ind is None or ind != ind:
+            return 0
+        age, target = _age_days(self.now, pd.Series([ev.get("Date")]))[0], self._dated
+        if age != age:                             # unparseable date
+            age, target = UNDATED_DAYS, self._undated
+        raw = (min(abs(ev["Tariff_Change"]), 1)     * 0.25 +
+               min(abs(ev["StockMarket_Shock"]), 1) * 0.25 +
+               min(max(ev["War_Flag"], 0), 1)       * 0.30 +
+               min(max(ev["Natural_Calamity_Flag"], 0), 1) * 0.10 +
+               min(abs(ev["Currency_Shift"]), 1)    * 0.10)
+        weight = np.exp(-age / DECAY_DAYS) * IMPACT_WEIGHTS.get(ev.get("Impact_Level"), 0.5)
+        acc    = target.setdefault(ind, np.zeros(2))
+        acc   += (weight, weight * raw)
+        self.events += 1
+        self._cache  = None
+        return 1
+
+    def advance(self, now):
+        """Move the decay reference to `now`; dated sums rescale by exp(-Δdays/730)."""
+        now    = pd.Timestamp(now)
+        days   = (now.normalize() - self.now.normalize()).days
+        factor = np.exp(-days / DECAY_DAYS)
+        for acc in self._dated.values():
+            acc *= factor
+        self.now    = now
+        self._cache = None
+
+    def risk_map(self) -> dict:
+        """Min-max normalised risk per industry, recomputed only after add/advance."""
+        if self._cache is None:
+            result = {}
+            for ind in sorted(self._dated.keys() | self._undated.keys()):
+                w, wr  = self._dated.get(ind, 0) + self._undated.get(ind, np.zeros(2))
+                result[ind] = float(wr / w) if w > 0 else 0.5
+            self._cache = _min_max(result)
+        return dict(self._cache)
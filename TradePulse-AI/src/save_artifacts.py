@@ -1,26 +1,25 @@
-import pickle
-from preprocess import load_exporters, load_importers, load_news
+import os
+from preprocess import load_exporter_table, load_importer_table, load_news
 from risk_engine import compute_industry_risk
+from artifacts import save_artifact
 
 EXPORTER_PATH = "data/EXIM_DatasetAlgo_Hackathon(Exporter_LiveSignals_v5_Updated).csv"
 IMPORTER_PATH = "data/EXIM_DatasetAlgo_Hackathon(Importer_LiveSignals_v5_Updated).csv"
 NEWS_PATH     = "data/EXIM_DatasetAlgo_Hackathon(Global_News_LiveSignals_Updated) (1).csv"
+ARTIFACT_PATH = "exim_matchmaker"
 
 print("Loading and preprocessing...")
 
-exporters = load_exporters(EXPORTER_PATH)
-importers = load_importers(IMPORTER_PATH)
+exporters = load_exporter_table(EXPORTER_PATH)
+importers = load_importer_table(IMPORTER_PATH)
 news_df   = load_news(NEWS_PATH)
 
 industry_risk_map = compute_industry_risk(news_df)
 
-artifacts = {
-    "exporters": exporters,
-    "importers": importers,
-    "industry_risk_map": industry_risk_map
-}
+manifest = save_artifact(
+    ARTIFACT_PATH, exporters, importers, industry_risk_map,
+    sources={"exporters": EXPORTER_PATH, "importers": IMPORTER_PATH, "news": NEWS_PATH},
+)
 
-with open("exim_matchmaker.pkl", "wb") as f:
-    pickle.dump(artifacts, f)
-
-print("✅ PKL file created: exim_matchmaker.pkl")
\ No newline at end of file
+size = sum(os.path.getsize(os.path.join(ARTIFACT_PATH, f)) for f in os.listdir(ARTIFACT_PATH))
+print(f"✅ Artifact written: {ARTIFACT_PATH}/ (schema v{manifest['schema_version']}, {size / 1e6:.1f} MB)")
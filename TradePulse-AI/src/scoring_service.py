@@ -0,0 +1,265 @@
+# scoring_service.py  —  Local asyncio HTTP/JSON front end for the matchmaker
+#
+#   GET  /health
+#   GET  /buyers?id=EXP_5094&top_k=10&breakdown=1
+#   GET  /exporters?id=BUY_69687&top_k=10
+#   POST /buyers | /exporters   with a JSON body {"id": ..., "top_k": ..., "breakdown": ...}
+#
+# The artifact (save_artifacts.py) is opened once in the server and once per
+# worker process; its columns are memory-mapped, so the workers share pages.
+# Scoring runs in a ProcessPoolExecutor, never on the event loop.
+#
+# Concurrent requests for the same (side, industry) bucket are micro-batched.
+# The first one opens a window of BATCH_WINDOW_MS; every request for that
+# bucket arriving inside the window (up to MAX_BATCH) is scored in one pool
+# task that gathers the candidate columns once. Each caller gets the prefix
+# of the batch's largest top_k, which is exactly its own top_k result.
+#
+#   python scoring_service.py --port 8765 --workers 4
+
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+from artifacts import load_artifact
+from match_index import MatchIndex
+from profile_store import matching_view, SNAPSHOT_MODES
+from scoring_engine import compute_rrf_scores_many
+
+BASE            = os.path.dirname(os.path.abspath(__file__))
+ARTIFACT_PATH   = os.path.join(BASE, "exim_matchmaker")
+BATCH_WINDOW_MS = 2.0
+MAX_BATCH       = 64
+MAX_TOP_K       = 1000
+ROUTES          = {"/buyers": "exporter", "/exporters": "importer"}
+OTHER_SIDE      = {"exporter": "importer", "importer": "exporter"}
+REASONS         = {200: "OK", 400: "Bad Request", 404: "Not Found",
+                   405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class Catalog:
+    """
+    Matching tables (one row per ID, see profile_store.matching_view), ID → row
+    maps and the match index.
+    """
+
+    def __init__(self, artifact_path: str, snapshots="latest"):
+        art = load_artifact(artifact_path)
+        self.tables   = {"exporter": matching_view(art["exporters"], snapshots),
+                         "importer": matching_view(art["importers"], snapshots)}
+        self.risk_map = art["industry_risk_map"]
+        # With snapshots="all" an ID's last row in the file answers lookups.
+        self.rows     = {side: dict(zip(t.ids().tolist(), range(len(t))))
+                         for side, t in self.tables.items()}
+        self._index   = None
+
+    @property
+    def index(self) -> MatchIndex:
+        if self._index is None:
+            self._index = MatchIndex(self.tables["exporter"], self.tables["importer"])
+        return self._index
+
+    def anchor(self, side: str, anchor_id: str):
+        row = self.rows[side].get(anchor_id)
+        return None if row is None else self.tables[side][row]
+
+
+# ── Worker side ───────────────────────────────────────────────────────────────
+
+_CATALOG = None
+
+
+def _init_worker(artifact_path: str, snapshots: str):
+    global _CATALOG
+    _CATALOG = Catalog(artifact_path, snapshots)
+
+
+def _score_batch(side: str, industry: str, anchor_ids: list, top_k: int,
+                 with_breakdown: bool) -> list:
+    """One pool task: every anchor of the batch against the shared bucket."""
+    anchors = [_CATALOG.anchor(side, aid) for aid in anchor_ids]
+    cands   = _CATALOG.index.candidates(OTHER_SIDE[side], industry)
+    results = compute_rrf_scores_many(anchors, cands, _CATALOG.risk_map,
+                                      top_k=top_k, with_breakdown=with_breakdown)
+    return [[list(r) for r in res] for res in results]
+
+
+# ── Batching ──────────────────────────────────────────────────────────────────
+
+class ScoringService:
+    """Resolves anchors, groups concurrent requests per bucket, dispatches to the pool."""
+
+    def __init__(self, artifact_path=ARTIFACT_PATH, workers=None,
+                 batch_window_ms=BATCH_WINDOW_MS, max_batch=MAX_BATCH, snapshots="latest"):
+        self.catalog   = Catalog(artifact_path, snapshots)
+        self.window    = batch_window_ms / 1000.0
+        self.max_batch = max_batch
+        self._pending  = {}   # (side, industry, breakdown) → [(anchor_id, top_k, future)]
+        self.batches   = 0
+        self.requests  = 0
+        workers = os.cpu_count() if workers is None else workers
+        if workers:
+            self.pool = ProcessPoolExecutor(workers, initializer=_init_worker,
+                                            initargs=(artifact_path, snapshots))
+        else:
+            _init_worker(artifact_path, snapshots)   # score on the loop's default thread pool
+            self.pool = None
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    async def match(self, side: str, anchor_id: str, top_k: int, with_breakdown: bool):
+        """Top matches for one anchor, or None for an unknown ID."""
+        anchor = self.catalog.anchor(side, anchor_id)
+        if anchor is None:
+            return None
+        loop  = asyncio.get_running_loop()
+        fut   = loop.create_future()
+        key   = (side, anchor.Industry, bool(with_breakdown))
+        batch = self._pending.setdefault(key, [])
+        batch.append((anchor_id, top_k, fut))
+        self.requests += 1
+        if len(batch) >= self.max_batch:
+            self._flush(key)
+        elif len(batch) == 1:
+            loop.call_later(self.window, self._flush, key)
+        return await fut
+
+    def _flush(self, key):
+        batch = self._pending.pop(key, None)
+        if batch:
+            self.batches += 1
+            asyncio.ensure_future(self._run(key, batch))
+
+    async def _run(self, key, batch):
+        side, industry, with_breakdown = key
+        ids   = list(dict.fromkeys(aid for aid, _, _ in batch))
+        top_k = max(k for _, k, _ in batch)
+        loop  = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self.pool, _score_batch, side, industry,
+                                                 ids, top_k, with_breakdown)
+        except Exception as exc:
+            for _, _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+        by_id = dict(zip(ids, results))
+        for aid, k, fut in batch:
+            if not fut.done():
+                fut.set_result(by_id[aid][:k])
+
+
+# ── HTTP ──────────────────────────────────────────────────────────────────────
+
+def _params(method: str, target: str, body: bytes) -> dict:
+    params = {k: v[-1] for k, v in parse_qs(urlsplit(target).query).items()}
+    if method == "POST" and body:
+        params.update(json.loads(body))
+    return params
+
+
+def _flag(value) -> bool:
+    return str(value).lower() in ("1", "true", "yes")
+
+
+async def _route(service: ScoringService, method: str, target: str, body: bytes):
+    path = urlsplit(target).path.rstrip("/") or "/"
+    if path == "/health":
+        return 200, {"status": "ok", "requests": service.requests, "batches": service.batches}
+    side = ROUTES.get(path)
+    if side is None:
+        return 404, {"error": f"unknown path {path}"}
+    if method not in ("GET", "POST"):
+        return 405, {"error": f"{method} not allowed"}
+    try:
+        params = _params(method, target, body)
+        top_k  = int(params.get("top_k", 10))
+    except (ValueError, TypeError) as exc:
+        return 400, {"error": str(exc)}
+    anchor_id = params.get("id")
+    if not anchor_id or not 1 <= top_k <= MAX_TOP_K:
+        return 400, {"error": f"need id and 1 <= top_k <= {MAX_TOP_K}"}
+
+    t0      = time.perf_counter()
+    results = await service.match(side, str(anchor_id), top_k, _flag(params.get("breakdown", 0)))
+    if results is None:
+        return 404, {"error": f"unknown {side} id {anchor_id}"}
+    return 200, {
+        "id":      anchor_id,
+        "side":    side,
+        "results": [{"id": r[0], "score": r[1], **({"breakdown": r[2]} if len(r) > 2 else {})}
+                    for r in results],
+        "ms":      round((time.perf_counter() - t0) * 1000, 2),
+    }
+
+
+async def _handle(service: ScoringService, reader, writer):
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            method, target, _ = line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while (h := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = h.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+            try:
+                status, payload = await _route(service, method, target, body)
+            except Exception as exc:                   # keep the connection usable
+                status, payload = 500, {"error": repr(exc)}
+            data = json.dumps(payload).encode()
+            keep = headers.get("connection", "").lower() != "close"
+            writer.write(
+                f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if keep else 'close'}\r\n\r\n".encode() + data)
+            await writer.drain()
+            if not keep:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host="127.0.0.1", port=8765, **service_kwargs):
+    service = ScoringService(**service_kwargs)
+    server  = await asyncio.start_server(lambda r, w: _handle(service, r, w), host, port)
+    print(f"Scoring service on http://{host}:{port}  "
+          f"({len(service.catalog.tables['exporter'])} exporters | "
+          f"{len(service.catalog.tables['importer'])} importers)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main():
+    import argparse
+    ap = argparse.ArgumentParser(description="Matchmaker HTTP scoring service")
+    ap.add_argument("--host",      default="127.0.0.1")
+    ap.add_argument("--port",      type=int, default=8765)
+    ap.add_argument("--artifact",  default=ARTIFACT_PATH)
+    ap.add_argument("--workers",   type=int, default=None, help="0 = score in-process")
+    ap.add_argument("--window-ms", type=float, default=BATCH_WINDOW_MS)
+    ap.add_argument("--snapshots", default="latest", choices=SNAPSHOT_MODES)
+    args = ap.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, artifact_path=args.artifact,
+                          workers=args.workers, batch_window_ms=args.window_ms,
+                          snapshots=args.snapshots))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# test_artifacts.py  —  Saving over an artifact must never leave a half-written directory
+#
+#   python -m pytest -q test_artifacts.py
+
+import os
+import numpy as np
+import pytest
+import artifacts
+from artifacts import load_artifact, save_artifact
+
+
+def test_resave_replaces_while_old_is_mapped(market, tmp_path):
+    exporters, importers, _, risk = market
+    path = str(tmp_path / "artifact")
+    save_artifact(path, exporters, importers, risk)
+    old  = load_artifact(path)                              # keeps the old columns mapped
+
+    save_artifact(path, exporters[:10], importers[:20], {"Textiles": 0.25})
+    new  = load_artifact(path)
+    assert (len(new["exporters"]), len(new["importers"])) == (10, 20)
+    assert new["industry_risk_map"] == {"Textiles": 0.25}
+    assert np.array_equal(old["exporters"].ids(), exporters.ids())
+    assert sorted(os.listdir(tmp_path)) == ["artifact"]     # no .tmp / .old left behind
+
+
+def test_failed_swap_keeps_old_artifact(market, tmp_path, monkeypatch):
+    exporters, importers, _, risk = market
+    path = str(tmp_path / "artifact")
+    save_artifact(path, exporters, importers, risk)
+
+    real = os.replace
+    def replace(src, dst):
+        if src.endswith(".tmp"):
+            raise OSError("disk full")
+        return real(src, dst)
+    monkeypatch.setattr(artifacts.os, "replace", replace)
+    with pytest.raises(OSError):
+        save_artifact(path, exporters[:10], importers[:20], risk)
+    monkeypatch.undo()
+
+    assert len(load_artifact(path)["exporters"]) == len(exporters)
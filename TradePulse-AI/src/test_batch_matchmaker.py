@@ -0,0 +1,42 @@
+# test_batch_matchmaker.py  —  The batch job must write what per-anchor matchmaking returns
+#
+#   python -m pytest -q test_batch_matchmaker.py
+
+import pandas as pd
+import pytest
+from batch_matchmaker import run_batch
+from match_index import MatchIndex
+from matchmaker import get_top_buyers, get_top_exporters
+from profile_store import matching_view
+
+TOP_K = 5
+
+
+@pytest.fixture(scope="module")
+def reference(market):
+    """{side: {anchor_id: [(candidate_id, score), ...]}} from get_top_buyers / get_top_exporters."""
+    exporters, importers, _, risk = market
+    exporters, importers = matching_view(exporters), matching_view(importers)
+    index = MatchIndex(exporters, importers)
+    return {
+        "exporter": {e.Exporter_ID: get_top_buyers(e, index, risk, top_k=TOP_K, with_breakdown=False)
+                     for e in exporters if len(index.candidates("importer", e.Industry))},
+        "importer": {b.Buyer_ID: get_top_exporters(b, index, risk, top_k=TOP_K, with_breakdown=False)
+                     for b in importers if len(index.candidates("exporter", b.Industry))},
+    }
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_matches_per_anchor(market, reference, tmp_path, workers):
+    exporters, importers, _, risk = market
+    out = run_batch(exporters, importers, risk, str(tmp_path), top_k=TOP_K, workers=workers,
+                    shard_size=37, fmt="csv")
+    for side, ref in reference.items():
+        df = pd.read_csv(out[side]["path"]).sort_values(["anchor_id", "rank"], kind="stable")
+        assert out[side]["anchors"] == len(ref)
+        assert out[side]["rows"] == len(df) == sum(map(len, ref.values()))
+        got = {aid: list(zip(g.candidate_id, g.score)) for aid, g in df.groupby("anchor_id")}
+        assert got.keys() == ref.keys()
+        for aid, pairs in ref.items():
+            assert [c for c, _ in got[aid]] == [c for c, _ in pairs], aid
+            assert [s for _, s in got[aid]] == pytest.approx([s for _, s in pairs], abs=1e-12)
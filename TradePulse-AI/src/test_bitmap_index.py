@@ -0,0 +1,76 @@
+# test_bitmap_index.py  —  Bitmap filters must select exactly what a row-by-row predicate does
+#
+#   python -m pytest -q test_bitmap_index.py
+
+import pytest
+from bitmap_index import BitmapIndex, filter_clauses
+from conftest import anchors_for
+from geo_engine import compute_geo_score
+from matchmaker import get_top_buyers, get_top_exporters
+from scoring_engine import compute_rrf_scores
+
+
+def _matching(bucket, predicate) -> list:
+    return [p for p in bucket.to_profiles() if predicate(p)]
+
+
+def test_select_matches_predicate(market):
+    _, importers, _, _ = market
+    bits    = BitmapIndex(importers)
+    country = sorted(set(importers.strings("Country")))[:2]
+    cert    = importers.cert_vocab[0]
+    clauses = [("Country", country), ("Preferred_Channel", ["WhatsApp", "Email"]),
+               ("Certification", [cert])]
+    rows    = bits.select(clauses)
+    ref     = [i for i, p in enumerate(importers.to_profiles())
+               if p.Country in country and p.Preferred_Channel in ("WhatsApp", "Email")
+               and cert in p.Certification]
+    assert rows.tolist() == ref
+    assert bits.count(clauses) == len(ref)
+    assert bits.count([("Country", ["<nowhere>"])]) == 0
+
+
+def test_geo_tier_matches_compute_geo_score(market):
+    exporters, _, index, _ = market
+    for anchor in anchors_for(exporters, index, "importer", n=3):
+        bucket = index.candidates("importer", anchor.Industry)
+        tiers  = ["Premium", "Strong"]
+        rows   = index.bitmaps("importer", anchor.Industry).select(
+                     filter_clauses(anchor, bucket, {"geo_tier": tiers}))
+        ref    = [i for i, p in enumerate(bucket.to_profiles())
+                  if compute_geo_score(anchor.State, p.Country, anchor.Industry)["geo_label"] in tiers]
+        assert rows.tolist() == ref
+
+
+@pytest.mark.parametrize("memory_mb", [None, 0.05])
+def test_filtered_top_buyers_score_the_filtered_bucket(market, memory_mb):
+    exporters, _, index, risk = market
+    filters = {"Preferred_Channel": ["WhatsApp", "LinkedIn"], "Certification": "ISO9001"}
+    for anchor in anchors_for(exporters, index, "importer", n=3):
+        bucket = index.candidates("importer", anchor.Industry)
+        kept   = _matching(bucket, lambda p: p.Preferred_Channel in ("WhatsApp", "LinkedIn")
+                                             and "ISO9001" in p.Certification)
+        got    = get_top_buyers(anchor, index, risk, top_k=10, with_breakdown=False,
+                                memory_mb=memory_mb, filters=filters)
+        ref    = compute_rrf_scores(anchor, kept, risk, top_k=10, with_breakdown=False) if kept else []
+        assert got == ref
+
+
+def test_filtered_top_exporters_score_the_filtered_bucket(market):
+    _, importers, index, risk = market
+    for anchor in anchors_for(importers, index, "exporter", n=3):
+        bucket = index.candidates("exporter", anchor.Industry)
+        kept   = _matching(bucket, lambda p: p.MSME_Flag == 1)
+        got    = get_top_exporters(anchor, index, risk, top_k=10, with_breakdown=False,
+                                   filters={"MSME_Flag": 1})
+        ref    = compute_rrf_scores(anchor, kept, risk, top_k=10, with_breakdown=False) if kept else []
+        assert got == ref
+
+
+def test_unknown_filter_field_raises(market):
+    exporters, _, index, risk = market
+    anchor = anchors_for(exporters, index, "importer", n=1)[0]
+    with pytest.raises(ValueError):
+        get_top_buyers(anchor, index, risk, filters={"State": "Gujarat"})
+    with pytest.raises(ValueError):
+        get_top_buyers(anchor, index, risk, filters={"geo_tier": ["Nowhere"]})
@@ -0,0 +1,22 @@
+# test_geo_engine.py  —  GEO_TABLE must agree with compute_geo_score
+#
+#   python -m pytest -q test_geo_engine.py
+
+from geo_engine import GEO_FIELDS, GEO_TABLE, check_geo_table, compute_geo_score
+
+
+def test_geo_table_matches_compute_geo_score():
+    check_geo_table()
+
+
+def test_geo_table_vector_gather(market):
+    # the vectorised path: encode whole columns, gather once, compare per pair
+    exporters, importers, _, _ = market
+    states     = exporters.strings("State")[:300]
+    industries = exporters.strings("Industry")[:300]
+    countries  = importers.strings("Country")[:300]
+    got = GEO_TABLE.gather(GEO_TABLE.encode("state", states), GEO_TABLE.encode("country", countries),
+                           GEO_TABLE.encode("industry", industries))
+    for i, (s, c, d) in enumerate(zip(states, countries, industries)):
+        ref = compute_geo_score(s, c, d)
+        assert [float(got[f][i]) for f in GEO_FIELDS] == [ref[f] for f in GEO_FIELDS]
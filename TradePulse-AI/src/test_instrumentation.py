@@ -0,0 +1,29 @@
+# test_instrumentation.py  —  The probe must label each query with its anchor
+#
+#   python -m pytest -q test_instrumentation.py
+
+import instrumentation
+import pytest
+from conftest import anchors_for
+from scoring_engine import compute_rrf_scores
+
+
+@pytest.fixture
+def hist():
+    sink = instrumentation.enable(instrumentation.HistogramSink(slowest=50))
+    yield sink
+    instrumentation.disable()
+
+
+@pytest.mark.parametrize("as_profile", [False, True])
+def test_probe_records_anchor_id(market, hist, as_profile):
+    exporters, importers, index, risk = market
+    anchor = anchors_for(exporters, index, "importer", n=1)[0]
+    cands  = index.candidates("importer", anchor.Industry)
+    if as_profile:
+        anchor = anchor.to_profile()
+    compute_rrf_scores(anchor, cands, risk, top_k=5)
+
+    [(_, anchor_id, industry, n)] = hist.slowest()
+    assert anchor_id == anchor.Exporter_ID
+    assert (industry, n) == (anchor.Industry, len(cands))
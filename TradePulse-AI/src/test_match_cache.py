@@ -0,0 +1,36 @@
+# test_match_cache.py  —  Cache hits must equal live scoring; rebuilds swap the directory in
+#
+#   python -m pytest -q test_match_cache.py
+
+import os
+import pytest
+from match_cache import CachedMatcher, MatchCache, build_match_cache
+from match_index import MatchIndex
+from matchmaker import get_top_buyers, get_top_exporters
+from profile_store import matching_view
+
+
+@pytest.fixture(scope="module")
+def index(market):
+    exporters, importers, _, _ = market
+    return MatchIndex(matching_view(exporters), matching_view(importers))
+
+
+def test_cache_hits_match_live_scoring(market, index, tmp_path):
+    risk = market[3]
+    path = str(tmp_path / "cache")
+    build_match_cache(path, index, risk, top_k=20)
+    build_match_cache(path, index, risk, top_k=20)            # rebuild over an existing cache
+    assert sorted(os.listdir(tmp_path)) == ["cache"]
+
+    matcher   = CachedMatcher(index, risk, MatchCache(path))
+    industry  = index.industries("exporter")[0]
+    exporters = index.candidates("exporter", industry)[:30]
+    importers = index.candidates("importer", industry)[:30]
+    for e in exporters:
+        assert matcher.top_buyers(e, top_k=10) == get_top_buyers(e, index, risk, top_k=10,
+                                                                 with_breakdown=False)
+    for b in importers:
+        assert matcher.top_exporters(b, top_k=20) == get_top_exporters(b, index, risk, top_k=20,
+                                                                       with_breakdown=False)
+    assert (matcher.hits, matcher.misses) == (len(exporters) + len(importers), 0)
@@ -0,0 +1,78 @@
+# test_match_graph.py  —  Mutual edges must be the intersection of the two one-sided top-K lists
+#
+#   python -m pytest -q test_match_graph.py
+
+import dataclasses
+import pytest
+from match_graph import MatchGraph
+from match_index import MatchIndex
+from matchmaker import get_top_buyers, get_top_exporters
+from profile_store import matching_view
+
+TOP_K = 10
+
+
+@pytest.fixture
+def graph(market):
+    exporters, importers, _, risk = market
+    index = MatchIndex(matching_view(exporters), matching_view(importers))   # updated below
+    return MatchGraph(index, risk, top_k=TOP_K).build()
+
+
+def _reference(index, risk, industry) -> dict:
+    """{(exporter_id, buyer_id): (score, exporter_rank, buyer_rank)} from one-sided queries."""
+    fwd = {e.Exporter_ID: get_top_buyers(e, index, risk, top_k=TOP_K, with_breakdown=False)
+           for e in index.candidates("exporter", industry)}
+    bwd = {b.Buyer_ID: {e: (r, s) for r, (e, s) in
+                        enumerate(get_top_exporters(b, index, risk, top_k=TOP_K, with_breakdown=False), 1)}
+           for b in index.candidates("importer", industry)}
+    out = {}
+    for e, buyers in fwd.items():
+        for r, (b, a) in enumerate(buyers, 1):
+            if e in bwd[b]:
+                r2, c = bwd[b][e]
+                out[(e, b)] = (2 * a * c / (a + c) if a + c else 0.0, r, r2)
+    return out
+
+
+def _edges(graph, industry) -> dict:
+    df = graph.edges(industry)
+    return {(e, b): (s, r1, r2) for e, b, s, r1, r2 in
+            zip(df.exporter_id, df.buyer_id, df.score, df.exporter_rank, df.buyer_rank)}
+
+
+def test_mutual_edges_match_one_sided_top_k(graph):
+    for industry in graph.index.industries("exporter")[:2]:
+        ref = _reference(graph.index, graph.risk_map, industry)
+        got = _edges(graph, industry)
+        assert ref and got.keys() == ref.keys()
+        for key, (score, r1, r2) in ref.items():
+            assert got[key][0] == pytest.approx(score, rel=1e-6)     # stored as float32
+            assert got[key][1:] == (r1, r2)
+
+
+def test_neighbours_best_first_from_both_sides(graph):
+    industry = graph.index.industries("exporter")[0]
+    ref      = _reference(graph.index, graph.risk_map, industry)
+    for side, key in (("exporter", 0), ("importer", 1)):
+        for pid in {k[key] for k in ref}:
+            nbrs = graph.neighbours(side, pid)
+            assert [s for _, s, *_ in nbrs] == sorted((s for _, s, *_ in nbrs), reverse=True)
+            assert {n[0] for n in nbrs} == {k[1 - key] for k in ref if k[key] == pid}
+    e, b = next(iter(ref))
+    assert graph.is_mutual(e, b)
+    assert graph.neighbours("exporter", "<unknown>") == []
+
+
+def test_refresh_rebuilds_only_changed_industries(graph):
+    index    = graph.index
+    assert graph.stale() == []
+    industry = index.industries("importer")[0]
+    buyer    = index.candidates("importer", industry)[0].to_profile()
+    index.update("importer", [dataclasses.replace(buyer, Intent_Score=0.99)])
+
+    assert graph.stale() == [industry]
+    assert graph.refresh() == [industry]
+    assert graph.stale() == []
+    fresh = MatchGraph(index, graph.risk_map, top_k=TOP_K).build()
+    assert _edges(graph, industry) == _edges(fresh, industry)
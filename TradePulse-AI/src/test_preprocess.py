@@ -0,0 +1,38 @@
+# test_preprocess.py  —  Chunked loading must agree with one-shot loading
+#
+#   python -m pytest -q test_preprocess.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from preprocess import load_table, split_cert, split_cert_csr
+
+
+@pytest.mark.parametrize("side", ["exporter", "importer"])
+@pytest.mark.parametrize("chunksize", [7, 137, 10_000])
+def test_chunked_load_matches_unchunked(paths, side, chunksize):
+    path = paths[side + "s"]
+    ref  = load_table(path, side)
+    got  = load_table(path, side, chunksize=chunksize)
+    assert len(got) == len(ref)
+    # compared by value: a chunk whose column is all whole numbers is stored
+    # as ints, so a lone -0.0 comes back as 0.0 (equal, but hashed differently)
+    for name, kind in ref.kinds.items():
+        if kind in ("float", "int"):
+            assert np.array_equal(got.numeric(name), ref.numeric(name), equal_nan=True), name
+        elif kind == "list":
+            assert [sorted(c) for c in got.certifications()] == \
+                   [sorted(c) for c in ref.certifications()]
+        else:
+            assert np.array_equal(got.strings(name), ref.strings(name)), name
+
+
+@pytest.mark.parametrize("values", [
+    ["ISO 9001, FSSAI", None, "none", "CE,ISO 9001"],
+    [None, None, np.nan],                               # a chunk without any certifications
+])
+def test_split_cert_csr_matches_split_cert(values):
+    series = pd.Series(values, dtype=object)
+    offsets, codes, vocab = split_cert_csr(series)
+    got = [[vocab[c] for c in codes[offsets[i]:offsets[i + 1]]] for i in range(len(series))]
+    assert got == [split_cert(v) for v in values]
@@ -0,0 +1,74 @@
+# test_profile_store.py  —  Incremental append() must agree with a store rebuilt from scratch
+#
+#   python -m pytest -q test_profile_store.py
+
+import numpy as np
+import pytest
+from profile_store import SIGNAL_FIELDS, ProfileStore, snapshot_times
+from profile_table import ProfileTable
+
+STEPS = (1, 5, 37, 200, 3, 600, 1, 9)
+
+
+def _same_latest(got, ref, side):
+    assert np.array_equal(got.ids(), ref.ids())
+    assert np.array_equal(got.strings("Date"), ref.strings("Date"))
+    for name in SIGNAL_FIELDS[side]:
+        assert np.array_equal(got.numeric(name), ref.numeric(name)), name
+    for name, values in ref.features.items():
+        assert np.array_equal(got.features[name], values), name
+
+
+@pytest.mark.parametrize("side", ["exporter", "importer"])
+@pytest.mark.parametrize("shuffled", [False, True])
+@pytest.mark.parametrize("cached", [False, True])
+def test_append_matches_rebuild(market, side, shuffled, cached):
+    full  = market[0] if side == "exporter" else market[1]
+    table = full.take(np.random.default_rng(1).permutation(len(full)) if shuffled
+                      else np.arange(len(full)))
+    at    = len(table) // 2
+    store = ProfileStore(table[:at])
+    if cached:                                   # latest views exist and get patched
+        store.latest(), store.latest(aggregate=True)
+
+    for size in STEPS:
+        part, at = table[at:at + size], at + size
+        changed  = store.append(part)
+        ref      = ProfileStore(table[:at])
+
+        ids, rows = ref._latest_rows(part.ids())
+        assert changed == set(ids[rows >= at - size].tolist())
+        for name in ("unique", "order", "offsets", "times"):
+            assert np.array_equal(getattr(store, name), getattr(ref, name)), name
+        assert np.array_equal(store.table.row_hashes(), ref.table.row_hashes())
+        for aggregate in (False, True):
+            _same_latest(store.latest(aggregate), ref.latest(aggregate), side)
+        pid = ref.unique[0]
+        assert store.latest_row(pid, True).to_profile() == ref.latest_row(pid, True).to_profile()
+
+
+def test_latest_is_newest_snapshot(market):
+    exporters = market[0]
+    store     = ProfileStore(exporters)
+    times     = snapshot_times(exporters)
+    latest    = store.latest()
+    assert len(latest) == len(np.unique(exporters.ids())) < len(exporters)
+    for pid, date in list(zip(latest.ids().tolist(), latest.strings("Date").tolist()))[:50]:
+        rows = np.flatnonzero(exporters.ids() == pid)
+        last = rows[np.lexsort((rows, times[rows]))[-1]]    # equal dates: the later row wins
+        assert date == exporters.strings("Date")[last]
+        assert len(store.history(pid)) == len(rows)
+
+
+def test_append_keeps_large_cert_vocab(market):
+    exporters = market[0]
+    row   = exporters[100].to_profile()
+    data  = {name: [getattr(row, name)] for name in exporters.kinds}
+    data["Certification"] = [[f"CERT-{i}" for i in range(40_000)]]   # past what int16 can index
+    part  = ProfileTable.concat([exporters[100:400], ProfileTable.from_columns(exporters.profile_cls, data)])
+
+    store = ProfileStore(exporters[:100])
+    store.append(part)
+    ref   = ProfileStore(ProfileTable.concat([exporters[:100], part]))
+    assert store.table.cert_codes.dtype == np.int32
+    assert store.table.certifications() == ref.table.certifications()
@@ -0,0 +1,25 @@
+# test_profile_table.py  —  Certification codes must survive vocabularies past int16
+#
+#   python -m pytest -q test_profile_table.py
+
+import numpy as np
+from profile_table import ProfileTable
+
+N_CERTS = 40_000                     # more distinct certifications than int16 can index
+
+
+def test_large_cert_vocab_round_trips(market):
+    exporters = market[0]
+    n      = len(exporters)
+    certs  = [[f"CERT-{i}", f"CERT-{(i * 7919) % N_CERTS}"] for i in range(N_CERTS)]
+    data   = {name: [getattr(p, name) for p in exporters.to_profiles()] for name in exporters.kinds}
+    tables = []
+    for lo in range(0, N_CERTS, n):
+        part = {name: values[:min(n, N_CERTS - lo)] for name, values in data.items()}
+        part["Certification"] = certs[lo:lo + n]
+        tables.append(ProfileTable.from_columns(exporters.profile_cls, part))
+
+    whole = ProfileTable.concat(tables)
+    assert whole.cert_codes.dtype == np.int32
+    assert len(whole.cert_vocab) == N_CERTS
+    assert whole.certifications() == certs
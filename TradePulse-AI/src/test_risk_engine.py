@@ -0,0 +1,44 @@
+# test_risk_engine.py  —  RiskAggregator must agree with compute_industry_risk
+#
+#   python -m pytest -q test_risk_engine.py
+
+import pandas as pd
+import pytest
+from preprocess import REFERENCE_DATE, load_news
+from risk_engine import RiskAggregator, compute_industry_risk
+
+
+def _assert_same(got, ref):
+    assert got.keys() == ref.keys()
+    for industry, value in ref.items():
+        assert got[industry] == pytest.approx(value, abs=1e-12)
+
+
+def test_risk_aggregator_matches_batch(paths):
+    news  = load_news(paths["news"])
+    start = pd.Timestamp(REFERENCE_DATE) - pd.Timedelta(days=30)
+    half  = len(news) // 2
+
+    agg = RiskAggregator(now=start)
+    agg.add(news.iloc[:half])                                     # history in bulk
+    for event in news.iloc[half:half + 20].to_dict("records"):    # single events
+        agg.add(event)
+    agg.advance(REFERENCE_DATE)
+    agg.add(news.iloc[half + 20:])                                # after moving `now`
+
+    _assert_same(agg.risk_map(), compute_industry_risk(news, REFERENCE_DATE))
+
+
+def test_risk_aggregator_intraday_advance(paths):
+    # ages are whole days: moving `now` within a day must not age anything,
+    # and a later advance counts calendar days, exactly like the batch path
+    news = load_news(paths["news"])
+
+    agg = RiskAggregator(now="2025-01-01")
+    agg.add(news.iloc[:4000])
+    agg.advance("2025-01-01 18:00")
+    _assert_same(agg.risk_map(), compute_industry_risk(news.iloc[:4000], pd.Timestamp("2025-01-01 18:00")))
+
+    agg.add(news.iloc[4000:])
+    agg.advance("2025-01-03")
+    _assert_same(agg.risk_map(), compute_industry_risk(news, pd.Timestamp("2025-01-03")))
@@ -0,0 +1,36 @@
+# test_scoring_engine.py  —  The batched and streaming scorers must agree with compute_rrf_scores
+#
+#   python -m pytest -q test_scoring_engine.py
+
+import pytest
+from conftest import anchors_for
+from scoring_engine import compute_rrf_scores, compute_rrf_scores_many, compute_rrf_scores_streaming
+
+
+# ── Many anchors ──────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("memory_mb", [0.05, 64])
+def test_many_matches_per_anchor(market, memory_mb):
+    exporters, importers, index, risk = market
+    for anchor in anchors_for(importers, index, "exporter", n=3):
+        cands   = index.candidates("exporter", anchor.Industry)
+        anchors = index.candidates("importer", anchor.Industry)[:40]
+        got     = compute_rrf_scores_many(anchors, cands, risk, top_k=10,
+                                          with_breakdown=False, memory_mb=memory_mb)
+        ref     = [compute_rrf_scores(a, cands, risk, top_k=10, with_breakdown=False)
+                   for a in anchors]
+        assert got == ref
+
+
+# ── Streaming ─────────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("memory_mb", [0.01, 0.5, 64])
+@pytest.mark.parametrize("with_breakdown", [False, True])
+def test_streaming_matches_in_memory(market, memory_mb, with_breakdown):
+    exporters, importers, index, risk = market
+    for anchor in anchors_for(exporters, index, "importer"):
+        cands = index.candidates("importer", anchor.Industry)
+        ref   = compute_rrf_scores(anchor, cands, risk, top_k=25, with_breakdown=with_breakdown)
+        got   = compute_rrf_scores_streaming(anchor, cands, risk, top_k=25,
+                                             with_breakdown=with_breakdown, memory_mb=memory_mb)
+        assert got == ref